@@ -0,0 +1,5 @@
+# finpi_scraper/benchmarks/__init__.py
+"""
+Офлайн-бенчмарки FinPi Scraper: HTML-фикстуры, синтетические каталоги
+и локальная замена ScraperAPI.
+"""
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Сравнение двух JSON-отчетов run_benchmarks.py (например, до и после коммита).
+
+Запуск (из finpi_scraper/):
+    python -m benchmarks.compare_results benchmarks/results/old.json benchmarks/results/new.json
+Код возврата 1, если хотя бы один бенчмарк замедлился больше порога.
+"""
+import argparse
+import json
+import sys
+
+DEFAULT_THRESHOLD = 0.10  # Замедление больше чем на 10% считаем регрессией
+
+
+def result_key(result):
+    """Ключ, по которому сопоставляются записи двух отчетов."""
+    params = {k: v for k, v in result["params"].items() if k not in ("server", "products_found", "html_bytes")}
+    return result["benchmark"], json.dumps(params, sort_keys=True, ensure_ascii=False)
+
+
+def load_report(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_reports(old_report, new_report, threshold=DEFAULT_THRESHOLD):
+    """
+    Сопоставляет результаты двух отчетов.
+
+    Returns:
+        list[dict]: Строки сравнения с полями benchmark, params, old, new, ratio, regression.
+    """
+    old_results = {result_key(r): r for r in old_report["results"]}
+    rows = []
+    for result in new_report["results"]:
+        key = result_key(result)
+        if key not in old_results:
+            continue
+        old_seconds = old_results[key]["seconds"]
+        new_seconds = result["seconds"]
+        ratio = new_seconds / old_seconds if old_seconds else float('inf')
+        rows.append({
+            "benchmark": key[0],
+            "params": key[1],
+            "old": old_seconds,
+            "new": new_seconds,
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сравнение результатов бенчмарков")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    old_report, new_report = load_report(args.old), load_report(args.new)
+    print(f"📊 {old_report['meta']['commit']} → {new_report['meta']['commit']}")
+    rows = compare_reports(old_report, new_report, args.threshold)
+    for row in rows:
+        marker = "🔴" if row["regression"] else ("🟢" if row["ratio"] < 1 - args.threshold else "⚪")
+        print(f"{marker} {row['benchmark']} {row['params']}: "
+              f"{row['old']:.4f} → {row['new']:.4f} сек (x{row['ratio']:.2f})")
+
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"\n⚠️ Регрессий: {len(regressions)}")
+        return 1
+    print("\n✅ Регрессий не найдено")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
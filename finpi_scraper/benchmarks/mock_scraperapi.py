@@ -0,0 +1,253 @@
+# finpi_scraper/benchmarks/mock_scraperapi.py
+"""
+Локальная замена ScraperAPI на aiohttp для офлайн-бенчмарков.
+
+Сервер принимает те же запросы, что и api.scraperapi.com (`?api_key=...&url=...`),
+по целевому URL определяет сайт и номер страницы и отдает HTML-фикстуру
+из benchmarks/fixtures/, подменяя блок товаров синтетическими названиями
+для запрошенной страницы. Запросы к JSON-эндпоинтам (api.url_template из
+config.json) получают JSON с теми же названиями по api.products_path. Задержка ответа и доля ответов 429 настраиваются.
+
+Запуск отдельно:
+    python -m benchmarks.mock_scraperapi --port 8089 --latency-ms 300 --rate-429 0.05
+"""
+import argparse
+import asyncio
+import os
+import random
+import json
+import re
+from contextlib import asynccontextmanager
+from urllib.parse import unquote, urlparse
+
+from aiohttp import web
+
+from .synthetic_catalog import generate_product_name
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PRODUCTS_START = "<!-- products:start -->"
+PRODUCTS_END = "<!-- products:end -->"
+
+# Сайт определяется по домену целевого URL
+SITE_HOSTS = {
+    "rozetka.com.ua": "rozetka",
+    "www.tesco.com": "tesco",
+    "rostmarket.com.ua": "rost",
+    "xl-catalog-api.rozetka.com.ua": "rozetka",
+}
+SITE_LANGS = {"rozetka": "uk", "tesco": "en", "rost": "uk"}
+
+# Разметка одной карточки товара, совпадающая с селекторами из config.json
+TILE_TEMPLATES = {
+    "rozetka": '<li class="catalog-grid__cell"><rz-catalog-tile><div class="goods-tile">'
+               '<a class="tile-title" href="https://rozetka.com.ua/ua/p{pid}/">{name}</a></div></rz-catalog-tile></li>',
+    "tesco": '<li class="WL_DZ"><div class="_64Yvfa_titleContainer">'
+             '<a href="/groceries/en-GB/products/{pid}"><span>{name}</span></a></div></li>',
+    "rost": '<li class="item product product-item"><strong class="product name product-item-name">'
+            '<a class="product-item-link" href="https://rostmarket.com.ua/p{pid}.html">{name}</a></strong></li>',
+}
+
+# Путь к названиям в ответе JSON-эндпоинта (как api.products_path в config.json)
+API_PRODUCT_PATHS = {
+    "rozetka": "data.goods.item.title",
+    "rost": "data.products.items.item.name",
+}
+
+# Куда класть количество страниц в ответе JSON-эндпоинта (как api.total_pages_path)
+API_TOTAL_PAGES_PATHS = {
+    "rozetka": "data.total_pages",
+    "rost": "data.products.page_info.total_pages",
+}
+
+# Пагинация фикстур переписывается под max_pages и products_per_page мока:
+# (шаблон, замена с {pages} / {products})
+PAGINATION_SUBS = {
+    "rozetka": [(r'(/page=)\d+(/">)\d+(</a></li></ul></rz-paginator>)', r'\g<1>{pages}\g<2>{pages}\g<3>')],
+    "rost": [(r'(class="toolbar-number">)\d+', r'\g<1>{products}'),
+             (r'(\?p=)\d+(">)\d+(</a></li></ul></div>)', r'\g<1>{pages}\g<2>{pages}\g<3>')],
+    "tesco": [(r'of \d+ items', 'of {products} items'),
+              (r'(\?page=)\d+(">)\d+(</a></nav>)', r'\g<1>{pages}\g<2>{pages}\g<3>')],
+}
+
+PAGE_RE = re.compile(r'(?:page=|[?&]p=|currentPage:)(\d+)')
+
+
+def is_api_url(target_url: str) -> bool:
+    """Запрос к JSON-эндпоинту, а не к HTML-листингу."""
+    parsed = urlparse(target_url)
+    return parsed.netloc.startswith("xl-catalog-api.") or parsed.path.rstrip('/') == "/graphql"
+
+
+def load_fixture(site_name: str) -> str:
+    """Читает HTML-фикстуру сайта."""
+    with open(os.path.join(FIXTURES_DIR, f"{site_name}.html"), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def detect_page(target_url: str) -> int:
+    """Извлекает номер страницы из целевого URL (page=N, ?p=N); по умолчанию 1."""
+    match = PAGE_RE.search(unquote(target_url))
+    return int(match.group(1)) if match else 1
+
+
+class MockScraperAPI:
+    """
+    Состояние и обработчик мок-сервера.
+
+    Args:
+        latency_ms (float): Средняя задержка ответа в миллисекундах.
+        jitter_ms (float): Случайный разброс задержки (±).
+        tail_rate (float): Доля "застрявших" запросов с дополнительной задержкой tail_ms.
+        tail_ms (float): Дополнительная задержка застрявших запросов.
+        rate_429 (float): Доля запросов, на которые отвечаем 429 Too Many Requests.
+        products_per_page (int): Количество товаров на странице.
+        max_pages (int): Количество непустых страниц в листинге.
+        seed (int): Seed для названий и случайных задержек.
+    """
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, rate_429=0.0,
+                 products_per_page=36, max_pages=20, seed=42, tail_rate=0.0, tail_ms=0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tail_rate = tail_rate
+        self.tail_ms = tail_ms
+        self.rate_429 = rate_429
+        self.products_per_page = products_per_page
+        self.max_pages = max_pages
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "responses_200": 0, "responses_429": 0, "bytes_sent": 0, "tail_delays": 0}
+        self._shells = {}
+
+    def _shell(self, site_name):
+        """Возвращает (начало, конец) фикстуры вокруг блока товаров."""
+        if site_name not in self._shells:
+            html = load_fixture(site_name)
+            head, rest = html.split(PRODUCTS_START, 1)
+            _, tail = rest.split(PRODUCTS_END, 1)
+            values = {"pages": self.max_pages, "products": self.max_pages * self.products_per_page}
+            for pattern, replacement in PAGINATION_SUBS.get(site_name, []):
+                head = re.sub(pattern, replacement.format(**values), head)
+                tail = re.sub(pattern, replacement.format(**values), tail)
+            self._shells[site_name] = (head, tail)
+        return self._shells[site_name]
+
+    def render_page(self, site_name: str, page: int) -> str:
+        """Собирает HTML страницы листинга с синтетическими товарами."""
+        head, tail = self._shell(site_name)
+        tiles = []
+        if page <= self.max_pages:
+            rng = random.Random(f"{self.seed}:{site_name}:{page}")
+            template = TILE_TEMPLATES[site_name]
+            for _ in range(self.products_per_page):
+                name = generate_product_name(rng, SITE_LANGS[site_name])
+                tiles.append(template.format(pid=rng.randrange(10**8), name=name))
+        return f"{head}{PRODUCTS_START}\n" + "\n".join(tiles) + f"\n{PRODUCTS_END}{tail}"
+
+    def render_api_page(self, site_name: str, page: int) -> str:
+        """
+        Собирает ответ JSON-эндпоинта с теми же названиями, что и render_page,
+        и типичными соседними полями товара (цена, ссылка, картинка).
+        """
+        outer, _, name_key = API_PRODUCT_PATHS[site_name].partition('.item.')
+        items = []
+        if page <= self.max_pages:
+            rng = random.Random(f"{self.seed}:{site_name}:{page}")
+            for _ in range(self.products_per_page):
+                name = generate_product_name(rng, SITE_LANGS[site_name])
+                pid = rng.randrange(10**8)
+                items.append({
+                    "id": pid,
+                    name_key: name,
+                    "price": rng.randrange(100, 5000),
+                    "href": f"https://example.com/p{pid}/",
+                    "image": f"https://example.com/img/{pid}.jpg",
+                    "sell_status": "available",
+                })
+        payload = items
+        for key in reversed(outer.split('.')):
+            payload = {key: payload}
+        # Размер листинга: data.total_pages и т.п.
+        *parents, last = API_TOTAL_PAGES_PATHS[site_name].split('.')
+        node = payload
+        for key in parents:
+            node = node.setdefault(key, {})
+        node[last] = self.max_pages
+        return json.dumps(payload, ensure_ascii=False)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.stats["requests"] += 1
+        target_url = request.query.get("url", "")
+        site_name = SITE_HOSTS.get(urlparse(target_url).netloc)
+        if not site_name:
+            return web.Response(status=400, text=f"Unknown target url: {target_url}")
+
+        delay = max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        if self.tail_rate and self.rng.random() < self.tail_rate:
+            self.stats["tail_delays"] += 1
+            delay += self.tail_ms / 1000
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self.rng.random() < self.rate_429:
+            self.stats["responses_429"] += 1
+            return web.Response(status=429, text="Too Many Requests")
+
+        if is_api_url(target_url):
+            body, content_type = self.render_api_page(site_name, detect_page(target_url)), "application/json"
+        else:
+            body, content_type = self.render_page(site_name, detect_page(target_url)), "text/html"
+        self.stats["responses_200"] += 1
+        self.stats["bytes_sent"] += len(body.encode('utf-8'))
+        return web.Response(text=body, content_type=content_type)
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/", self.handle)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+
+@asynccontextmanager
+async def run_mock_server(host="127.0.0.1", port=0, **options):
+    """
+    Запускает мок-сервер в текущем event loop.
+
+    Yields:
+        tuple[str, MockScraperAPI]: Базовый URL сервера и его состояние (для статистики).
+    """
+    mock = MockScraperAPI(**options)
+    runner = web.AppRunner(mock.create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://{host}:{bound_port}", mock
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная замена ScraperAPI для бенчмарков")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Доля запросов с хвостовой задержкой")
+    parser.add_argument("--tail-ms", type=float, default=0.0, help="Хвостовая задержка в мс")
+    parser.add_argument("--products-per-page", type=int, default=36)
+    parser.add_argument("--max-pages", type=int, default=20)
+    args = parser.parse_args()
+
+    mock = MockScraperAPI(args.latency_ms, args.jitter_ms, args.rate_429,
+                          args.products_per_page, args.max_pages, tail_rate=args.tail_rate, tail_ms=args.tail_ms)
+    print(f"🧪 Мок ScraperAPI: http://{args.host}:{args.port} (SCRAPERAPI_ENDPOINT)")
+    web.run_app(mock.create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
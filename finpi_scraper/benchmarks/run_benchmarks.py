@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Воспроизводимый офлайн-набор бенчмарков FinPi Scraper.
+
+Замеряет:
+  - BaseScraper.parse на сохраненных HTML-страницах rozetka, tesco, rost;
+  - lemmatize_text, categorize_product, extract_keywords_from_products
+    и clean_file на синтетических каталогах (1k ... 1M названий);
+  - сквозную пропускную способность main_async против локального мока ScraperAPI
+    (настраиваемые задержка и доля ответов 429).
+
+Результаты сохраняются в JSON (benchmarks/results/), чтобы сравнивать коммиты
+через benchmarks/compare_results.py.
+
+Запуск (из finpi_scraper/):
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --sizes 1000 10000 100000 1000000 --nlp-max-size 10000
+    python -m benchmarks.run_benchmarks --only parse e2e --latency-ms 500 --rate-429 0.1
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.synthetic_catalog import generate_catalog, write_catalog  # noqa: E402
+from benchmarks.mock_scraperapi import MockScraperAPI, run_mock_server, load_fixture  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_NLP_MAX_SIZE = 10000  # spaCy-функции на 1M названий идут часами
+BENCH_SITES = ["rozetka", "tesco", "rost"]
+ALL_BENCHMARKS = ["parse", "lemmatize", "categorize", "clean_file", "extract_keywords", "e2e"]
+
+# Скрипт, выполняемый в изолированной копии проекта для сквозного замера main_async
+E2E_DRIVER = """
+import asyncio, glob, json, logging, os, time
+logging.basicConfig(level=logging.WARNING)
+import main
+from fetchers import scraperapi_fetcher
+scraperapi_fetcher.RETRY_DELAY = {retry_delay}
+main.BATCH_DELAY = 0
+start = time.perf_counter()
+asyncio.run(main.main_async())
+elapsed = time.perf_counter() - start
+products = 0
+for path in glob.glob(os.path.join('output', '**', '*.txt'), recursive=True):
+    with open(path, encoding='utf-8') as f:
+        products += sum(1 for line in f if line.strip())
+print(json.dumps({{"seconds": elapsed, "products": products}}))
+"""
+
+
+def measure(func, repeat: int) -> dict:
+    """
+    Выполняет func() repeat раз и возвращает медиану и минимум времени.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"seconds": statistics.median(timings), "min_seconds": min(timings), "repeat": repeat}
+
+
+def make_result(benchmark, params, timing, items, unit):
+    """Формирует запись результата с пропускной способностью."""
+    seconds = timing["seconds"]
+    return {
+        "benchmark": benchmark,
+        "params": params,
+        **timing,
+        "items": items,
+        "unit": unit,
+        "throughput": items / seconds if seconds > 0 else None,
+    }
+
+
+def load_site_configs():
+    """Возвращает первую конфигурацию каждого сайта из config.json."""
+    with open(os.path.join(PROJECT_DIR, 'config.json'), 'r', encoding='utf-8') as f:
+        configs = json.load(f)
+    by_site = {}
+    for config in configs:
+        by_site.setdefault(config['site_name'], config)
+    return by_site
+
+
+def load_alcohol_keywords():
+    with open(os.path.join(PROJECT_DIR, 'keywords', 'alcohol_keywords.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def bench_parse(args):
+    from scrapers import get_scraper
+
+    site_configs = load_site_configs()
+    results = []
+    for site_name in BENCH_SITES:
+        html = load_fixture(site_name)
+        scraper = get_scraper(site_configs[site_name])
+        found = len(scraper.parse(html))
+        timing = measure(lambda: scraper.parse(html), args.repeat * 5)
+        result = make_result("parse", {"site": site_name, "html_bytes": len(html.encode('utf-8')),
+                                       "products_found": found}, timing, 1, "pages")
+        results.append(result)
+        print(f"  parse[{site_name}]: {timing['seconds'] * 1000:.2f} мс/стр. ({found} товаров)")
+
+    # Та же страница из JSON-эндпоинта (data_source "api") для сайтов с api в config.json
+    mock = MockScraperAPI()
+    for site_name in BENCH_SITES:
+        config = site_configs[site_name]
+        if 'api' not in config:
+            continue
+        html = mock.render_page(site_name, 1)
+        body = mock.render_api_page(site_name, 1)
+        html_scraper = get_scraper(config)
+        api_scraper = get_scraper(dict(config, data_source="api"))
+        html_timing = measure(lambda: html_scraper.parse(html), args.repeat * 5)
+        timing = measure(lambda: api_scraper.parse(body), args.repeat * 5)
+        found = len(api_scraper.parse(body))
+        results.append(make_result("parse_api", {"site": site_name, "json_bytes": len(body.encode('utf-8')),
+                                                 "html_bytes": len(html.encode('utf-8')),
+                                                 "html_seconds": html_timing['seconds'],
+                                                 "products_found": found}, timing, 1, "pages"))
+        print(f"  parse_api[{site_name}]: {timing['seconds'] * 1000:.2f} мс/стр., {len(body.encode('utf-8'))} байт "
+              f"(HTML той же страницы: {html_timing['seconds'] * 1000:.2f} мс, {len(html.encode('utf-8'))} байт; "
+              f"{found} товаров)")
+    return results
+
+
+def nlp_sizes(args):
+    return [s for s in args.sizes if s <= args.nlp_max_size]
+
+
+def bench_lemmatize(args):
+    from utils.lemmatizer import lemmatize_text
+
+    results = []
+    for size in nlp_sizes(args):
+        catalog = generate_catalog(size, args.lang, args.seed)
+        timing = measure(lambda: [lemmatize_text(name, args.lang) for name in catalog], args.repeat)
+        results.append(make_result("lemmatize_text", {"size": size, "lang": args.lang}, timing, size, "names"))
+        print(f"  lemmatize_text[{size}]: {size / timing['seconds']:.0f} назв./сек")
+    return results
+
+
+def bench_categorize(args):
+    from utils.categorization import categorize_product
+
+    keywords = load_alcohol_keywords()
+    results = []
+    for size in nlp_sizes(args):
+        catalog = generate_catalog(size, args.lang, args.seed)
+        timing = measure(lambda: [categorize_product(name, keywords, args.lang) for name in catalog], args.repeat)
+        results.append(make_result("categorize_product", {"size": size, "lang": args.lang}, timing, size, "names"))
+        print(f"  categorize_product[{size}]: {size / timing['seconds']:.0f} назв./сек")
+    return results
+
+
+def bench_clean_file(args):
+    from utils.clean_products import clean_file
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.sizes:
+            source = write_catalog(os.path.join(tmp_dir, f"source_{size}.txt"), size, args.lang, args.seed, with_sku=True)
+            target = os.path.join(tmp_dir, f"catalog_{size}.txt")
+
+            timings = []
+            for _ in range(args.repeat):
+                shutil.copyfile(source, target)  # clean_file перезаписывает файл на месте
+                start = time.perf_counter()
+                clean_file(target)
+                timings.append(time.perf_counter() - start)
+            timing = {"seconds": statistics.median(timings), "min_seconds": min(timings), "repeat": args.repeat}
+            results.append(make_result("clean_file", {"size": size}, timing, size, "names"))
+            print(f"  clean_file[{size}]: {size / timing['seconds']:.0f} строк/сек")
+    return results
+
+
+def bench_extract_keywords(args):
+    from utils.keyword_extractor import extract_keywords_from_products
+
+    results = []
+    for size in nlp_sizes(args):
+        catalog = generate_catalog(size, args.lang, args.seed)
+
+        def run():
+            # Функция печатает отчет в stdout — глушим его, чтобы не искажать замер
+            with contextlib.redirect_stdout(io.StringIO()):
+                extract_keywords_from_products(catalog, args.lang)
+
+        timing = measure(run, args.repeat)
+        results.append(make_result("extract_keywords_from_products", {"size": size, "lang": args.lang},
+                                   timing, size, "names"))
+        print(f"  extract_keywords_from_products[{size}]: {size / timing['seconds']:.0f} назв./сек")
+    return results
+
+
+def prepare_e2e_project(tmp_dir, args):
+    """
+    Копирует код проекта во временную директорию и пишет config.json
+    с тремя включенными сайтами, чтобы сквозной прогон не трогал реальный output/.
+    """
+    ignore = shutil.ignore_patterns('__pycache__', 'output', 'benchmarks', 'tests', '*.log', '.env')
+    for name in ['main.py', 'scrapers', 'fetchers', 'utils', 'keywords']:
+        source = os.path.join(PROJECT_DIR, name)
+        target = os.path.join(tmp_dir, name)
+        if os.path.isdir(source):
+            shutil.copytree(source, target, ignore=ignore)
+        else:
+            shutil.copyfile(source, target)
+
+    configs = []
+    for site_name, config in load_site_configs().items():
+        config = dict(config, enabled=True, target_count=args.e2e_target, hedge_requests=args.hedge)
+        configs.append(config)
+    with open(os.path.join(tmp_dir, 'config.json'), 'w', encoding='utf-8') as f:
+        json.dump(configs, f, ensure_ascii=False, indent=2)
+
+
+async def run_e2e(args):
+    server_options = {
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "rate_429": args.rate_429,
+        "products_per_page": args.products_per_page,
+        "seed": args.seed,
+        "tail_rate": args.tail_rate,
+        "tail_ms": args.tail_ms,
+    }
+    async with run_mock_server(**server_options) as (endpoint, mock):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            prepare_e2e_project(tmp_dir, args)
+            env = dict(os.environ, SCRAPERAPI_KEY="benchmark", SCRAPERAPI_ENDPOINT=endpoint)
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, '-c', E2E_DRIVER.format(retry_delay=args.retry_delay),
+                cwd=tmp_dir, env=env,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            )
+            stdout, stderr = await process.communicate()
+            if process.returncode != 0:
+                raise RuntimeError(f"Сквозной прогон завершился с ошибкой:\n{stderr.decode('utf-8', 'replace')}")
+        run_info = json.loads(stdout.decode('utf-8').strip().splitlines()[-1])
+        return run_info, dict(mock.stats)
+
+
+def bench_e2e(args):
+    timings, run_info, server_stats = [], None, None
+    for _ in range(args.repeat):
+        run_info, server_stats = asyncio.run(run_e2e(args))
+        timings.append(run_info["seconds"])
+    timing = {"seconds": statistics.median(timings), "min_seconds": min(timings), "repeat": args.repeat}
+    params = {
+        "sites": BENCH_SITES,
+        "target_count": args.e2e_target,
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "rate_429": args.rate_429,
+        "tail_rate": args.tail_rate,
+        "tail_ms": args.tail_ms,
+        "hedge": args.hedge,
+        "server": server_stats,
+    }
+    result = make_result("main_async", params, timing, run_info["products"], "products")
+    print(f"  main_async: {timing['seconds']:.2f} сек, {run_info['products']} товаров, "
+          f"запросов {server_stats['requests']} (429: {server_stats['responses_429']})")
+    return [result]
+
+
+BENCHMARKS = {
+    "parse": bench_parse,
+    "lemmatize": bench_lemmatize,
+    "categorize": bench_categorize,
+    "clean_file": bench_clean_file,
+    "extract_keywords": bench_extract_keywords,
+    "e2e": bench_e2e,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Офлайн-бенчмарки FinPi Scraper")
+    parser.add_argument("--only", nargs="+", choices=ALL_BENCHMARKS, default=ALL_BENCHMARKS,
+                        help="Какие бенчмарки запускать")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES,
+                        help="Размеры синтетических каталогов")
+    parser.add_argument("--nlp-max-size", type=int, default=DEFAULT_NLP_MAX_SIZE,
+                        help="Максимальный размер каталога для функций со spaCy")
+    parser.add_argument("--lang", default="uk")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Задержка мока ScraperAPI")
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--rate-429", type=float, default=0.05, help="Доля ответов 429")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Доля запросов с хвостовой задержкой")
+    parser.add_argument("--tail-ms", type=float, default=0.0, help="Хвостовая задержка в мс")
+    parser.add_argument("--hedge", action="store_true", help="Включить hedge_requests в сквозном прогоне")
+    parser.add_argument("--products-per-page", type=int, default=36)
+    parser.add_argument("--e2e-target", type=int, default=200, help="target_count для сквозного прогона")
+    parser.add_argument("--retry-delay", type=float, default=0.2, help="RETRY_DELAY в сквозном прогоне")
+    parser.add_argument("--output", help="Путь к JSON с результатами (по умолчанию benchmarks/results/)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    commit = git_commit()
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec='seconds'),
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "nlp_max_size": args.nlp_max_size,
+            "lang": args.lang,
+            "seed": args.seed,
+        },
+        "results": [],
+    }
+
+    print("⏱️ БЕНЧМАРКИ FINPI SCRAPER")
+    print("=" * 50)
+    for name in ALL_BENCHMARKS:
+        if name in args.only:
+            print(f"\n▶️ {name}")
+            report["results"].extend(BENCHMARKS[name](args))
+
+    output_path = args.output
+    if not output_path:
+        results_dir = os.path.join(BENCH_DIR, "results")
+        os.makedirs(results_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_path = os.path.join(results_dir, f"{stamp}_{commit}.json")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Результаты сохранены: {output_path}")
+    return output_path
+
+
+if __name__ == "__main__":
+    main()
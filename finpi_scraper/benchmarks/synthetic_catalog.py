@@ -0,0 +1,83 @@
+# finpi_scraper/benchmarks/synthetic_catalog.py
+"""
+Генератор синтетических каталогов товаров для бенчмарков.
+Названия похожи на реальные (тип напитка, бренд, выдержка, объем, крепость)
+и детерминированы для заданного seed, чтобы замеры были воспроизводимы.
+"""
+import random
+
+PRODUCT_TYPES = {
+    "uk": ["Віскі", "Горілка", "Ром", "Джин", "Текіла", "Коньяк", "Лікер", "Чача",
+           "Бренді", "Вино", "Пиво", "Самбука", "Абсент", "Настоянка", "Сироп"],
+    "en": ["Whisky", "Vodka", "Rum", "Gin", "Tequila", "Cognac", "Liqueur", "Brandy",
+           "Wine", "Beer", "Sambuca", "Absinthe", "Syrup"],
+}
+BRANDS = [
+    "Jameson", "Jack Daniel's", "Johnnie Walker", "Macallan", "Glenfiddich", "Bacardi",
+    "Captain Morgan", "Beefeater", "Hendrick's", "Olmeca", "Hennessy", "Martell",
+    "Baileys", "Jagermeister", "Finlandia", "Absolut", "Nemiroff", "Хортиця", "Шустов",
+    "Арарат", "Коблево", "Оболонь", "Львівське", "Aperol", "Campari", "Monin",
+]
+DESCRIPTORS = {
+    "uk": ["витримка 12 років", "односолодовий", "купажований", "преміум", "класичний",
+           "у подарунковій упаковці", "зі смаком вишні", "безалкогольний", "темний", "золотий"],
+    "en": ["12 Year Old", "Single Malt", "Blended", "Premium", "Classic",
+           "Gift Box", "Cherry Flavour", "Alcohol Free", "Dark", "Gold"],
+}
+VOLUMES = ["0.05 л", "0.2 л", "0.375 л", "0.5 л", "0.7 л", "1 л", "1.75 л"]
+VOLUMES_EN = ["5cl", "20cl", "35cl", "50cl", "70cl", "1L", "1.75L"]
+STRENGTHS = ["37.5%", "40%", "43%", "45%", "12%", "4.8%", "0%"]
+
+
+def generate_product_name(rng: random.Random, lang: str = "uk", with_sku: bool = False) -> str:
+    """
+    Генерирует одно правдоподобное название товара.
+
+    Args:
+        rng (random.Random): Источник случайности.
+        lang (str): 'uk' или 'en'.
+        with_sku (bool): Добавить артикул в скобках (для бенчмарка очистки).
+
+    Returns:
+        str: Название товара.
+    """
+    lang = lang if lang in PRODUCT_TYPES else "uk"
+    parts = [rng.choice(PRODUCT_TYPES[lang]), rng.choice(BRANDS)]
+    if rng.random() < 0.6:
+        parts.append(rng.choice(DESCRIPTORS[lang]))
+    parts.append(rng.choice(VOLUMES if lang != "en" else VOLUMES_EN))
+    parts.append(rng.choice(STRENGTHS))
+    # Уникальный хвост, чтобы в больших каталогах не было коллизий
+    parts.append(f"#{rng.randrange(10**9):09d}")
+    name = " ".join(parts)
+    if with_sku:
+        name += f" ({rng.randrange(10**6):06d}) (арт. {rng.randrange(10**5)})"
+    return name
+
+
+def generate_catalog(size: int, lang: str = "uk", seed: int = 42, with_sku: bool = False) -> list[str]:
+    """
+    Генерирует синтетический каталог заданного размера.
+
+    Args:
+        size (int): Количество названий (от 1k до 1M в стандартном наборе).
+        lang (str): Язык названий.
+        seed (int): Seed генератора для воспроизводимости.
+        with_sku (bool): Добавлять ли артикулы в скобках.
+
+    Returns:
+        list[str]: Список названий товаров.
+    """
+    rng = random.Random(f"{seed}:{lang}:{size}")
+    return [generate_product_name(rng, lang, with_sku) for _ in range(size)]
+
+
+def write_catalog(path: str, size: int, lang: str = "uk", seed: int = 42, with_sku: bool = False) -> str:
+    """
+    Записывает синтетический каталог в текстовый файл (одно название на строку),
+    в том же формате, что и файлы в output/.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        for name in generate_catalog(size, lang, seed, with_sku):
+            f.write(name + '\n')
+    return path
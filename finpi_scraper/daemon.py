@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Режим демона: один долгоживущий процесс вместо запуска main.py по cron.
+
+Модели spaCy, стоп-слова NLTK и разобранные файлы ключевых слов загружаются один раз,
+множества уже известных товаров каждой группы остаются в памяти между запусками.
+Каждая группа (site_name, group) обновляется по своему интервалу —
+refresh_interval_minutes из config.json (для группы берется наименьший интервал
+среди ее конфигураций). Изменения config.json подхватываются без перезапуска,
+файлы ключевых слов перечитываются после изменения (load_external_keywords).
+
+SIGTERM/SIGINT: текущая группа дообрабатывается и сохраняется, расписание
+записывается в daemon_state.json, после чего процесс завершается. Повторный
+сигнал прерывает текущую группу немедленно.
+
+Примеры (из finpi_scraper/):
+    python daemon.py                # все включенные сайты
+    python daemon.py rost --run-now # только rost, не дожидаясь сохраненного расписания
+"""
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import signal
+import sys
+import time
+from datetime import datetime
+
+from fetchers import close_browser_pool
+from main import (
+    clean_output_files, create_category_folders, load_grouped_configs, load_known_products, process_config_group,
+    setup_logging,
+)
+from utils import deltas
+from utils.log_pipeline import flush_logging
+from utils.product_io import atomic_write
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(SCRIPT_DIR, 'config.json')
+DEFAULT_STATE_PATH = os.path.join(SCRIPT_DIR, 'daemon_state.json')
+DEFAULT_REFRESH_INTERVAL_MINUTES = 24 * 60  # Если в конфигурации не задан refresh_interval_minutes
+CONFIG_POLL_SECONDS = 30  # Как часто проверять изменения config.json
+
+
+def group_label(group_key) -> str:
+    return f"{group_key[0]}_{group_key[1]}"
+
+
+def group_interval_seconds(configs) -> float:
+    """Интервал обновления группы: наименьший refresh_interval_minutes среди ее конфигураций."""
+    minutes = min(config.get('refresh_interval_minutes', DEFAULT_REFRESH_INTERVAL_MINUTES) for config in configs)
+    return minutes * 60
+
+
+class ScraperDaemon:
+    """
+    Планировщик групп с теплым состоянием.
+
+    Args:
+        target_site_name (str): Если задан, обслуживается только этот сайт.
+        state_path (str): Файл с расписанием (переживает перезапуск).
+        run_now (bool): Запустить все группы сразу, игнорируя сохраненное расписание.
+        config_path (str): Путь к config.json.
+    """
+    def __init__(self, target_site_name=None, state_path=DEFAULT_STATE_PATH, run_now=False, config_path=CONFIG_PATH):
+        self.target_site_name = target_site_name
+        self.state_path = state_path
+        self.config_path = config_path
+        self.groups = {}  # (site, group) → [config, ...]
+        self.known_products = {}  # (site, group) → set или ProductHashSet (теплое множество для дедупликации)
+        self.next_run = {}  # (site, group) → время следующего запуска (time.time())
+        self.last_run = {}  # (site, group) → ISO-время последнего завершенного запуска
+        self.saved_schedule = {}  # "site_group" → запись из state_path
+        self.config_mtime = None
+        self.stop_event = asyncio.Event()
+        self.current_task = None
+        if not run_now:
+            self.load_state()
+
+    def load_state(self) -> None:
+        """Восстанавливает расписание из state_path."""
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Не удалось прочитать состояние демона {self.state_path}: {e}")
+            return
+        self.saved_schedule = state.get('groups', {})
+        logging.info(f"🗓️ Восстановлено расписание групп: {len(self.saved_schedule)}")
+
+    def save_state(self) -> None:
+        """Атомарно записывает расписание в state_path."""
+        state = {
+            "saved_at": datetime.now().isoformat(timespec='seconds'),
+            "groups": {
+                group_label(key): {"next_run": self.next_run.get(key), "last_run": self.last_run.get(key)}
+                for key in self.groups
+            },
+        }
+        with atomic_write(self.state_path) as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+
+    def reload_config_if_changed(self) -> bool:
+        """
+        Перечитывает config.json, если он изменился. Новые группы ставятся в очередь,
+        удаленные забываются вместе с их множествами товаров.
+
+        Returns:
+            bool: True, если конфигурация была (пере)загружена.
+        """
+        try:
+            mtime = os.stat(self.config_path).st_mtime_ns
+        except OSError as e:
+            logging.error(f"config.json недоступен: {e}")
+            return False
+        if mtime == self.config_mtime:
+            return False
+
+        grouped_configs = load_grouped_configs(self.target_site_name, self.config_path)
+        if grouped_configs is None:
+            # Некорректный файл: продолжаем со старой конфигурацией, ждем следующего изменения
+            self.config_mtime = mtime
+            return False
+
+        first_load = self.config_mtime is None
+        self.config_mtime = mtime
+        now = time.time()
+        for key in set(self.groups) - set(grouped_configs):
+            self.known_products.pop(key, None)
+            self.next_run.pop(key, None)
+            logging.info(f"➖ Группа {group_label(key)} больше не обслуживается")
+        for key in grouped_configs:
+            if key not in self.next_run:
+                saved = self.saved_schedule.get(group_label(key), {})
+                self.next_run[key] = saved.get('next_run') or now
+                self.last_run[key] = saved.get('last_run')
+            if key not in self.groups and not first_load:
+                logging.info(f"➕ Новая группа {group_label(key)}")
+        self.groups = grouped_configs
+        if not first_load:
+            logging.info("🔄 config.json изменился и перечитан")
+        return True
+
+    async def run_group(self, key) -> None:
+        """Обрабатывает группу на теплом множестве товаров и очищает только ее файлы."""
+        configs = self.groups[key]
+        site_name, group_name = key
+        category_path = configs[0]['category_path']
+        if key not in self.known_products:
+            self.known_products[key] = await load_known_products(configs)
+
+        # Каждый прогон группы — отдельный запуск в журнале дельт
+        deltas.start_run(run_id=f"{deltas.timestamp_run_id()}_{site_name}_{group_name}")
+        try:
+            await process_config_group(key, configs, self.known_products[key])
+        finally:
+            deltas.finish_run()
+
+        output_path = await create_category_folders(category_path)
+        files = glob.glob(os.path.join(output_path, f"{site_name}_{group_name}_*.txt"))
+        await asyncio.to_thread(clean_output_files, files)
+
+    def due_groups(self, now: float) -> list:
+        return sorted((key for key, when in self.next_run.items() if when <= now), key=lambda k: self.next_run[k])
+
+    async def run(self) -> None:
+        """Основной цикл: запускает группы по расписанию, пока не получен сигнал остановки."""
+        self.reload_config_if_changed()
+        logging.info(f"🟢 Демон запущен. Групп: {len(self.groups)}")
+        try:
+            while not self.stop_event.is_set():
+                self.reload_config_if_changed()
+                for key in self.due_groups(time.time()):
+                    if self.stop_event.is_set():
+                        break
+                    await self.run_scheduled(key)
+
+                if self.stop_event.is_set():
+                    break
+                next_due = min(self.next_run.values(), default=time.time() + CONFIG_POLL_SECONDS)
+                timeout = min(CONFIG_POLL_SECONDS, max(0.0, next_due - time.time()))
+                try:
+                    await asyncio.wait_for(self.stop_event.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self.shutdown()
+
+    async def run_scheduled(self, key) -> None:
+        """Запуск одной группы; ошибка группы не останавливает демон."""
+        start = time.perf_counter()
+        self.current_task = asyncio.ensure_future(self.run_group(key))
+        try:
+            await self.current_task
+            self.last_run[key] = datetime.now().isoformat(timespec='seconds')
+            logging.info(f"⏱️ Группа {group_label(key)} обработана за {time.perf_counter() - start:.1f} сек")
+        except asyncio.CancelledError:
+            logging.warning(f"⛔ Обработка группы {group_label(key)} прервана")
+            if not self.stop_event.is_set():
+                raise
+            return
+        except Exception as e:
+            logging.error(f"❌ Ошибка при обработке группы {group_label(key)}: {e}", exc_info=True)
+        finally:
+            self.current_task = None
+        # Следующий запуск считается от завершения, чтобы медленная группа не запускалась подряд
+        if key in self.groups:
+            self.next_run[key] = time.time() + group_interval_seconds(self.groups[key])
+            self.save_state()
+
+    def request_stop(self) -> None:
+        """Первый сигнал — мягкая остановка после текущей группы, второй — немедленная."""
+        if self.stop_event.is_set():
+            if self.current_task and not self.current_task.done():
+                logging.warning("⛔ Повторный сигнал: прерываю текущую группу")
+                self.current_task.cancel()
+            return
+        logging.info("🛑 Получен сигнал остановки: завершаю после текущей группы...")
+        self.stop_event.set()
+
+    async def shutdown(self) -> None:
+        """Сохраняет расписание и освобождает ресурсы."""
+        self.save_state()
+        await close_browser_pool()
+        logging.info(f"💤 Демон остановлен. Расписание сохранено в {os.path.basename(self.state_path)}")
+        flush_logging()
+
+
+async def run_daemon(args) -> None:
+    daemon = ScraperDaemon(args.site, args.state, args.run_now)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, daemon.request_stop)
+        except NotImplementedError:  # Windows: только Ctrl+C через KeyboardInterrupt
+            pass
+    await daemon.run()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="FinPi Scraper в режиме демона")
+    parser.add_argument("site", nargs="?", help="site_name из config.json (по умолчанию все включенные сайты)")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="Файл с расписанием демона")
+    parser.add_argument("--run-now", action="store_true", help="Запустить все группы сразу, игнорируя расписание")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging(SCRIPT_DIR)
+    asyncio.run(run_daemon(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
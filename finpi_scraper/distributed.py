@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Распределенный режим парсинга: координатор, воркеры и слияние результатов.
+
+Координатор (plan) разбивает включенные конфигурации из config.json на единицы
+работы — диапазоны страниц — и кладет их в общую очередь SQLite (utils/work_queue.py).
+Воркеры (worker) на одной или нескольких машинах с доступом к файлу очереди забирают
+единицы, скачивают и парсят страницы и возвращают новые товары. Если последняя
+страница единицы не пустая и цель по товарам не достигнута, воркер сам добавляет
+следующий диапазон. Упавшие единицы возвращаются в очередь.
+Слияние (merge) дедуплицирует результаты с уже сохраненными товарами и раскладывает
+их по подкатегориям так же, как обычный запуск main.py.
+
+Примеры (из finpi_scraper/):
+    python distributed.py run --workers 4            # всё локально: план, 4 воркера, слияние
+    python distributed.py plan rost --pages-per-unit 2
+    python distributed.py worker --queue /mnt/shared/crawl_queue.db
+    python distributed.py status
+    python distributed.py merge
+"""
+import argparse
+import asyncio
+import logging
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from fetchers import close_browser_pool, get_fetcher
+from main import (
+    BATCH_SIZE, MAX_PAGES, clean_output_files, create_category_folders, load_external_keywords,
+    load_grouped_configs, load_known_products, load_product_sources, save_products_by_subcategory, setup_logging,
+)
+from scrapers import get_scraper
+from utils import deltas
+from utils.clean_products import normalize_product_key
+from utils.hashset import ProductHashSet, seen_path
+from utils.work_queue import WorkQueue, config_key
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_QUEUE_PATH = os.path.join(SCRIPT_DIR, 'crawl_queue.db')
+DEFAULT_PAGES_PER_UNIT = 2  # Страниц в одной единице работы
+DEFAULT_PAGE_SIZE = 24  # Оценка товаров на странице, если в конфиге нет page_size
+IDLE_POLL_SECONDS = 5  # Пауза воркера, когда свободных единиц нет, но другие еще работают
+
+
+class UnitFetchError(Exception):
+    """Не удалось загрузить одну или несколько страниц единицы работы."""
+
+
+def planned_pages(config: dict) -> int:
+    """Сколько страниц нужно для target_count при оценке page_size товаров на странице."""
+    page_size = config.get('page_size', DEFAULT_PAGE_SIZE)
+    return max(1, min(MAX_PAGES, math.ceil(config['target_count'] / page_size)))
+
+
+async def plan(queue: WorkQueue, target_site_name=None, pages_per_unit=DEFAULT_PAGES_PER_UNIT) -> int:
+    """
+    Координатор: кладет в очередь единицы работы для всех включенных конфигураций.
+
+    Returns:
+        int: Количество добавленных единиц.
+    """
+    grouped_configs = load_grouped_configs(target_site_name)
+    if not grouped_configs:
+        return 0
+
+    added = 0
+    for (site_name, group_name), configs in grouped_configs.items():
+        known = await load_known_products(configs)
+        if isinstance(known, ProductHashSet):
+            # compact_dedup: передаем хеши из .seen, не читая текстовые файлы группы
+            queue.seed_known_hashes(site_name, group_name, known.iter_hashes())
+            known.close()
+        else:
+            queue.seed_known_products(site_name, group_name, known)
+
+        for config in configs:
+            pages = planned_pages(config)
+            for page_start in range(1, pages + 1, pages_per_unit):
+                page_end = min(page_start + pages_per_unit - 1, pages)
+                added += queue.enqueue(config, page_start, page_end)
+            logging.info(f"🗂️ [{site_name} - {config['category_name']}] запланировано страниц: {pages}")
+
+    logging.info(f"🗂️ В очереди новых единиц работы: {added}")
+    return added
+
+
+async def fetch_unit_pages(unit: dict) -> list[tuple[int, str]]:
+    """Скачивает все страницы единицы, не более BATCH_SIZE одновременно."""
+    config = unit['config']
+    scraper = get_scraper(config)
+    semaphore = asyncio.Semaphore(BATCH_SIZE)
+
+    async with get_fetcher(config) as fetcher:
+        async def fetch_one(page_num):
+            async with semaphore:
+                return page_num, await fetcher.fetch(scraper.get_source_url(page_num), page_num)
+
+        pages = range(unit['page_start'], unit['page_end'] + 1)
+        results = await asyncio.gather(*(fetch_one(p) for p in pages))
+
+    failed = [page_num for page_num, html in results if html is None]
+    if failed:
+        raise UnitFetchError(f"не загружены страницы {failed}")
+    return results
+
+
+async def process_unit(queue: WorkQueue, unit: dict) -> int:
+    """
+    Выполняет одну единицу работы и при необходимости планирует следующий диапазон.
+
+    Returns:
+        int: Количество новых товаров в единице.
+    """
+    config = unit['config']
+    site_name, group_name = config['site_name'], unit['group_name']
+    scraper = get_scraper(config)
+
+    pages = await fetch_unit_pages(unit)
+    seen, found, last_page_count = set(), [], 0
+    for page_num, html in pages:
+        page_products = scraper.parse(html)
+        if page_num == unit['page_end']:
+            last_page_count = len(page_products)
+        for product in page_products:
+            if product not in seen:
+                seen.add(product)
+                found.append((product, page_num))
+
+    new_names = set(queue.filter_new(site_name, group_name, [name for name, _ in found]))
+    new_products = [(name, page) for name, page in found if name in new_names]
+    queue.complete(unit['id'], new_products)
+
+    # Листинг продолжается, новые товары еще находятся, а цель не достигнута — планируем дальше
+    key = config_key(config)
+    if new_products and last_page_count and unit['page_end'] < MAX_PAGES \
+            and queue.count_results(key) < config['target_count']:
+        size = unit['page_end'] - unit['page_start'] + 1
+        page_start = unit['page_end'] + 1
+        if queue.enqueue(config, page_start, min(page_start + size - 1, MAX_PAGES)):
+            logging.info(f"➕ [{key}] добавлены страницы {page_start}-{min(page_start + size - 1, MAX_PAGES)}")
+    return len(new_products)
+
+
+async def run_worker(queue: WorkQueue, worker_id: str) -> int:
+    """
+    Цикл воркера: забирает единицы, пока очередь не опустеет.
+
+    Returns:
+        int: Количество выполненных единиц.
+    """
+    done = 0
+    try:
+        while True:
+            unit = queue.claim(worker_id)
+            if unit is None:
+                if queue.is_drained():
+                    break
+                await asyncio.sleep(IDLE_POLL_SECONDS)
+                continue
+
+            label = f"{config_key(unit['config'])} стр. {unit['page_start']}-{unit['page_end']}"
+            try:
+                new_count = await process_unit(queue, unit)
+                done += 1
+                logging.info(f"✅ [{worker_id}] {label}: новых товаров {new_count}")
+            except Exception as e:
+                status = queue.fail(unit['id'], str(e))
+                logging.warning(f"⚠️ [{worker_id}] {label}: ошибка '{e}' (попытка {unit['attempts']}), статус → {status}")
+    finally:
+        await close_browser_pool()
+
+    logging.info(f"🏁 [{worker_id}] Очередь пуста. Выполнено единиц: {done}")
+    return done
+
+
+async def merge(queue: WorkQueue) -> dict:
+    """
+    Слияние: объединяет результаты воркеров с сохраненными товарами группы,
+    дедуплицирует и сохраняет по подкатегориям. Для групп с compact_dedup
+    (как в process_config_group) в файлы дописываются только новые товары,
+    а множество известных товаров сохраняется в файл .seen.
+
+    Returns:
+        dict: {"site_group": количество новых товаров}.
+    """
+    summary = {}
+    deltas.start_run()
+    try:
+        for site_name, group_name in queue.iter_groups():
+            configs = queue.group_configs(site_name, group_name)
+            base_config = configs[0]
+            category_path = base_config['category_path']
+
+            known_products = await load_known_products(configs)
+            compact = isinstance(known_products, ProductHashSet)
+            new_products = set()
+            for product in queue.iter_results(site_name, group_name):
+                if product not in known_products:
+                    known_products.add(product)
+                    new_products.add(product)
+            added = len(new_products)
+            summary[f"{site_name}_{group_name}"] = added
+
+            if added:
+                subcategory_keywords = await load_external_keywords(base_config.get('external_keywords_file', ''))
+                lang = base_config.get("language", "en")
+                final_product_list = list(new_products) if compact else list(known_products)
+                # Товары с листингов конфигураций с sub_category — как в process_config_group
+                source_keys = {}
+                for config in configs:
+                    if config.get('sub_category'):
+                        for product in queue.iter_config_results(config_key(config)):
+                            source_keys.setdefault(normalize_product_key(product), config)
+                sources = await load_product_sources(final_product_list, configs, source_keys, compact)
+                await save_products_by_subcategory(final_product_list, site_name, group_name, category_path,
+                                                   subcategory_keywords, lang, new_products, append=compact,
+                                                   sources=sources)
+                if compact:
+                    output_path = await create_category_folders(category_path)
+                    await asyncio.to_thread(known_products.save, seen_path(output_path, site_name, group_name))
+            logging.info(f"🔀 [{site_name} - {group_name}] Слияние: всего {len(known_products)}, новых {added}")
+    finally:
+        deltas.finish_run()
+    return summary
+
+
+def log_status(queue: WorkQueue):
+    stats = queue.stats()
+    logging.info(
+        f"📋 Очередь: ожидают {stats['pending']}, в работе {stats['running']}, "
+        f"готово {stats['done']}, ошибки {stats['failed']}"
+    )
+    return stats
+
+
+def run_local(args) -> int:
+    """План, N локальных процессов-воркеров, ожидание и слияние."""
+    with WorkQueue(args.queue) as queue:
+        queue.reset()
+        asyncio.run(plan(queue, args.site, args.pages_per_unit))
+
+    start = time.perf_counter()
+    workers = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), 'worker',
+                          '--queue', args.queue, '--worker-id', f"{socket.gethostname()}-{i}"])
+        for i in range(args.workers)
+    ]
+    exit_codes = [w.wait() for w in workers]
+    logging.info(f"⏱️ Воркеров: {args.workers}, время парсинга: {time.perf_counter() - start:.1f} сек")
+
+    with WorkQueue(args.queue) as queue:
+        stats = log_status(queue)
+        asyncio.run(merge(queue))
+    clean_output_files()
+    return 1 if stats['failed'] or any(exit_codes) else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Распределенный парсинг FinPi Scraper")
+    parser.add_argument("command", choices=["plan", "worker", "merge", "status", "run"])
+    parser.add_argument("site", nargs="?", help="site_name из config.json (для plan/run)")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help="Путь к файлу очереди SQLite")
+    parser.add_argument("--pages-per-unit", type=int, default=DEFAULT_PAGES_PER_UNIT)
+    parser.add_argument("--reset", action="store_true", help="Очистить очередь перед планированием (для plan)")
+    parser.add_argument("--workers", type=int, default=2, help="Количество локальных воркеров (для run)")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging(SCRIPT_DIR)
+
+    if args.command == "run":
+        return run_local(args)
+
+    with WorkQueue(args.queue) as queue:
+        if args.command == "plan":
+            if args.reset:
+                queue.reset()
+            asyncio.run(plan(queue, args.site, args.pages_per_unit))
+        elif args.command == "worker":
+            asyncio.run(run_worker(queue, args.worker_id))
+        elif args.command == "merge":
+            asyncio.run(merge(queue))
+            clean_output_files()
+        log_status(queue)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+# finpi_scraper/fetchers/__init__.py
+
+from .scraperapi_fetcher import ScraperAPIFetcher
+from .playwright_fetcher import PlaywrightFetcher, close_browser_pool
+
+# Словарь-фабрика бэкендов загрузки (ключ fetch_backend в config.json)
+FETCHER_CLASSES = {
+    'scraperapi': ScraperAPIFetcher,
+    'playwright': PlaywrightFetcher,
+}
+
+DEFAULT_FETCH_BACKEND = 'scraperapi'
+
+def get_fetcher(config):
+    """
+    Фабричная функция для получения бэкенда загрузки страниц сайта.
+    """
+    backend = config.get('fetch_backend', DEFAULT_FETCH_BACKEND)
+    fetcher_class = FETCHER_CLASSES.get(backend)
+
+    if fetcher_class:
+        return fetcher_class(config)
+    else:
+        raise ValueError(f"Неизвестный fetch_backend '{backend}' для сайта: {config.get('site_name')}")
@@ -0,0 +1,45 @@
+# finpi_scraper/fetchers/base_fetcher.py
+from abc import ABC, abstractmethod
+
+# --- Константы ---
+REQUEST_TIMEOUT = 120  # Таймаут для каждого запроса в секундах
+MAX_RETRIES = 3  # Максимальное количество повторных попыток
+RETRY_DELAY = 5  # Задержка между повторными попытками в секундах
+
+
+class BaseFetcher(ABC):
+    """
+    Абстрактный базовый класс для бэкендов загрузки страниц.
+    Используется как асинхронный контекстный менеджер: ресурсы (сессия, браузер)
+    открываются в __aenter__ и освобождаются в __aexit__.
+    """
+    def __init__(self, config):
+        self.config = config
+        self.site_name = config['site_name']
+
+    async def open(self):
+        """Открывает ресурсы бэкенда."""
+
+    async def close(self):
+        """Освобождает ресурсы бэкенда."""
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @abstractmethod
+    async def fetch(self, page_url: str, page_num: int):
+        """
+        Загружает страницу листинга.
+
+        Args:
+            page_url (str): URL страницы на сайте.
+            page_num (int): Номер страницы (для логов).
+
+        Returns:
+            str | None: HTML страницы или None, если загрузить не удалось.
+        """
+        pass
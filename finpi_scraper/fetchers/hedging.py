@@ -0,0 +1,131 @@
+# finpi_scraper/fetchers/hedging.py
+"""
+Хеджирование запросов: если страница не ответила за типичное для сайта время
+(перцентиль недавних задержек, по умолчанию p90), отправляется дубликат запроса;
+берется ответ, пришедший первым, а второй запрос отменяется.
+Количество дубликатов ограничено бюджетом — долей от основных запросов.
+
+Настройки в config.json:
+    "hedge_requests": true     — включить хеджирование для сайта
+    "hedge_percentile": 90     — перцентиль задержки, после которого отправляется дубликат
+    "hedge_budget": 0.1        — не больше 10% дополнительных запросов
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+
+DEFAULT_HEDGE_PERCENTILE = 90
+DEFAULT_HEDGE_BUDGET = 0.1  # Доля дополнительных запросов от основных
+LATENCY_WINDOW = 200  # Сколько последних задержек учитывается
+MIN_SAMPLES = 10  # До стольких замеров хеджирование не включается
+MIN_HEDGE_DELAY = 0.5  # Не хеджируем раньше, чем через полсекунды
+
+
+class LatencyTracker:
+    """Скользящее окно задержек успешных запросов сайта."""
+    def __init__(self, window: int = LATENCY_WINDOW, min_samples: int = MIN_SAMPLES):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float):
+        """Перцентиль q (0-100) или None, пока замеров меньше min_samples."""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+
+class HedgePolicy:
+    """
+    Политика хеджирования одного сайта: трекер задержек, перцентиль и бюджет.
+
+    Args:
+        percentile (float): Перцентиль задержки для отправки дубликата.
+        budget (float): Максимальная доля дополнительных запросов.
+    """
+    def __init__(self, percentile: float = DEFAULT_HEDGE_PERCENTILE, budget: float = DEFAULT_HEDGE_BUDGET):
+        self.percentile = percentile
+        self.budget = budget
+        self.tracker = LatencyTracker()
+        self.stats = {"primary": 0, "hedged": 0, "hedge_wins": 0}
+
+    def hedge_delay(self):
+        """Через сколько секунд отправлять дубликат (None — хеджирование пока невозможно)."""
+        value = self.tracker.percentile(self.percentile)
+        return None if value is None else max(value, MIN_HEDGE_DELAY)
+
+    def try_spend(self) -> bool:
+        """Резервирует дополнительный запрос, если бюджет позволяет."""
+        if self.stats["hedged"] + 1 > self.budget * self.stats["primary"]:
+            return False
+        self.stats["hedged"] += 1
+        return True
+
+    async def run(self, make_request):
+        """
+        Выполняет запрос с хеджированием.
+
+        Args:
+            make_request (Callable[[], Awaitable]): Создает новую попытку запроса.
+
+        Returns:
+            Результат первой успешно завершившейся попытки. Если обе попытки
+            завершились ошибкой, пробрасывается ошибка основной.
+        """
+        self.stats["primary"] += 1
+        delay = self.hedge_delay()
+        primary = asyncio.ensure_future(self._timed(make_request))
+        tasks = [primary]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self.try_spend():
+                    tasks.append(asyncio.ensure_future(self._timed(make_request)))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+            return primary.result()  # обе попытки упали — ошибка основной
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _timed(self, make_request):
+        start = time.perf_counter()
+        result = await make_request()
+        self.tracker.record(time.perf_counter() - start)
+        return result
+
+
+# Политики общие для всех загрузок сайта в процессе: задержки накапливаются между категориями
+_policies = {}
+
+
+def get_hedge_policy(config):
+    """Политика хеджирования сайта или None, если hedge_requests не включен."""
+    if not config.get('hedge_requests', False):
+        return None
+    site_name = config['site_name']
+    if site_name not in _policies:
+        _policies[site_name] = HedgePolicy(config.get('hedge_percentile', DEFAULT_HEDGE_PERCENTILE),
+                                           config.get('hedge_budget', DEFAULT_HEDGE_BUDGET))
+    return _policies[site_name]
+
+
+def log_hedge_stats(site_name: str, policy: HedgePolicy) -> None:
+    stats = policy.stats
+    if stats["hedged"]:
+        logging.info(f"🪁 [{site_name}] Хеджирование: основных запросов {stats['primary']}, "
+                     f"дубликатов {stats['hedged']}, дубликат ответил первым {stats['hedge_wins']}")
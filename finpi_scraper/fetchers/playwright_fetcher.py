@@ -0,0 +1,218 @@
+# finpi_scraper/fetchers/playwright_fetcher.py
+"""
+Локальный рендеринг страниц в headless Chromium (Playwright) вместо ScraperAPI render=true.
+
+Браузер запускается один раз на процесс; страницы открываются в пуле
+переиспользуемых контекстов (BrowserPool). Картинки, шрифты, медиа и стили
+не загружаются. Вместо фиксированного render_wait страница ждет появления
+селектора товаров, а при needs_scrolling прокручивается, пока подгружаются
+новые карточки.
+
+Настройки в config.json:
+    "fetch_backend": "playwright"
+    "render_timeout_ms": 15000      — сколько ждать появления товаров
+    "max_scrolls": 20               — лимит прокруток при needs_scrolling
+    "scroll_wait_ms": 1500          — сколько ждать новых карточек после прокрутки
+    "block_resources": [...]        — типы ресурсов, которые не загружаются
+
+Playwright — необязательная зависимость:
+    pip install playwright && python -m playwright install chromium
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from .base_fetcher import BaseFetcher, MAX_RETRIES, REQUEST_TIMEOUT, RETRY_DELAY
+
+try:
+    from playwright.async_api import Error as PlaywrightError
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+    from playwright.async_api import async_playwright
+except ImportError:  # playwright — необязательная зависимость
+    async_playwright = None
+    PlaywrightError = PlaywrightTimeoutError = Exception
+
+BROWSER_POOL_SIZE = 2  # Количество переиспользуемых контекстов (как BATCH_SIZE)
+DEFAULT_RENDER_TIMEOUT_MS = 15000
+DEFAULT_MAX_SCROLLS = 20
+DEFAULT_SCROLL_WAIT_MS = 1500
+DEFAULT_BLOCK_RESOURCES = ["image", "media", "font", "stylesheet"]
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RetryableStatus(Exception):
+    """Сайт ответил статусом, при котором имеет смысл повторить запрос."""
+
+
+class BrowserPool:
+    """
+    Один процесс Chromium и пул из size контекстов.
+    Страница берет свободный контекст и возвращает его после закрытия,
+    поэтому одновременно открыто не больше size страниц.
+    """
+    def __init__(self, size: int = BROWSER_POOL_SIZE, headless: bool = True):
+        self.size = size
+        self.headless = headless
+        self._playwright = None
+        self._browser = None
+        self._contexts = None
+
+    async def start(self):
+        if async_playwright is None:
+            raise ImportError("Для fetch_backend 'playwright' установите playwright: "
+                              "pip install playwright && python -m playwright install chromium")
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        self._contexts = asyncio.Queue()
+        for _ in range(self.size):
+            context = await self._browser.new_context(user_agent=USER_AGENT, viewport={"width": 1366, "height": 900})
+            self._contexts.put_nowait(context)
+        logging.info(f"🌐 Запущен Chromium, контекстов в пуле: {self.size}")
+
+    @asynccontextmanager
+    async def page(self):
+        """Открывает страницу в свободном контексте пула."""
+        context = await self._contexts.get()
+        page = await context.new_page()
+        try:
+            yield page
+        finally:
+            try:
+                await page.close()
+            finally:
+                self._contexts.put_nowait(context)
+
+    async def close(self):
+        if self._browser:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+_shared_pool = None
+_pool_lock = None
+_pool_lock_loop = None
+
+
+def _get_pool_lock() -> asyncio.Lock:
+    """
+    Блокировка запуска пула для текущего цикла событий. Создается внутри работающего
+    цикла: блокировка, созданная при импорте, привязалась бы к первому циклу,
+    и следующий asyncio.run (тесты, повторные запуски) падал бы на ней.
+    """
+    global _pool_lock, _pool_lock_loop
+    loop = asyncio.get_running_loop()
+    if _pool_lock is None or _pool_lock_loop is not loop:
+        _pool_lock, _pool_lock_loop = asyncio.Lock(), loop
+    return _pool_lock
+
+
+async def get_browser_pool() -> BrowserPool:
+    """Общий пул процесса; запускается при первом обращении."""
+    global _shared_pool
+    async with _get_pool_lock():
+        if _shared_pool is None:
+            pool = BrowserPool()
+            await pool.start()
+            _shared_pool = pool
+    return _shared_pool
+
+
+async def close_browser_pool():
+    """Закрывает общий пул (если он запускался)."""
+    global _shared_pool
+    if _shared_pool is not None:
+        await _shared_pool.close()
+        _shared_pool = None
+
+
+class PlaywrightFetcher(BaseFetcher):
+    """
+    Загрузка через локальный headless Chromium из общего пула.
+    """
+    def __init__(self, config):
+        super().__init__(config)
+        selectors = config['product_name_selector']
+        self.selector = ", ".join(selectors) if isinstance(selectors, list) else selectors
+        self.render_timeout_ms = config.get('render_timeout_ms', DEFAULT_RENDER_TIMEOUT_MS)
+        self.needs_scrolling = config.get('needs_scrolling', False)
+        self.max_scrolls = config.get('max_scrolls', DEFAULT_MAX_SCROLLS)
+        self.scroll_wait_ms = config.get('scroll_wait_ms', DEFAULT_SCROLL_WAIT_MS)
+        self.block_resources = set(config.get('block_resources', DEFAULT_BLOCK_RESOURCES))
+        self.pool = None
+
+    async def open(self):
+        self.pool = await get_browser_pool()
+
+    async def _route(self, route):
+        if route.request.resource_type in self.block_resources:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _wait_for_products(self, page, page_num) -> bool:
+        """Ждет появления карточек товаров. False — карточки так и не появились."""
+        try:
+            await page.wait_for_selector(self.selector, state="attached", timeout=self.render_timeout_ms)
+            return True
+        except PlaywrightTimeoutError:
+            logging.warning(f"[{self.site_name}] Стр. {page_num}: товары не появились за {self.render_timeout_ms} мс")
+            return False
+
+    async def _scroll_to_end(self, page) -> int:
+        """
+        Прокручивает страницу вниз, пока после прокрутки появляются новые карточки.
+
+        Returns:
+            int: Количество карточек после прокрутки.
+        """
+        count = await page.locator(self.selector).count()
+        for _ in range(self.max_scrolls):
+            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+            try:
+                await page.wait_for_function(
+                    "([selector, count]) => document.querySelectorAll(selector).length > count",
+                    arg=[self.selector, count], timeout=self.scroll_wait_ms,
+                )
+            except PlaywrightTimeoutError:
+                break
+            count = await page.locator(self.selector).count()
+        return count
+
+    async def _render(self, page_url: str, page_num: int) -> str:
+        async with self.pool.page() as page:
+            await page.route("**/*", self._route)
+            start = time.perf_counter()
+            response = await page.goto(page_url, wait_until="domcontentloaded", timeout=REQUEST_TIMEOUT * 1000)
+            if response is not None and response.status in RETRY_STATUSES:
+                raise RetryableStatus(f"статус {response.status}")
+            if self.config.get('data_source', 'html') == 'api':
+                # JSON-эндпоинт: тело ответа как есть, без ожидания селектора
+                return await response.text() if response is not None else None
+            if await self._wait_for_products(page, page_num) and self.needs_scrolling:
+                await self._scroll_to_end(page)
+            html = await page.content()
+            status = response.status if response is not None else '-'
+            elapsed = time.perf_counter() - start
+            logging.info(f"[{self.site_name}] Стр. {page_num}: отрисована локально (статус {status}, {elapsed:.1f} сек)",
+                         extra={"event": "page_fetched", "site": self.site_name, "page": page_num, "status": status,
+                                "latency_ms": round(elapsed * 1000)})
+            return html
+
+    async def fetch(self, page_url: str, page_num: int):
+        for attempt in range(MAX_RETRIES):
+            try:
+                return await self._render(page_url, page_num)
+            except (PlaywrightError, RetryableStatus) as e:
+                if attempt < MAX_RETRIES - 1:
+                    logging.warning(f"[{self.site_name}] Стр. {page_num}: ошибка '{e}', попытка {attempt + 1} из {MAX_RETRIES}. Повтор через {RETRY_DELAY} сек...",
+                                    extra={"event": "page_retry", "site": self.site_name, "page": page_num, "attempt": attempt + 1})
+                    await asyncio.sleep(RETRY_DELAY)
+                else:
+                    logging.error(f"[{self.site_name}] Стр. {page_num}: не удалось загрузить после {MAX_RETRIES} попыток. Ошибка: {e}",
+                                  extra={"site": self.site_name, "page": page_num, "attempt": attempt + 1})
+        return None
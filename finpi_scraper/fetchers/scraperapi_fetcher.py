@@ -0,0 +1,112 @@
+# finpi_scraper/fetchers/scraperapi_fetcher.py
+import asyncio
+import logging
+import os
+import time
+from urllib.parse import quote
+
+import aiohttp
+from dotenv import load_dotenv
+
+from .base_fetcher import BaseFetcher, MAX_RETRIES, REQUEST_TIMEOUT, RETRY_DELAY
+from .hedging import get_hedge_policy, log_hedge_stats
+
+SCRAPERAPI_ENDPOINT = "http://api.scraperapi.com"  # Переопределяется переменной окружения SCRAPERAPI_ENDPOINT
+
+
+def get_scraperapi_url(site_config, page_url=None):
+    """
+    Преобразует целевой URL в URL для запроса к ScraperAPI.
+    """
+    load_dotenv()
+    api_key = os.getenv("SCRAPERAPI_KEY")
+    if not api_key or "ВАШ_API_КЛЮЧ" in api_key:
+        logging.error("API-ключ ScraperAPI не найден или не изменен в .env файле.")
+        return None
+    
+    target_url = page_url if page_url else site_config['url']
+    country = site_config.get('country_code', 'ua')
+    endpoint = os.getenv("SCRAPERAPI_ENDPOINT", SCRAPERAPI_ENDPOINT)
+    # URL кодируется целиком: параметры JSON-эндпоинтов (&...) не должны смешиваться с параметрами ScraperAPI
+    base_url = f'{endpoint}?api_key={api_key}&url={quote(target_url, safe="")}&country_code={country}'
+
+    # JSON-эндпоинтам (data_source "api") рендеринг не нужен
+    if site_config.get('data_source', 'html') == 'api':
+        return base_url
+    
+    if site_config.get('js_rendering', False):
+        base_url += '&render=true'
+
+    if site_config['site_name'] in ['tesco', 'winestyle', 'rozetka']:
+        base_url += '&premium=true&render_wait=5000'
+    
+    return base_url
+
+
+async def _request_page(session, url, headers):
+    """Одна попытка запроса. Returns: (статус, текст ответа)."""
+    async with session.get(url, headers=headers, timeout=REQUEST_TIMEOUT) as response:
+        response.raise_for_status()
+        return response.status, await response.text()
+
+
+async def fetch_page(session, url, site_name, page_num, hedge=None):
+    """
+    Асинхронно запрашивает одну страницу с логикой повторных попыток.
+
+    Args:
+        hedge (HedgePolicy): Если задана, медленная попытка дублируется
+            (см. fetchers/hedging.py).
+    """
+    if not url:
+        return None
+    
+    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+    
+    for attempt in range(MAX_RETRIES):
+        start = time.perf_counter()
+        try:
+            if hedge is not None:
+                status, text = await hedge.run(lambda: _request_page(session, url, headers))
+            else:
+                status, text = await _request_page(session, url, headers)
+            logging.info(f"[{site_name}] Стр. {page_num}: успешно загружена (статус {status})",
+                         extra={"event": "page_fetched", "site": site_name, "page": page_num, "status": status,
+                                "latency_ms": round((time.perf_counter() - start) * 1000)})
+            return text
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt < MAX_RETRIES - 1:
+                logging.warning(f"[{site_name}] Стр. {page_num}: ошибка '{e}', попытка {attempt + 1} из {MAX_RETRIES}. Повтор через {RETRY_DELAY} сек...",
+                                extra={"event": "page_retry", "site": site_name, "page": page_num, "attempt": attempt + 1})
+                await asyncio.sleep(RETRY_DELAY)
+            else:
+                logging.error(f"[{site_name}] Стр. {page_num}: не удалось загрузить после {MAX_RETRIES} попыток. Ошибка: {e}",
+                              extra={"site": site_name, "page": page_num, "attempt": attempt + 1})
+                return None
+    return None
+
+
+class ScraperAPIFetcher(BaseFetcher):
+    """
+    Загрузка через ScraperAPI (бэкенд по умолчанию).
+    Рендеринг JS выполняется на стороне ScraperAPI (js_rendering → &render=true).
+    При hedge_requests медленные запросы дублируются (fetchers/hedging.py).
+    """
+    def __init__(self, config):
+        super().__init__(config)
+        self.session = None
+        self.hedge = get_hedge_policy(config)
+
+    async def open(self):
+        self.session = aiohttp.ClientSession()
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+        if self.hedge:
+            log_hedge_stats(self.site_name, self.hedge)
+
+    async def fetch(self, page_url: str, page_num: int):
+        api_url = get_scraperapi_url(self.config, page_url)
+        return await fetch_page(self.session, api_url, self.site_name, page_num, self.hedge)
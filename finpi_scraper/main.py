@@ -1,44 +1,29 @@
 import json
+import math
 import os
-from dotenv import load_dotenv
 import time
-import sys
 import logging
 import asyncio
-import aiohttp
 import aiofiles
 
-# Импортируем фабрику скрейперов
+# Импортируем фабрики скрейперов и бэкендов загрузки
 from scrapers import get_scraper
-from utils.categorization import categorize_product
+from fetchers import close_browser_pool, get_fetcher
+from utils.categorization import compile_keywords
+from utils.ngram_classifier import categorize_batch, get_classifier
+from utils.product_io import aiter_products, append_products, write_products_async
+from utils import deltas, product_store
+from utils.clean_products import clean_product_name, normalize_product_key
+from utils.crawl_history import CrawlHistory, plan_crawl
+from utils.hashset import ProductHashSet, seen_path
+from utils.log_pipeline import LOG_FORMAT, StructuredFormatter, start_logging
+from utils.work_queue import config_key
 
 # --- Константы ---
 BATCH_SIZE = 2  # Количество одновременных запросов
-REQUEST_TIMEOUT = 120  # Таймаут для каждого запроса в секундах
-MAX_RETRIES = 3  # Максимальное количество повторных попыток
-RETRY_DELAY = 5  # Задержка между повторными попытками в секундах
-
-def get_scraperapi_url(site_config, page_url=None):
-    """
-    Преобразует целевой URL в URL для запроса к ScraperAPI.
-    """
-    load_dotenv()
-    api_key = os.getenv("SCRAPERAPI_KEY")
-    if not api_key or "ВАШ_API_КЛЮЧ" in api_key:
-        logging.error("API-ключ ScraperAPI не найден или не изменен в .env файле.")
-        return None
-    
-    target_url = page_url if page_url else site_config['url']
-    country = site_config.get('country_code', 'ua')
-    base_url = f'http://api.scraperapi.com?api_key={api_key}&url={target_url}&country_code={country}'
-    
-    if site_config.get('js_rendering', False):
-        base_url += '&render=true'
-
-    if site_config['site_name'] in ['tesco', 'winestyle', 'rozetka']:
-        base_url += '&premium=true&render_wait=5000'
-    
-    return base_url
+BATCH_DELAY = 2  # Пауза между пакетами запросов в секундах
+MAX_PAGES = 100  # Максимальное количество страниц пагинации на одну категорию
+CRAWL_HISTORY_FILE = 'crawl_history.json'  # История обхода категорий (рядом со скриптом)
 
 async def create_category_folders(category_path):
     """
@@ -54,28 +39,43 @@ async def create_category_folders(category_path):
     
     return full_path
 
-async def load_existing_products(output_filename):
+async def load_existing_products(output_filename, products=None):
     """
-    Асинхронно загружает уже существующие товары из файла.
+    Асинхронно и построчно загружает уже существующие товары из файла.
+
+    Args:
+        output_filename (str): Путь к файлу товаров.
+        products (set): Если передан, товары добавляются прямо в него,
+            без промежуточного списка.
+
+    Returns:
+        list | set: Список товаров или переданный set.
     """
+    existing_products = products if products is not None else []
+    add = existing_products.add if products is not None else existing_products.append
+
     if not os.path.exists(output_filename):
         logging.info(f"Файл {os.path.basename(output_filename)} не существует. Начинаю с нуля.")
-        return []
+        return existing_products
     
+    count = 0
     try:
-        async with aiofiles.open(output_filename, 'r', encoding='utf-8') as f:
-            lines = await f.readlines()
-            existing_products = [line.strip() for line in lines if line.strip()]
+        async for product in aiter_products(output_filename):
+            add(product)
+            count += 1
         
-        logging.info(f"📁 Найдено {len(existing_products)} существующих товаров в файле {os.path.basename(output_filename)}")
-        return existing_products
+        logging.info(f"📁 Найдено {count} существующих товаров в файле {os.path.basename(output_filename)}")
     except Exception as e:
         logging.error(f"Ошибка чтения файла {os.path.basename(output_filename)}: {e}")
-        return []
+    return existing_products
+
+# Кэш файлов ключевых слов: путь → (mtime_ns, данные). Файл перечитывается, только если изменился
+_keywords_cache = {}
 
 async def load_external_keywords(keywords_file):
     """
     Асинхронно загружает весь файл ключевых слов как есть.
+    Разобранный файл кэшируется и перечитывается только после изменения на диске.
     """
     script_dir = os.path.dirname(os.path.abspath(__file__))
     full_keywords_path = os.path.join(script_dir, keywords_file)
@@ -85,32 +85,82 @@ async def load_external_keywords(keywords_file):
         return None
     
     try:
+        mtime = os.stat(full_keywords_path).st_mtime_ns
+        cached = _keywords_cache.get(full_keywords_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
         async with aiofiles.open(full_keywords_path, 'r', encoding='utf-8') as f:
             content = await f.read()
-            return json.loads(content)
+            keywords = json.loads(content)
+        if cached:
+            logging.info(f"🔄 Файл ключевых слов изменился и перечитан: {keywords_file}")
+        _keywords_cache[full_keywords_path] = (mtime, keywords)
+        return keywords
     except Exception as e:
         logging.error(f"Ошибка загрузки ключевых слов из {keywords_file}: {e}")
         return None
 
 
 
-async def save_products_by_subcategory(all_products, site_name, group_name, category_path, subcategory_keywords, lang):
+async def save_products_by_subcategory(all_products, site_name, group_name, category_path, subcategory_keywords, lang,
+                                       new_products=None, append=False, sources=None):
     """
-    Асинхронно сохраняет товары в отдельные файлы по подкатегориям.
+    Асинхронно сохраняет товары в отдельные файлы по подкатегориям
+    и дописывает записи о новых товарах и о товарах, сменивших подкатегорию или источник,
+    в компактное хранилище (utils/product_store.py).
+
+    Args:
+        new_products (set): Товары, найденные в этом запуске. Если None или хранилища
+            еще нет, в хранилище записываются все товары.
+        append (bool): all_products — только новые товары; они дописываются в файлы
+            подкатегорий, уже сохраненные товары не перекатегоризируются (compact_dedup).
+        sources (dict): Товар → конфигурация с sub_category, с листинга которой он собран.
+            Такие товары попадают в sub_category без лемматизации; с negative_keyword_veto
+            товар с негативным словом этой подкатегории категоризируется как обычно.
     """
     output_path = await create_category_folders(category_path)
+    keyword_index = compile_keywords(subcategory_keywords) if subcategory_keywords else None
     
     # Группировка товаров
     subcategory_products = {}
-    if subcategory_keywords:
+    product_subcategory = {}
+    product_lemmas = {}
+    to_categorize = all_products
+    if sources:
+        # Товары с листингов одной подкатегории (config sub_category) назначаются напрямую
+        to_categorize = []
         for product in all_products:
-            subcategory = categorize_product(product, subcategory_keywords, lang)
+            config = sources.get(product)
+            subcategory = config['sub_category'] if config else None
+            if subcategory is None or (keyword_index and config.get('negative_keyword_veto')
+                                       and keyword_index.vetoes(subcategory, product)):
+                to_categorize.append(product)
+                continue
+            product_subcategory[product] = subcategory
+            subcategory_products.setdefault(subcategory, []).append(product)
+        logging.info(f"🏷️ [{site_name} - {group_name}] Назначено по sub_category без категоризации: "
+                     f"{len(product_subcategory)}, категоризируется: {len(to_categorize)}")
+    if keyword_index:
+        # Лемматизируем один раз и пакетно: леммы нужны и для категории, и для хранилища.
+        # Уверенные ответы модели первого прохода (utils/ngram_classifier.py) не лемматизируются
+        subcategories, product_lemmas = categorize_batch(to_categorize, keyword_index, lang,
+                                                         get_classifier(subcategory_keywords))
+        for product, subcategory in zip(to_categorize, subcategories):
+            product_subcategory[product] = subcategory
             if subcategory not in subcategory_products:
                 subcategory_products[subcategory] = []
             subcategory_products[subcategory].append(product)
-    else:
+        if not append:
+            # Из подкатегории ушли все товары (перекатегоризация или track_removals) — файл очищается,
+            # иначе в нем останутся товары, уже записанные в другие подкатегории
+            declared = [config['sub_category'] for config in (sources or {}).values()]
+            for subcategory in [rule[0] for rule in keyword_index.rules] + ['other'] + declared:
+                stale_file = os.path.join(output_path, f"{site_name}_{group_name}_{subcategory}.txt")
+                if subcategory not in subcategory_products and os.path.exists(stale_file):
+                    subcategory_products[subcategory] = []
+    elif to_categorize:
         # Если нет ключевых слов, используем имя группы как одну категорию
-        subcategory_products[group_name] = all_products
+        subcategory_products.setdefault(group_name, []).extend(to_categorize)
 
     # Асинхронное сохранение файлов
     tasks = []
@@ -119,17 +169,59 @@ async def save_products_by_subcategory(all_products, site_name, group_name, cate
         filename = f"{site_name}_{group_name}_{subcategory}.txt"
         output_filename = os.path.join(output_path, filename)
         
-        async def write_file(fname, prods):
-            # Используем 'a' для дозаписи, если нужно объединять, но 'w' проще для перезаписи группы
-            async with aiofiles.open(fname, 'w', encoding='utf-8') as f:
-                await f.write('\n'.join(prods) + '\n')
-            logging.info(f"💾 {subcategory.upper()}: {len(prods)} товаров → {os.path.basename(fname)}")
+        async def write_file(fname, subcat, prods):
+            # Изменения файла — в журнал запуска (utils/deltas.py), пока на диске старая версия
+            await asyncio.to_thread(deltas.record_file_change, fname, prods, append)
+            # Перезапись группы через временный файл: после сбоя не останется наполовину записанного файла
+            fields = {"event": "file_saved", "site": site_name, "group": group_name, "count": len(prods)}
+            if append:
+                await asyncio.to_thread(append_products, fname, prods)
+                logging.info(f"💾 {subcat.upper()}: +{len(prods)} товаров → {os.path.basename(fname)}", extra=fields)
+                return
+            await write_products_async(fname, prods)
+            logging.info(f"💾 {subcat.upper()}: {len(prods)} товаров → {os.path.basename(fname)}", extra=fields)
         
-        tasks.append(write_file(output_filename, products))
+        tasks.append(write_file(output_filename, subcategory, products))
     
     await asyncio.gather(*tasks)
     logging.info(f"📊 Всего подкатегорий: {len(subcategory_products)}")
 
+    # Компактное хранилище: дописываем новые товары и товары, сменившие подкатегорию или источник
+    store_file = product_store.store_path(output_path, site_name, group_name)
+    first_seen = {}
+    if new_products is None or not os.path.exists(store_file):
+        to_store = all_products
+    elif append:
+        to_store = new_products
+    else:
+        # Уже сохраненные товары перекатегоризированы (например, ушли из 'other' после пополнения
+        # ключевых слов) — иначе последняя запись в хранилище осталась бы со старой подкатегорией
+        stored = await asyncio.to_thread(
+            lambda: {record["key"]: record for record in
+                     product_store.iter_latest(store_file, ("key", "subcategory", "first_seen"))})
+        # Источник записывается и для уже сохраненных товаров, увиденных на листинге с sub_category
+        stored_sources = await asyncio.to_thread(product_store.load_sources, store_file) if sources else {}
+        to_store = list(new_products)
+        for product in all_products:
+            key = normalize_product_key(product)
+            record = stored.get(key)
+            if product in new_products or record is None:
+                continue
+            source = sources.get(product) if sources else None
+            if (record["subcategory"] != product_subcategory.get(product, group_name)
+                    or (source and stored_sources.get(key) != source['category_name'])):
+                to_store.append(product)
+                first_seen[product] = record["first_seen"]
+    records = [
+        product_store.make_record(product, site_name, group_name, product_subcategory.get(product, group_name),
+                                  product_lemmas.get(product), first_seen.get(product),
+                                  source=sources[product]['category_name'] if sources and product in sources else None)
+        for product in to_store
+    ]
+    if records:
+        stored = await asyncio.to_thread(product_store.append_records, store_file, records)
+        logging.info(f"🗜️ В хранилище {os.path.basename(store_file)} добавлено записей: {stored}")
+
     # Анализ 'other' для пополнения базы знаний
     if subcategory_keywords and 'other' in subcategory_products and len(subcategory_products['other']) > 0:
         logging.info(f"🔍 Запускаю гибридный анализ для {len(subcategory_products['other'])} товаров из OTHER...")
@@ -155,32 +247,44 @@ async def save_products_by_subcategory(all_products, site_name, group_name, cate
         except Exception as e:
             logging.warning(f"Ошибка при анализе OTHER: {e}", exc_info=True)
 
-async def fetch_page(session, url, site_name, page_num):
-    """Асинхронно запрашивает одну страницу с логикой повторных попыток."""
-    if not url:
+def total_listing_pages(pagination_info, page_size):
+    """
+    Количество страниц листинга по данным extract_pagination_info.
+
+    Args:
+        pagination_info (dict | None): {"total_pages": N} и/или {"total_products": N}.
+        page_size (int): Товаров на первой странице.
+
+    Returns:
+        int | None: Количество страниц или None, если его не определить.
+    """
+    if not pagination_info:
         return None
-    
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-    
-    for attempt in range(MAX_RETRIES):
-        try:
-            async with session.get(url, headers=headers, timeout=REQUEST_TIMEOUT) as response:
-                response.raise_for_status()
-                logging.info(f"[{site_name}] Стр. {page_num}: успешно загружена (статус {response.status})")
-                return await response.text()
-        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            if attempt < MAX_RETRIES - 1:
-                logging.warning(f"[{site_name}] Стр. {page_num}: ошибка '{e}', попытка {attempt + 1} из {MAX_RETRIES}. Повтор через {RETRY_DELAY} сек...")
-                await asyncio.sleep(RETRY_DELAY)
-            else:
-                logging.error(f"[{site_name}] Стр. {page_num}: не удалось загрузить после {MAX_RETRIES} попыток. Ошибка: {e}")
-                return None
+    if pagination_info.get('total_pages'):
+        return pagination_info['total_pages']
+    if pagination_info.get('total_products') and page_size:
+        return math.ceil(pagination_info['total_products'] / page_size)
     return None
 
-async def parse_site_with_pagination(site_config, existing_products_set):
+async def parse_site_with_pagination(site_config, existing_products_set, page_limit=None, stats=None):
     """
-    Асинхронно парсит сайт с пагинацией, используя пакетные запросы.
+    Асинхронно парсит сайт с пагинацией.
+    Если по первой странице известен размер листинга (extract_pagination_info скрейпера),
+    сразу запрашиваются ровно те страницы, которых не хватает до target_count,
+    не более BATCH_SIZE одновременно. Иначе страницы перебираются пакетами,
+    пока в пакете находятся новые товары.
     Возвращает список новых найденных товаров.
+
+    С track_removals в конфигурации листинг известного размера обходится целиком
+    (без остановки по target_count), а в stats попадают все увиденные товары (seen)
+    и признак complete — все страницы листинга получены без ошибок. Для конфигураций
+    с sub_category увиденные товары (seen) тоже собираются, но обход не удлиняется.
+
+    Args:
+        page_limit (int): Предел страниц из плана обхода (utils/crawl_history.py), не больше MAX_PAGES.
+        stats (dict): Если передан, заполняется статистикой запуска для истории обхода:
+            new, pages_fetched, pages_failed, deepest_new_page, page_limit
+            (и seen для track_removals и sub_category, complete для track_removals).
     """
     site_name = site_config['site_name']
     category_name = site_config['category_name']
@@ -191,127 +295,326 @@ async def parse_site_with_pagination(site_config, existing_products_set):
 
     try:
         scraper = get_scraper(site_config)
+        fetcher = get_fetcher(site_config)
     except ValueError as e:
         logging.error(e)
         return []
 
-    page = 1
-    max_pages = 100
+    max_pages = min(page_limit, MAX_PAGES) if page_limit else MAX_PAGES
+    stats = stats if stats is not None else {}
+    stats.update(new=0, pages_fetched=0, pages_failed=0, deepest_new_page=0, page_limit=max_pages)
+    track_removals = site_config.get('track_removals', False)
+    # Увиденные товары нужны и листингам подкатегорий (sub_category): источник запоминается для всех
+    track_seen = track_removals or bool(site_config.get('sub_category'))
+    if track_seen:
+        stats['seen'] = set()
+    if track_removals:
+        stats['complete'] = False
     
     # Используем переданный set, чтобы не было дублей между категориями в одной группе
     local_product_names = set()
 
-    async with aiohttp.ClientSession() as session:
-        while len(local_product_names) < target_count and page <= max_pages:
-            
-            tasks = []
-            page_numbers = range(page, page + BATCH_SIZE)
-            logging.info(f"[{site_name} - {category_name}] Готовлю пакет запросов для страниц {page}-{page + BATCH_SIZE - 1}...")
-
-            for p_num in page_numbers:
-                page_url = scraper.get_page_url(p_num)
-                api_url = get_scraperapi_url(site_config, page_url)
-                tasks.append(fetch_page(session, api_url, site_name, p_num))
-
-            results = await asyncio.gather(*tasks)
-            
-            new_products_found_in_batch = False
-            for html_content in results:
-                if html_content:
-                    page_products = scraper.parse(html_content)
-                    newly_added = 0
-                    for product in page_products:
-                        # Проверяем и в глобальном, и в локальном set
-                        if product not in existing_products_set and product not in local_product_names:
-                            local_product_names.add(product)
-                            newly_added += 1
-                            new_products_found_in_batch = True
-                    
-                    if newly_added > 0:
-                        logging.info(f"[{site_name} - {category_name}] Найдено {len(page_products)} товаров, новых: {newly_added}")
+    def collect(html_content, page_num):
+        """Добавляет новые товары страницы. Возвращает (товаров на странице, новых)."""
+        if not html_content:
+            return 0, 0
+        page_products = scraper.parse(html_content)
+        if track_seen:
+            stats['seen'].update(page_products)
+        newly_added = 0
+        for product in page_products:
+            # Проверяем и в глобальном, и в локальном set
+            if product not in existing_products_set and product not in local_product_names:
+                local_product_names.add(product)
+                newly_added += 1
+        
+        if newly_added > 0:
+            stats['new'] += newly_added
+            stats['deepest_new_page'] = max(stats['deepest_new_page'], page_num)
+            logging.info(f"[{site_name} - {category_name}] Найдено {len(page_products)} товаров, новых: {newly_added}",
+                         extra={"event": "page_parsed", "site": site_name, "category": category_name,
+                                "page": page_num, "count": newly_added})
+        return len(page_products), newly_added
+
+    async def fetch_page(p_num):
+        html_content = await fetcher.fetch(scraper.get_source_url(p_num), p_num)
+        stats['pages_fetched'] += 1
+        if not html_content:
+            stats['pages_failed'] += 1
+        return html_content
+
+    async with fetcher:
+        # Первая страница: товары и, если сайт их сообщает, размеры листинга
+        first_page = await fetch_page(1)
+        page_size, _ = collect(first_page, 1)
+        total_pages = total_listing_pages(scraper.extract_pagination_info(first_page), page_size) if first_page else None
+        page = 2
+
+        # Пустая первая страница (пустая сетка, сменился селектор) — размер страницы неизвестен,
+        # планировать нечего: перебираем страницы как раньше
+        if total_pages and page_size:
+            max_pages = min(total_pages, max_pages)
+            logging.info(f"[{site_name} - {category_name}] В листинге страниц: {total_pages} (по {page_size} товаров)")
+            semaphore = asyncio.Semaphore(BATCH_SIZE)
+
+            async def fetch_limited(p_num):
+                async with semaphore:
+                    return await fetch_page(p_num)
+
+            if track_removals:
+                # Весь листинг: только полный обход подтверждает, что товара на сайте больше нет
+                logging.info(f"[{site_name} - {category_name}] Запрашиваю страницы {page}-{max_pages} целиком (track_removals)...")
+                page_numbers = range(page, max_pages + 1)
+                results = await asyncio.gather(*(fetch_limited(p_num) for p_num in page_numbers))
+                page_sizes = [collect(html_content, p_num)[0] for p_num, html_content in zip(page_numbers, results)]
+                # Пустая страница посреди листинга — скорее заглушка или блокировка, чем конец каталога
+                stats['complete'] = total_pages <= max_pages and not stats['pages_failed'] and all(page_sizes)
+                page = max_pages + 1
+
+            while len(local_product_names) < target_count and page <= max_pages:
+                # Ровно столько страниц, сколько нужно до цели, если все товары на них новые
+                missing = target_count - len(local_product_names)
+                last_page = min(max_pages, page + math.ceil(missing / page_size) - 1)
+                logging.info(f"[{site_name} - {category_name}] Запрашиваю страницы {page}-{last_page} (одновременно до {BATCH_SIZE})...")
+
+                page_numbers = range(page, last_page + 1)
+                results = await asyncio.gather(*(fetch_limited(p_num) for p_num in page_numbers))
+                new_in_round = sum(collect(html_content, p_num)[1] for p_num, html_content in zip(page_numbers, results))
+
+                if not new_in_round:
+                    logging.warning(f"[{site_name} - {category_name}] Новых товаров не найдено на страницах {page}-{last_page}. Завершаю парсинг.")
+                    break
+                page = last_page + 1
+        else:
+            while len(local_product_names) < target_count and page <= max_pages:
+                
+                tasks = []
+                page_numbers = range(page, min(page + BATCH_SIZE, max_pages + 1))
+                logging.info(f"[{site_name} - {category_name}] Готовлю пакет запросов для страниц {page}-{page_numbers[-1]}...")
+
+                for p_num in page_numbers:
+                    tasks.append(fetch_page(p_num))
+
+                results = await asyncio.gather(*tasks)
+                
+                new_products_found_in_batch = False
+                for p_num, html_content in zip(page_numbers, results):
+                    if collect(html_content, p_num)[1]:
+                        new_products_found_in_batch = True
+                    if len(local_product_names) >= target_count:
+                        break
+                
+                if not new_products_found_in_batch:
+                    logging.warning(f"[{site_name} - {category_name}] Новых товаров не найдено в пакете. Завершаю парсинг.")
+                    break
 
                 if len(local_product_names) >= target_count:
-                    logging.info(f"[{site_name} - {category_name}] ✅ Достигнуто целевое количество: {len(local_product_names)} товаров")
                     break
-            
-            if not new_products_found_in_batch and page > 1:
-                logging.warning(f"[{site_name} - {category_name}] Новых товаров не найдено в пакете. Завершаю парсинг.")
-                break
-
-            if len(local_product_names) >= target_count:
-                break
 
-            page += BATCH_SIZE
-            await asyncio.sleep(2) # Увеличим паузу между пакетами
+                page += BATCH_SIZE
+                await asyncio.sleep(BATCH_DELAY) # Пауза между пакетами
 
+    if len(local_product_names) >= target_count:
+        logging.info(f"[{site_name} - {category_name}] ✅ Достигнуто целевое количество: {len(local_product_names)} товаров")
     logging.info(f"--- Парсинг {site_name} ({category_name}) завершен. Собрано: {len(local_product_names)} ---")
     return list(local_product_names)
 
-async def process_config_group(group_key, configs):
+async def load_group_products(site_name, group_name, category_path, products=None):
+    """
+    Загружает все уже сохраненные товары группы ({site}_{group}_*.txt), чтобы избежать дублей.
+    Пример: rozetka_alcohol_*.txt
+
+    Returns:
+        set: Товары группы (переданный products или новый set).
+    """
+    import glob
+    products = products if products is not None else set()
+    output_path = await create_category_folders(category_path)
+    for file_path in glob.glob(os.path.join(output_path, f"{site_name}_{group_name}_*.txt")):
+        await load_existing_products(file_path, products)
+    return products
+
+async def load_group_seen(site_name, group_name, category_path):
+    """
+    Компактное множество известных товаров группы (utils/hashset.py) для конфигураций
+    с compact_dedup: открывается из файла {site}_{group}.seen через mmap, а если файла
+    нет (или он поврежден) — один раз строится по текстовым файлам группы и сохраняется.
+
+    Returns:
+        ProductHashSet: Множество хешей нормализованных названий.
+    """
+    output_path = await create_category_folders(category_path)
+    path = seen_path(output_path, site_name, group_name)
+    if os.path.exists(path):
+        try:
+            seen = ProductHashSet.load(path)
+            logging.info(f"🧮 [{site_name} - {group_name}] Множество товаров открыто: {len(seen)} ({os.path.basename(path)})")
+            return seen
+        except ValueError as e:
+            logging.warning(f"{e}. Перестраиваю по текстовым файлам.")
+
+    import glob
+    seen = ProductHashSet()
+    for file_path in glob.glob(os.path.join(output_path, f"{site_name}_{group_name}_*.txt")):
+        async for product in aiter_products(file_path):
+            seen.add(product)
+    await asyncio.to_thread(seen.save, path)
+    logging.info(f"🧮 [{site_name} - {group_name}] Множество товаров построено: {len(seen)} → {os.path.basename(path)}")
+    return seen
+
+async def load_known_products(configs):
+    """Известные товары группы: ProductHashSet для compact_dedup, иначе set названий."""
+    base_config = configs[0]
+    site_name, group_name = base_config['site_name'], base_config.get('group', base_config['category_name'])
+    if base_config.get('compact_dedup'):
+        return await load_group_seen(site_name, group_name, base_config['category_path'])
+    return await load_group_products(site_name, group_name, base_config['category_path'])
+
+async def load_product_sources(products, configs, source_keys, compact=False):
+    """
+    Конфигурации с sub_category, с листингов которых собраны товары группы.
+
+    Источники из этого запуска (source_keys) дополняются записанными в хранилище
+    (колонка source) — кроме режима compact_dedup, где сохраняются только новые товары.
+
+    Returns:
+        dict: Товар → конфигурация (только для товаров с известным источником).
+    """
+    dedicated = {config['category_name']: config for config in configs if config.get('sub_category')}
+    if not dedicated:
+        return {}
+    if not compact:
+        base_config = configs[0]
+        output_path = await create_category_folders(base_config['category_path'])
+        store_file = product_store.store_path(output_path, base_config['site_name'],
+                                              base_config.get('group', base_config['category_name']))
+        stored = await asyncio.to_thread(product_store.load_sources, store_file)
+        source_keys = {**{key: dedicated[name] for key, name in stored.items() if name in dedicated}, **source_keys}
+    sources = {}
+    for product in products:
+        config = source_keys.get(normalize_product_key(product))
+        if config is not None:
+            sources[product] = config
+    return sources
+
+async def process_config_group(group_key, configs, all_products_in_group=None, page_limits=None, history=None,
+                               group_configs=None):
     """
     Обрабатывает группу конфигураций (например, все алкогольные напитки с одного сайта).
+
+    Args:
+        all_products_in_group (set | ProductHashSet): Уже загруженные товары группы (режим демона).
+            Если не передан, товары загружаются с диска (load_known_products). Переданное
+            множество дополняется новыми товарами на месте. С ProductHashSet (compact_dedup)
+            в файлы дописываются только новые товары, а множество сохраняется в файл .seen.
+        page_limits (dict): config_key → предел страниц из plan_crawl.
+        history (CrawlHistory): Если передана, в нее записывается статистика каждой категории.
+        group_configs (list[dict]): Все конфигурации группы, если configs — только те,
+            что запускаются сейчас (план обхода). По умолчанию совпадает с configs.
+
+    Если у всех конфигураций группы включен track_removals и все листинги обойдены
+    целиком, товары, которых не оказалось ни на одной странице, удаляются из группы
+    (и попадают в дельту запуска как удаленные). Если хотя бы одна конфигурация группы
+    пропущена планом обхода или ее листинг обрезан пределом страниц, ничего не удаляется.
+    В режиме compact_dedup не поддерживается.
+
+    Товары с листингов конфигураций с sub_category (например, rozetka chacha, beer)
+    запоминают источник и сохраняются в эту подкатегорию без лемматизации. Источник
+    пишется в хранилище (колонка source), поэтому уже сохраненные товары при следующих
+    запусках тоже не категоризируются заново.
     """
     site_name, group_name = group_key
     logging.info(f"\n{'='*60}\n🚀 Начинаю обработку группы: {site_name.upper()} - {group_name.upper()}\n{'='*60}")
 
-    all_products_in_group = set()
-    
     # Сначала загружаем существующие продукты для этой группы, если они есть
     # (предполагаем, что первая конфигурация репрезентативна для путей)
     base_config = configs[0]
     category_path = base_config['category_path']
-    output_path = await create_category_folders(category_path)
-    
-    # Загружаем все файлы, относящиеся к этой группе, чтобы избежать дублей
-    # Пример: rozetka_alcohol_*.txt
-    import glob
-    existing_files = glob.glob(os.path.join(output_path, f"{site_name}_{group_name}_*.txt"))
-    for f in existing_files:
-        existing_products = await load_existing_products(f)
-        all_products_in_group.update(existing_products)
+    if all_products_in_group is None:
+        all_products_in_group = await load_known_products(configs)
+    compact = isinstance(all_products_in_group, ProductHashSet)
 
     initial_count = len(all_products_in_group)
+    run_new_products = set()
     logging.info(f"[{site_name} - {group_name}] Изначально найдено {initial_count} уникальных товаров в группе.")
 
     # Последовательно парсим каждую категорию в группе
+    group_configs = group_configs or configs
+    crawled = {config_key(config) for config in configs}
+    # Товары пропущенной категории не увидены, но с сайта не пропали
+    listings_complete = (not compact and all(config.get('track_removals') for config in group_configs)
+                         and all(config_key(config) in crawled for config in group_configs))
+    seen_on_site = set()
+    source_keys = {}  # нормализованное название → конфигурация с sub_category, где товар найден
     for config in configs:
-        new_products = await parse_site_with_pagination(config, all_products_in_group)
+        stats = {}
+        page_limit = page_limits.get(config_key(config)) if page_limits else None
+        new_products = await parse_site_with_pagination(config, all_products_in_group, page_limit, stats)
+        if history is not None:
+            history.record(config, stats)
         all_products_in_group.update(new_products)
-
-    final_product_list = list(all_products_in_group)
+        run_new_products.update(new_products)
+        listings_complete = listings_complete and stats.get('complete', False)
+        seen_on_site.update(stats.get('seen', ()))
+        if config.get('sub_category'):
+            # Увиденные — в том числе товары, уже найденные общим листингом
+            for product in (*new_products, *stats.get('seen', ())):
+                source_keys.setdefault(normalize_product_key(product), config)
+
+    if listings_complete:
+        # Сохраненные названия уже очищены (clean_products), увиденные на сайте — еще нет
+        seen_keys = {clean_product_name(product) for product in seen_on_site}
+        removed = {product for product in all_products_in_group if clean_product_name(product) not in seen_keys}
+        if removed:
+            all_products_in_group.difference_update(removed)
+            logging.info(f"🗑️ [{site_name} - {group_name}] Больше нет на сайте: {len(removed)} товаров")
+
+    # В компактном режиме названия уже сохраненных товаров не хранятся — дописываем только новые
+    final_product_list = list(run_new_products) if compact else list(all_products_in_group)
     
     # Сохраняем все собранные товары после завершения парсинга всей группы
     if final_product_list:
         subcategory_keywords = await load_external_keywords(base_config.get('external_keywords_file', ''))
         lang = base_config.get("language", "en")
-        await save_products_by_subcategory(final_product_list, site_name, group_name, category_path, subcategory_keywords, lang)
-
-    newly_added_count = len(final_product_list) - initial_count
+        sources = await load_product_sources(final_product_list, configs, source_keys, compact)
+        await save_products_by_subcategory(final_product_list, site_name, group_name, category_path, subcategory_keywords, lang,
+                                           run_new_products, append=compact, sources=sources)
+    if compact and run_new_products:
+        output_path = await create_category_folders(category_path)
+        await asyncio.to_thread(all_products_in_group.save, seen_path(output_path, site_name, group_name))
+
+    newly_added_count = len(all_products_in_group) - initial_count
     logging.info(f"--- Обработка группы {site_name.upper()} - {group_name.upper()} завершена. ---")
-    logging.info(f"📊 Всего товаров в группе: {len(final_product_list)} (добавлено новых: {newly_added_count})")
+    logging.info(f"📊 Всего товаров в группе: {len(all_products_in_group)} (добавлено новых: {newly_added_count})")
     
     return final_product_list
 
 
-async def main_async():
+def load_grouped_configs(target_site_name=None, config_path=None):
     """
-    Асинхронная основная функция для запуска парсеров.
+    Читает config.json и группирует включенные конфигурации по (site_name, group).
+
+    Args:
+        target_site_name (str): Если задан, берутся только конфигурации этого сайта.
+        config_path (str): Путь к конфигурации (по умолчанию config.json рядом со скриптом).
+
+    Returns:
+        dict | None: {(site_name, group_name): [config, ...]} или None при ошибке.
     """
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    config_path = os.path.join(script_dir, 'config.json')
+    config_path = config_path or os.path.join(script_dir, 'config.json')
     try:
         with open(config_path, 'r', encoding='utf-8') as f:
             configs = json.load(f)
     except Exception as e:
         logging.error(f"Ошибка чтения config.json: {e}")
-        return
+        return None
 
-    if len(sys.argv) > 1:
-        target_site_name = sys.argv[1]
+    if target_site_name:
         configs = [c for c in configs if c['site_name'] == target_site_name]
         if not configs:
             logging.error(f"Сайт '{target_site_name}' не найден в config.json.")
-            return
+            return None
     
     # Группируем конфигурации по сайту и группе
     grouped_configs = {}
@@ -326,42 +629,67 @@ async def main_async():
         else:
             logging.warning(f"ПРОПУСКАЮ: {config['site_name'].upper()} ({config['category_name']}) (отключен)")
 
-    all_results = {}
-    for group_key, configs_in_group in grouped_configs.items():
-        group_products = await process_config_group(group_key, configs_in_group)
-        all_results[f"{group_key[0]}_{group_key[1]}"] = group_products
+    return grouped_configs
 
-    # ... (остальная логика)
+async def main_async(target_site_name=None, page_budget=None, full=False):
+    """
+    Асинхронная основная функция для запуска парсеров.
+
+    Args:
+        target_site_name (str): Если задан, парсится только этот сайт из config.json.
+        page_budget (int): Общий лимит запрашиваемых страниц на запуск.
+        full (bool): Обойти все категории без учета истории обхода (история все равно пополняется).
+    """
+    grouped_configs = load_grouped_configs(target_site_name)
+    if grouped_configs is None:
+        return
 
-def main():
-    # Настройка логирования
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    log_file_path = os.path.join(script_dir, 'scraper.log')
-    root_logger = logging.getLogger()
-    root_logger.handlers = []
-    root_logger.setLevel(logging.INFO)
-    file_formatter = logging.Formatter('%(asctime)s - [%(levelname)s] - %(message)s')
-    file_handler = logging.FileHandler(log_file_path, encoding='utf-8')
-    file_handler.setFormatter(file_formatter)
-    root_logger.addHandler(file_handler)
-    console_formatter = logging.Formatter('%(asctime)s - [%(levelname)s] - %(message)s', datefmt='%Y-%m-%d %H:%M')
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(console_formatter)
-    root_logger.addHandler(console_handler)
+    history = CrawlHistory(os.path.join(script_dir, CRAWL_HISTORY_FILE))
+    page_limits = None
+    if not full:
+        all_configs = [config for configs_in_group in grouped_configs.values() for config in configs_in_group]
+        page_limits = plan_crawl(all_configs, history, MAX_PAGES, page_budget)
+        logging.info(f"🧭 План обхода: категорий {len(page_limits)} из {len(all_configs)}, "
+                     f"страниц не более {sum(page_limits.values())}")
 
-    # Запуск асинхронного кода
-    asyncio.run(main_async())
+    all_results = {}
+    deltas.start_run()
+    try:
+        for group_key, configs_in_group in grouped_configs.items():
+            group_configs = configs_in_group
+            if page_limits is not None:
+                configs_in_group = [config for config in configs_in_group if config_key(config) in page_limits]
+                if not configs_in_group:
+                    continue
+            group_products = await process_config_group(group_key, configs_in_group, page_limits=page_limits,
+                                                        history=history, group_configs=group_configs)
+            all_results[f"{group_key[0]}_{group_key[1]}"] = group_products
+            history.save()
+    finally:
+        # Браузер (fetch_backend 'playwright') общий для всех групп — закрываем в конце
+        await close_browser_pool()
+        deltas.finish_run()
 
-    # Синхронная часть после парсинга
+    # ... (остальная логика)
+
+def clean_output_files(files=None):
+    """
+    Синхронная часть после парсинга: очистка всех файлов в output/.
+
+    Args:
+        files (list[str]): Если задан, очищаются только эти файлы.
+    """
     logging.info(f"\n{'='*60}")
     logging.info("🧹 АВТОМАТИЧЕСКАЯ ОЧИСТКА ТОВАРОВ")
     logging.info(f"{ '='*60}")
     try:
         from utils.clean_products import clean_file
         import glob
-        output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
-        pattern = os.path.join(output_dir, "**", "*.txt")
-        files = glob.glob(pattern, recursive=True)
+        if files is None:
+            output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
+            pattern = os.path.join(output_dir, "**", "*.txt")
+            files = glob.glob(pattern, recursive=True)
         if files:
             logging.info(f"📁 Найдено файлов для очистки: {len(files)}")
             success_count = sum(1 for file_path in files if clean_file(file_path))
@@ -371,5 +699,87 @@ def main():
     except Exception as e:
         logging.error(f"❌ Ошибка при автоматической очистке: {e}", exc_info=True)
 
+def run_profiled(args, script_dir):
+    """
+    Запуск в режиме --profile: main_async и очистка под cProfile,
+    плюс мониторинг блокировок event loop дольше args.stall_ms.
+    Артефакты пишутся в profiles/<run_id>/ рядом со scraper.log.
+    """
+    from utils.profiling import (
+        LoopStallMonitor, SlowCallbackCollector, make_profile_dir, profile_section, save_loop_report
+    )
+
+    profile_dir = make_profile_dir(script_dir)
+    logging.info(f"🔬 Режим профилирования: артефакты в {profile_dir}")
+
+    monitor = LoopStallMonitor(args.stall_ms)
+    slow_callbacks = SlowCallbackCollector()
+    asyncio_logger = logging.getLogger('asyncio')
+    asyncio_logger.addHandler(slow_callbacks)
+
+    async def monitored_main():
+        loop = asyncio.get_running_loop()
+        loop.slow_callback_duration = args.stall_ms / 1000
+        monitor.start()
+        try:
+            await main_async(args.site, args.page_budget, args.full)
+        finally:
+            monitor.stop()
+
+    try:
+        with profile_section(profile_dir, 'main_async'):
+            asyncio.run(monitored_main(), debug=True)
+    finally:
+        asyncio_logger.removeHandler(slow_callbacks)
+        save_loop_report(profile_dir, monitor, slow_callbacks)
+
+    with profile_section(profile_dir, 'cleaning'):
+        clean_output_files()
+
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="FinPi Scraper")
+    parser.add_argument("site", nargs="?", help="site_name из config.json (по умолчанию все включенные сайты)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Профилировать запуск (cProfile + мониторинг блокировок event loop)")
+    parser.add_argument("--stall-ms", type=float, default=100,
+                        help="Порог блокировки event loop в мс для режима --profile")
+    parser.add_argument("--page-budget", type=int, default=None,
+                        help="Общий лимит запрашиваемых страниц на запуск (распределяется по истории обхода)")
+    parser.add_argument("--full", action="store_true",
+                        help="Обойти все категории на полную глубину, не учитывая историю обхода")
+    return parser.parse_args(argv)
+
+def setup_logging(script_dir):
+    """
+    Настраивает корневой логгер: файл scraper.log рядом со скриптом и консоль.
+    Запись выполняется в фоновом потоке, однотипные сообщения ограничиваются по частоте
+    (utils/log_pipeline.py).
+    """
+    log_file_path = os.path.join(script_dir, 'scraper.log')
+    file_formatter = StructuredFormatter(LOG_FORMAT)
+    file_handler = logging.FileHandler(log_file_path, encoding='utf-8')
+    file_handler.setFormatter(file_formatter)
+    console_formatter = StructuredFormatter(LOG_FORMAT, datefmt='%Y-%m-%d %H:%M')
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(console_formatter)
+    start_logging([file_handler, console_handler])
+
+def main():
+    args = parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    setup_logging(script_dir)
+
+    if args.profile:
+        run_profiled(args, script_dir)
+        return
+
+    # Запуск асинхронного кода
+    asyncio.run(main_async(args.site, args.page_budget, args.full))
+
+    # Синхронная часть после парсинга
+    clean_output_files()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
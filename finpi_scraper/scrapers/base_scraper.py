@@ -1,18 +1,83 @@
 # finpi_scraper/scrapers/base_scraper.py
+import json
+import logging
 from abc import ABC, abstractmethod
 from bs4 import BeautifulSoup
+import soupsieve
+
+try:
+    import ijson
+    JSON_ERRORS = (ValueError, ijson.JSONError)
+except ImportError:  # ijson — необязательная зависимость, без нее JSON разбирается целиком
+    ijson = None
+    JSON_ERRORS = (ValueError,)
+
+DATA_SOURCES = ('html', 'api')
+DEFAULT_API_PAGE_SIZE = 60
+
+# Селектор, сработавший на прошлых страницах: (site_name, селекторы) → номер в списке
+_winning_selectors = {}
+_ijson_fallback_logged = False  # Сообщение о разборе без ijson выводится один раз на процесс
+
+
+def iter_json_path(data, path: str):
+    """
+    Обходит разобранный JSON по пути в синтаксисе ijson:
+    ключи через точку, 'item' — каждый элемент массива.
+    Пример: "data.goods.item.title".
+
+    Yields:
+        Значения по указанному пути.
+    """
+    nodes = [data]
+    for key in path.split('.'):
+        next_nodes = []
+        for node in nodes:
+            if key == 'item' and isinstance(node, list):
+                next_nodes.extend(node)
+            elif isinstance(node, dict) and key in node:
+                next_nodes.append(node[key])
+        nodes = next_nodes
+    yield from nodes
+
 
 class BaseScraper(ABC):
     """
     Абстрактный базовый класс для всех скрейперов.
     Определяет общий интерфейс для парсинга сайтов.
+
+    Источник данных задается ключом data_source в конфигурации:
+        "html" (по умолчанию) — страницы листинга и CSS-селекторы product_name_selector;
+        "api" — JSON-эндпоинт листинга из блока "api":
+            url_template  — шаблон URL с {page}, {page_size}, {offset};
+            page_size     — товаров на странице эндпоинта;
+            products_path — путь к названиям товаров ("data.goods.item.title");
+            total_pages_path / total_products_path — необязательные пути к размеру листинга.
+
+    listing_region — необязательный фрагмент разметки, с которого начинается сетка товаров:
+    строка или {"start": "...", "end": "..."}. HTML обрезается по нему до разбора, шапка,
+    скрипты и подвал в дерево не попадают. Если якорь не найден или в обрезанной части
+    нет товаров, разбирается вся страница.
     """
     def __init__(self, config):
         self.config = config
         self.site_name = config['site_name']
         self.base_url = config['url']
         self.selectors = config['product_name_selector']
+        selectors = self.selectors if isinstance(self.selectors, list) else [self.selectors]
+        self.compiled_selectors = [soupsieve.compile(selector) for selector in selectors]
+        # Один проход по дереву для всех селекторов-кандидатов сразу
+        self.any_selector = soupsieve.compile(', '.join(selectors)) if len(selectors) > 1 else self.compiled_selectors[0]
+        self.selector_key = (self.site_name, tuple(selectors))
+        region = config.get('listing_region') or {}
+        self.region_start, self.region_end = (region, None) if isinstance(region, str) else (region.get('start'), region.get('end'))
         self.pagination_template = config.get('pagination_template', '')
+        self.data_source = config.get('data_source', 'html')
+        self.api = config.get('api', {})
+        if self.data_source not in DATA_SOURCES:
+            raise ValueError(f"Неизвестный data_source '{self.data_source}' для сайта: {self.site_name}")
+        if self.data_source == 'api' and not self.api.get('products_path'):
+            raise ValueError(f"Для data_source 'api' не задан api.products_path: {self.site_name}")
 
     @abstractmethod
     def get_page_url(self, page: int) -> str:
@@ -27,10 +92,153 @@ class BaseScraper(ABC):
         """
         pass
 
-    def parse(self, html: str) -> list[str]:
+    def get_api_url(self, page: int) -> str:
+        """
+        Формирует URL JSON-эндпоинта для страницы листинга (data_source "api").
+        По умолчанию подставляет {page}, {page_size} и {offset} в api.url_template;
+        скрейперы переопределяют метод, если эндпоинту нужны другие параметры.
+
+        Args:
+            page (int): Номер страницы.
+
+        Returns:
+            str: URL эндпоинта.
+        """
+        page_size = self.api.get('page_size', DEFAULT_API_PAGE_SIZE)
+        return self.api['url_template'].format(page=page, page_size=page_size, offset=(page - 1) * page_size)
+
+    def get_source_url(self, page: int) -> str:
+        """URL, который нужно загрузить для страницы page, с учетом data_source."""
+        if self.data_source == 'api':
+            return self.get_api_url(page)
+        return self.get_page_url(page)
+
+    def parse(self, content: str) -> list[str]:
+        """
+        Извлекает названия товаров из загруженной страницы:
+        HTML-листинга или ответа JSON-эндпоинта (в зависимости от data_source).
+
+        Args:
+            content (str): Тело ответа.
+
+        Returns:
+            list[str]: Список названий товаров.
+        """
+        if self.data_source == 'api':
+            return self.parse_json(content)
+        return self.parse_html(content)
+
+    def _json_values(self, content, path: str) -> list:
+        """
+        Значения JSON по пути в синтаксисе ijson. С ijson разбор потоковый:
+        DOM и полное дерево объектов не строятся.
+        """
+        if ijson is not None:
+            payload = content.encode('utf-8') if isinstance(content, str) else content
+            return list(ijson.items(payload, path))
+        global _ijson_fallback_logged
+        if not _ijson_fallback_logged:
+            _ijson_fallback_logged = True
+            logging.info("ijson не установлен: ответы API разбираются целиком, без потокового режима "
+                         "(pip install ijson)")
+        return list(iter_json_path(json.loads(content), path))
+
+    def parse_json(self, content) -> list[str]:
+        """
+        Извлекает названия товаров из ответа JSON-эндпоинта по api.products_path.
+
+        Args:
+            content (str | bytes): Тело ответа.
+
+        Returns:
+            list[str]: Список названий товаров.
+        """
+        try:
+            values = self._json_values(content, self.api['products_path'])
+        except JSON_ERRORS as e:
+            logging.warning(f"[{self.site_name}] Ответ API не является корректным JSON: {e}")
+            return []
+        return [value.strip() for value in values if isinstance(value, str) and value.strip()]
+
+    def extract_pagination_info(self, content):
+        """
+        Извлекает из первой страницы листинга сведения о его размере,
+        чтобы заранее спланировать нужные страницы вместо перебора вслепую.
+        Скрейперы переопределяют метод для своей разметки; для data_source "api"
+        по умолчанию читаются api.total_pages_path / api.total_products_path.
+
+        Args:
+            content (str): Тело ответа первой страницы.
+
+        Returns:
+            dict | None: {"total_pages": N} и/или {"total_products": N}; None, если сведений нет.
+        """
+        if self.data_source != 'api':
+            return None
+        info = {}
+        for key in ('total_pages', 'total_products'):
+            path = self.api.get(f'{key}_path')
+            if not path:
+                continue
+            try:
+                values = self._json_values(content, path)
+            except JSON_ERRORS:
+                return None
+            if values and str(values[0]).isdigit():
+                info[key] = int(values[0])
+        return info or None
+
+    def listing_region(self, html: str):
+        """
+        Часть HTML от якоря listing_region (до необязательного конечного якоря).
+
+        Returns:
+            str | None: Обрезанный HTML или None, если якорь не задан или не найден.
+        """
+        if not self.region_start:
+            return None
+        start = html.find(self.region_start)
+        if start < 0:
+            return None
+        end = html.find(self.region_end, start + len(self.region_start)) if self.region_end else -1
+        # Якорь может быть атрибутом (class="..."): режем по началу тега, в котором он стоит
+        start = max(html.rfind('<', 0, start + 1), 0)
+        if end < 0:
+            return html[start:]
+        return html[start:max(html.rfind('<', start, end + 1), start)]
+
+    def select_products(self, soup) -> list:
+        """
+        Элементы товаров по первому из селекторов, нашедшему хоть что-то.
+        Сначала пробуется селектор, сработавший на прошлых страницах сайта; если он ничего
+        не нашел, все кандидаты проверяются за один обход дерева (объединенным селектором).
+        """
+        winner = _winning_selectors.get(self.selector_key)
+        if winner is not None:
+            elements = self.compiled_selectors[winner].select(soup)
+            if elements:
+                return elements
+
+        matched = self.any_selector.select(soup)
+        if not matched:
+            return []
+        if len(self.compiled_selectors) == 1:
+            winner = 0
+        else:
+            # Проверяем отдельные селекторы только на уже найденных элементах
+            winner = min(
+                next(i for i, selector in enumerate(self.compiled_selectors) if selector.match(elem))
+                for elem in matched
+            )
+            matched = [elem for elem in matched if self.compiled_selectors[winner].match(elem)]
+        _winning_selectors[self.selector_key] = winner
+        return matched
+
+    def parse_html(self, html: str) -> list[str]:
         """
         Извлекает названия товаров из HTML-контента страницы.
-        Использует селекторы, указанные в конфигурации.
+        Использует селекторы, указанные в конфигурации; с listing_region
+        разбирается только сетка товаров.
 
         Args:
             html (str): HTML-контент страницы.
@@ -38,19 +246,17 @@ class BaseScraper(ABC):
         Returns:
             list[str]: Список названий товаров.
         """
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        product_elements = []
-        # Если селектор - это список, пробуем каждый по очереди
-        if isinstance(self.selectors, list):
-            for s in self.selectors:
-                product_elements = soup.select(s)
-                if product_elements:
-                    # print(f"[{self.site_name}] Использован селектор: '{s}'") # Для отладки
-                    break
-        else:
-            # Иначе работаем как обычно
-            product_elements = soup.select(self.selectors)
-        
-        return [elem.get_text(strip=True) for elem in product_elements if elem.get_text(strip=True)]
+        region = self.listing_region(html)
+        if region is not None:
+            product_elements = self.select_products(BeautifulSoup(region, 'html.parser'))
+            if product_elements:
+                return self._element_texts(product_elements)
+            logging.debug(f"[{self.site_name}] В listing_region товаров нет, разбираю страницу целиком")
+
+        product_elements = self.select_products(BeautifulSoup(html, 'html.parser'))
+        return self._element_texts(product_elements)
 
+    @staticmethod
+    def _element_texts(elements) -> list[str]:
+        texts = (elem.get_text(strip=True) for elem in elements)
+        return [text for text in texts if text]
@@ -1,5 +1,17 @@
 # finpi_scraper/scrapers/rost_scraper.py
-from .base_scraper import BaseScraper
+import re
+from urllib.parse import quote, urlparse
+
+from .base_scraper import BaseScraper, DEFAULT_API_PAGE_SIZE
+
+# GraphQL-запрос листинга Magento: только названия товаров категории
+GRAPHQL_PRODUCTS_QUERY = (
+    '{products(filter:{category_url_path:{eq:"%s"}},pageSize:%d,currentPage:%d)'
+    '{total_count page_info{total_pages} items{name}}}'
+)
+TOOLBAR_AMOUNT_RE = re.compile(r'class="toolbar-amount"[^>]*>(.*?)</p>', re.S)
+TOOLBAR_NUMBER_RE = re.compile(r'class="toolbar-number"[^>]*>\s*([\d\s]+?)\s*<')
+PAGE_LINK_RE = re.compile(r'[?&]p=(\d+)"')
 
 class RostScraper(BaseScraper):
     """
@@ -18,3 +30,27 @@ class RostScraper(BaseScraper):
             return self.base_url + '&' + self.pagination_template.format(page=page).lstrip('?')
         else:
             return self.base_url + self.pagination_template.format(page=page)
+
+    def get_api_url(self, page: int) -> str:
+        """
+        Формирует GET-запрос к GraphQL-эндпоинту Magento для категории из URL листинга.
+        Пример: https://rostmarket.com.ua/alkogol/ → category_url_path "alkogol"
+        """
+        category_path = urlparse(self.base_url).path.strip('/')
+        page_size = self.api.get('page_size', DEFAULT_API_PAGE_SIZE)
+        query = GRAPHQL_PRODUCTS_QUERY % (category_path, page_size, page)
+        return self.api['url_template'].format(query=quote(query, safe=''))
+
+    def extract_pagination_info(self, content):
+        """
+        Magento: общее количество товаров — последнее число в .toolbar-amount
+        ("Товари 1-36 з 487" или "Товарів 487"); иначе наибольший номер страницы в .pages.
+        """
+        if self.data_source == 'api':
+            return super().extract_pagination_info(content)
+        amount = TOOLBAR_AMOUNT_RE.search(content)
+        numbers = TOOLBAR_NUMBER_RE.findall(amount.group(1)) if amount else []
+        if numbers:
+            return {"total_products": int(re.sub(r'\s', '', numbers[-1]))}
+        pages = [int(num) for num in PAGE_LINK_RE.findall(content)]
+        return {"total_pages": max(pages)} if pages else None
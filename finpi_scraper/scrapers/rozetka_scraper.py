@@ -1,6 +1,11 @@
 # finpi_scraper/scrapers/rozetka_scraper.py
+import re
+
 from .base_scraper import BaseScraper
 
+CATEGORY_ID_RE = re.compile(r'/c(\d+)/?')
+PAGINATION_LINK_RE = re.compile(r'class="pagination__link[^"]*"[^>]*>\s*(\d+)\s*<')
+
 class RozetkaScraper(BaseScraper):
     """
     Класс-парсер для сайта Rozetka.
@@ -15,3 +20,22 @@ class RozetkaScraper(BaseScraper):
         
         # pagination_template: "/page={page}/"
         return self.base_url.rstrip('/') + self.pagination_template.format(page=page)
+
+    def get_api_url(self, page: int) -> str:
+        """
+        Формирует URL каталожного API Rozetka: id категории берется из URL листинга.
+        Пример: .../c4594292/ → category_id=4594292
+        """
+        match = CATEGORY_ID_RE.search(self.base_url)
+        if not match:
+            raise ValueError(f"[{self.site_name}] Не удалось определить id категории из URL: {self.base_url}")
+        return self.api['url_template'].format(page=page, category_id=match.group(1))
+
+    def extract_pagination_info(self, content):
+        """
+        Количество страниц — наибольший номер в пагинаторе (rz-paginator).
+        """
+        if self.data_source == 'api':
+            return super().extract_pagination_info(content)
+        pages = [int(num) for num in PAGINATION_LINK_RE.findall(content)]
+        return {"total_pages": max(pages)} if pages else None
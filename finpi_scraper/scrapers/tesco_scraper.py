@@ -1,6 +1,10 @@
 # finpi_scraper/scrapers/tesco_scraper.py
+import re
+
 from .base_scraper import BaseScraper
 
+RESULTS_COUNT_RE = re.compile(r'of\s+([\d,]+)\s+items', re.I)
+
 class TescoScraper(BaseScraper):
     """
     Класс-парсер для сайта Tesco.
@@ -18,3 +22,10 @@ class TescoScraper(BaseScraper):
             return self.base_url + '&' + self.pagination_template.format(page=page).lstrip('?')
         else:
             return self.base_url + self.pagination_template.format(page=page)
+
+    def extract_pagination_info(self, content):
+        """
+        Tesco: общее количество товаров из "Showing 1 to 24 of 612 items".
+        """
+        match = RESULTS_COUNT_RE.search(content)
+        return {"total_products": int(match.group(1).replace(',', ''))} if match else None
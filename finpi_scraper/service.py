@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Локальный HTTP-сервис пакетной категоризации товаров.
+
+Другим сервисам не нужно импортировать пакет и загружать модели spaCy в своем
+процессе: сервис держит модели, разобранные файлы ключевых слов и их скомпилированные
+индексы (utils/categorization.py) в памяти и категоризирует названия так же, как main.py.
+
+    POST /categorize
+        {"names": ["Віскі Jameson 0.7л", ...], "lang": "uk", "category": "alcohol"}
+    →   {"category": "alcohol", "lang": "uk", "count": 1, "subcategories": ["whiskey"]}
+
+    GET /health
+    →   {"status": "ok", "models": ["uk"], "categories": ["alcohol"]}
+
+category — имя файла keywords/{category}_keywords.json. Подкатегории возвращаются
+в порядке names. Одинаковые названия внутри пачки лемматизируются один раз,
+лемматизация идет пакетно (nlp.pipe) в отдельном потоке, поэтому сервер продолжает
+принимать запросы других клиентов. Измененный файл ключевых слов перечитывается
+без перезапуска (load_external_keywords).
+
+Примеры (из finpi_scraper/):
+    python service.py                      # 127.0.0.1:8090
+    python service.py --port 9000 --preload uk
+"""
+import argparse
+import asyncio
+import logging
+import os
+import re
+import sys
+import time
+
+from aiohttp import web
+
+from main import load_external_keywords, setup_logging
+from utils.categorization import categorize_lemmas, compile_keywords
+from utils.lemmatizer import MODEL_NAMES, NLP_MODELS, get_nlp, lemmatize_batch
+from utils.ngram_classifier import get_classifier
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+KEYWORDS_DIR = os.path.join(SCRIPT_DIR, 'keywords')
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8090
+DEFAULT_CATEGORY = 'alcohol'
+MAX_BATCH = 10000  # Максимум названий в одном запросе
+CATEGORY_RE = re.compile(r'^[\w-]+$')  # Имя категории не должно выводить за пределы keywords/
+
+
+class CategorizationService:
+    """
+    Состояние сервиса: скомпилированные индексы ключевых слов по категориям
+    и блокировки лемматизации по языкам (модель spaCy не используется из двух потоков сразу).
+
+    Args:
+        keywords_dir (str): Директория с файлами {category}_keywords.json.
+    """
+    def __init__(self, keywords_dir=KEYWORDS_DIR):
+        self.keywords_dir = keywords_dir
+        self.indexes = {}  # category → (разобранный файл, KeywordIndex)
+        self.lang_locks = {}  # lang → asyncio.Lock
+        self.stats = {"requests": 0, "names": 0}
+
+    async def get_index(self, category: str):
+        """Индекс категории; перекомпилируется, только если файл ключевых слов перечитан."""
+        keywords_file = os.path.join(self.keywords_dir, f"{category}_keywords.json")
+        keywords = await load_external_keywords(keywords_file)
+        if keywords is None:
+            return None
+        cached = self.indexes.get(category)
+        if cached is None or cached[0] is not keywords:
+            cached = (keywords, compile_keywords(keywords))
+            self.indexes[category] = cached
+            logging.info(f"🗂️ Индекс ключевых слов '{category}': подкатегорий {len(cached[1].rules)}")
+        return cached[1]
+
+    async def lemmatize(self, names: list, lang: str) -> list:
+        """Пакетная лемматизация в отдельном потоке, не более одной пачки на язык одновременно."""
+        lock = self.lang_locks.setdefault(lang, asyncio.Lock())
+        async with lock:
+            return await asyncio.to_thread(lambda: list(lemmatize_batch(names, lang)))
+
+    async def categorize(self, names: list, lang: str, category: str):
+        """
+        Returns:
+            list[str] | None: Подкатегории в порядке names или None, если нет файла ключевых слов.
+        """
+        index = await self.get_index(category)
+        if index is None:
+            return None
+        unique_names = list(dict.fromkeys(names))
+        # Уверенные ответы модели первого прохода (utils/ngram_classifier.py) не лемматизируются
+        classifier = get_classifier(self.indexes[category][0])
+        subcategories = {}
+        if classifier is not None:
+            predicted = await asyncio.to_thread(classifier.predict, unique_names)
+            subcategories = {name: label for name, label in zip(unique_names, predicted) if label is not None}
+        pending = [name for name in unique_names if name not in subcategories]
+        lemmas = await self.lemmatize(pending, lang)
+        subcategories.update((name, categorize_lemmas(set(name_lemmas), index))
+                             for name, name_lemmas in zip(pending, lemmas))
+        self.stats["requests"] += 1
+        self.stats["names"] += len(names)
+        return [subcategories[name] for name in names]
+
+
+SERVICE_KEY = web.AppKey("service", CategorizationService)
+
+
+def json_error(status: int, message: str):
+    return web.json_response({"error": message}, status=status)
+
+
+async def handle_categorize(request):
+    service = request.app[SERVICE_KEY]
+    try:
+        payload = await request.json()
+    except ValueError:
+        return json_error(400, "Тело запроса должно быть JSON")
+    if not isinstance(payload, dict):
+        return json_error(400, "Ожидается JSON-объект")
+
+    names = payload.get('names')
+    lang = payload.get('lang', 'en')
+    category = payload.get('category', DEFAULT_CATEGORY)
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        return json_error(400, "'names' должен быть списком строк")
+    if len(names) > MAX_BATCH:
+        return json_error(413, f"Не более {MAX_BATCH} названий в одном запросе")
+    if lang not in MODEL_NAMES:
+        return json_error(400, f"Неподдерживаемый язык '{lang}'. Доступны: {', '.join(MODEL_NAMES)}")
+    if not isinstance(category, str) or not CATEGORY_RE.match(category):
+        return json_error(400, "Некорректное имя категории")
+
+    start = time.perf_counter()
+    subcategories = await service.categorize(names, lang, category)
+    if subcategories is None:
+        return json_error(404, f"Нет файла ключевых слов для категории '{category}'")
+    logging.info(f"🏷️ [{category}/{lang}] категоризировано {len(names)} за {time.perf_counter() - start:.2f} сек")
+    return web.json_response({"category": category, "lang": lang, "count": len(names),
+                              "subcategories": subcategories})
+
+
+async def handle_health(request):
+    service = request.app[SERVICE_KEY]
+    return web.json_response({"status": "ok", "models": sorted(NLP_MODELS), "categories": sorted(service.indexes),
+                              **service.stats})
+
+
+def create_app(keywords_dir=KEYWORDS_DIR) -> web.Application:
+    """Приложение aiohttp (отдельной функцией, чтобы его можно было поднять в тестах)."""
+    app = web.Application(client_max_size=16 * 1024 ** 2)
+    app[SERVICE_KEY] = CategorizationService(keywords_dir)
+    app.router.add_post('/categorize', handle_categorize)
+    app.router.add_get('/health', handle_health)
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP-сервис категоризации FinPi Scraper")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--preload", nargs="*", default=[], choices=list(MODEL_NAMES),
+                        help="Языки, модели которых загрузить до приема запросов")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging(SCRIPT_DIR)
+    for lang in args.preload:
+        get_nlp(lang)
+    logging.info(f"🟢 Сервис категоризации: http://{args.host}:{args.port}")
+    web.run_app(create_app(), host=args.host, port=args.port, print=None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# finpi_scraper/tests/test_crawl_history.py
+import sys
+import os
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.crawl_history import FULL_PROBE_EVERY, MAX_BACKOFF, CrawlHistory, plan_crawl
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def make_config(category_name, **extra):
+    return dict({"site_name": "rost", "category_name": category_name, "target_count": 40}, **extra)
+
+
+def run_stats(new, pages=3, deepest=None, limit=None, failed=0):
+    return {"new": new, "pages_fetched": pages, "pages_failed": failed,
+            "deepest_new_page": deepest if deepest is not None else (pages if new else 0), "page_limit": limit}
+
+
+def test_stable_category_backs_off_and_recovers(tmp_path):
+    history = CrawlHistory(str(tmp_path / "history.json"))
+    config = make_config("wine")
+    assert history.is_due(config, 0)
+
+    history.record(config, run_stats(10), at=0)
+    assert history.refresh_interval(config) == DAY
+    for day in range(1, 4):
+        history.record(config, run_stats(0), at=day * DAY)
+    history.record(config, run_stats(0, pages=1, failed=1), at=4 * DAY)  # сбой не удлиняет интервал
+    assert history.refresh_interval(config) == 8 * DAY
+    assert not history.is_due(config, 5 * DAY)
+    assert history.is_due(config, 12 * DAY)
+
+    for day in range(5, 15):
+        history.record(config, run_stats(0), at=day * DAY)
+    assert history.refresh_interval(config) == MAX_BACKOFF * DAY
+
+    history.record(config, run_stats(3, pages=1), at=30 * DAY)
+    assert history.refresh_interval(config) == DAY
+
+
+def test_page_depth_follows_deepest_new_page(tmp_path):
+    history = CrawlHistory(str(tmp_path / "history.json"))
+    config = make_config("whisky")
+    assert history.page_depth(config, 100) is None
+    history.record(config, run_stats(50, pages=8, deepest=4, limit=100))
+    history.record(config, run_stats(5, pages=2, deepest=1, limit=5))
+    assert history.page_depth(config, 100) == 5  # самая глубокая страница с новыми (4) + запас
+    history.record(config, run_stats(30, pages=5, deepest=5, limit=5))
+    assert history.page_depth(config, 100) == 10  # упирались в предел — глубина удваивается
+    assert history.page_depth(config, 8) == 8
+
+
+def test_empty_runs_keep_last_productive_depth_and_reprobe(tmp_path):
+    history = CrawlHistory(str(tmp_path / "history.json"))
+    config = make_config("wine")
+    history.record(config, run_stats(12, pages=6, deepest=6, limit=100))
+    for _ in range(FULL_PROBE_EVERY - 1):
+        history.record(config, run_stats(0, pages=7, limit=7))
+        assert history.page_depth(config, 100) == 7  # не сужается до первой страницы
+    history.record(config, run_stats(0, pages=7, limit=7))
+    assert history.page_depth(config, 100) == 100  # давно не заглядывали глубже — полный обход
+    history.record(config, run_stats(0, pages=9, limit=100))
+    assert history.page_depth(config, 100) == 7
+
+    # Без единого запуска с новыми товарами нижняя граница — оценка по target_count (40 / 24)
+    quiet = make_config("beer")
+    for _ in range(3):
+        history.record(quiet, run_stats(0, pages=1, limit=1))
+    assert history.page_depth(quiet, 100) == 3
+
+
+def test_history_survives_reload(tmp_path):
+    path = str(tmp_path / "history.json")
+    history = CrawlHistory(path)
+    history.record(make_config("wine"), run_stats(2), at=123)
+    history.save()
+    assert CrawlHistory(path).runs(make_config("wine"))[0]["at"] == 123
+
+
+def test_plan_prefers_new_and_churning_categories_within_budget(tmp_path):
+    history = CrawlHistory(str(tmp_path / "history.json"))
+    churning, stable, fresh = make_config("whisky"), make_config("wine"), make_config("beer", page_size=20)
+    history.record(churning, run_stats(60, pages=4, limit=100), at=0)
+    history.record(stable, run_stats(1, pages=4, limit=100), at=0)
+
+    plan = plan_crawl([stable, churning, fresh], history, 100, page_budget=6, now=DAY)
+    # beer: без истории, 40 / 20 = 2 страницы; whisky: 4 + 1 страница; wine не влезла в бюджет
+    assert plan == {"rost:beer": 2, "rost:whisky": 4}
+
+    history.record(stable, run_stats(0), at=DAY)
+    plan = plan_crawl([stable, churning, fresh], history, 100, now=2 * DAY)
+    assert "rost:wine" not in plan  # после пустого запуска интервал вырос до 2 суток
+    assert plan["rost:beer"] == 100  # без бюджета категория без истории идет как раньше
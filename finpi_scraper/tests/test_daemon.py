@@ -0,0 +1,105 @@
+# finpi_scraper/tests/test_daemon.py
+import asyncio
+import json
+import sys
+import os
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать daemon
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import daemon
+from daemon import ScraperDaemon, group_interval_seconds
+from utils import product_io
+
+
+def write_config(path, configs):
+    path.write_text(json.dumps(configs, ensure_ascii=False), encoding='utf-8')
+
+
+def make_config(site_name, category_name, **extra):
+    return dict({"site_name": site_name, "category_name": category_name, "group": "alcohol",
+                 "category_path": "GOODS/TEST", "enabled": True}, **extra)
+
+
+def test_group_interval_is_smallest_in_group():
+    configs = [make_config("rost", "a", refresh_interval_minutes=30), make_config("rost", "b")]
+    assert group_interval_seconds(configs) == 30 * 60
+
+
+def test_reload_adds_and_drops_groups(tmp_path):
+    config_path = tmp_path / "config.json"
+    write_config(config_path, [make_config("rost", "a")])
+    scraper_daemon = ScraperDaemon(state_path=str(tmp_path / "state.json"), config_path=str(config_path))
+    assert scraper_daemon.reload_config_if_changed()
+    assert list(scraper_daemon.groups) == [("rost", "alcohol")]
+    assert not scraper_daemon.reload_config_if_changed()  # файл не менялся
+
+    scraper_daemon.known_products[("rost", "alcohol")] = {"Віскі"}
+    write_config(config_path, [make_config("tesco", "a")])
+    os.utime(config_path, ns=(0, 1))  # гарантированно другой mtime
+    assert scraper_daemon.reload_config_if_changed()
+    assert list(scraper_daemon.groups) == [("tesco", "alcohol")]
+    assert ("rost", "alcohol") not in scraper_daemon.known_products
+
+
+def test_scheduler_reuses_warm_state_and_saves_schedule(tmp_path, monkeypatch):
+    config_path = tmp_path / "config.json"
+    state_path = tmp_path / "state.json"
+    write_config(config_path, [make_config("rost", "a", refresh_interval_minutes=0.001)])
+    loads, runs = [], []
+
+    async def fake_load_known_products(configs):
+        loads.append(configs[0]['site_name'])
+        return {"Віскі Jameson"}
+
+    async def fake_process_config_group(key, configs, products):
+        runs.append(products)
+        products.add(f"Товар {len(runs)}")
+        if len(runs) == 3:
+            scraper_daemon.request_stop()
+
+    async def fake_create_category_folders(category_path):
+        return str(tmp_path)
+
+    monkeypatch.setattr(daemon, "load_known_products", fake_load_known_products)
+    monkeypatch.setattr(daemon, "process_config_group", fake_process_config_group)
+    monkeypatch.setattr(daemon, "create_category_folders", fake_create_category_folders)
+    monkeypatch.setattr(daemon, "clean_output_files", lambda files: None)
+
+    scraper_daemon = ScraperDaemon(state_path=str(state_path), config_path=str(config_path))
+    asyncio.run(asyncio.wait_for(scraper_daemon.run(), timeout=10))
+
+    assert len(runs) == 3 and loads == ["rost"]  # с диска — только при первом запуске
+    assert all(products is runs[0] for products in runs) and len(runs[0]) == 4
+    state = json.loads(state_path.read_text(encoding='utf-8'))
+    assert state["groups"]["rost_alcohol"]["last_run"] is not None
+
+    # Сохраненное расписание переживает перезапуск
+    restarted = ScraperDaemon(state_path=str(state_path), config_path=str(config_path))
+    restarted.reload_config_if_changed()
+    assert restarted.next_run[("rost", "alcohol")] == state["groups"]["rost_alcohol"]["next_run"]
+
+
+def test_save_state_fsyncs_before_replace(tmp_path, monkeypatch):
+    config_path = tmp_path / "config.json"
+    write_config(config_path, [make_config("rost", "a")])
+    state_path = tmp_path / "state.json"
+    scraper_daemon = ScraperDaemon(state_path=str(state_path), config_path=str(config_path))
+    scraper_daemon.reload_config_if_changed()
+    calls = []
+    fsync, replace = os.fsync, product_io._replace
+
+    def recording_fsync(fd):
+        calls.append("fsync")
+        fsync(fd)
+
+    def recording_replace(temp_path, file_path):
+        calls.append("replace")
+        replace(temp_path, file_path)
+
+    monkeypatch.setattr(product_io.os, "fsync", recording_fsync)
+    monkeypatch.setattr(product_io, "_replace", recording_replace)
+    scraper_daemon.save_state()
+    assert calls == ["fsync", "replace"]
+    assert "rost_alcohol" in json.loads(state_path.read_text(encoding='utf-8'))["groups"]
+    assert sorted(os.listdir(tmp_path)) == ["config.json", "state.json"]  # временный файл не остался
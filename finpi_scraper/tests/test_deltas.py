@@ -0,0 +1,126 @@
+# finpi_scraper/tests/test_deltas.py
+import asyncio
+import sys
+import os
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать utils и main
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import main
+from utils import deltas
+from utils.product_io import iter_products, write_products
+
+KEYWORDS = {"wine": ["вино"], "rum": ["ром"], "beer": ["пиво"]}
+CONFIG = {"site_name": "shop", "category_name": "a", "group": "alcohol", "category_path": "X",
+          "target_count": 10, "track_removals": True}
+
+
+def run_group(tmp_path, monkeypatch, found, run_id, complete=True):
+    """Прогон группы с "сайтом", на котором сейчас товары found."""
+    async def output_folder(category_path):
+        os.makedirs(tmp_path / category_path, exist_ok=True)
+        return str(tmp_path / category_path)
+
+    async def keywords(keywords_file):
+        return KEYWORDS
+
+    async def fake_parse(site_config, known, page_limit=None, stats=None):
+        stats.update(seen=set(found), complete=complete)
+        return [name for name in found if name not in known]
+
+    monkeypatch.setattr(main, "create_category_folders", output_folder)
+    monkeypatch.setattr(main, "load_external_keywords", keywords)
+    monkeypatch.setattr(main, "parse_site_with_pagination", fake_parse)
+    deltas.start_run(str(tmp_path), run_id)
+    asyncio.run(main.process_config_group(("shop", "alcohol"), [dict(CONFIG)]))
+    manifest = deltas.finish_run()
+    main.clean_output_files([str(path) for path in (tmp_path / "X").glob("*.txt")])
+    return manifest
+
+
+def current_files(tmp_path):
+    return {
+        os.path.relpath(path, tmp_path): set(iter_products(path))
+        for path in (tmp_path / "X").glob("*.txt")
+    }
+
+
+def test_runs_record_additions_removals_and_replay_to_output(tmp_path, monkeypatch):
+    first = run_group(tmp_path, monkeypatch, ["Вино Shabo (арт. 1)", "Ром Bacardi"], "1")
+    assert first["files"] == {os.path.join("X", "shop_alcohol_wine.txt"): {"added": 1, "removed": 0},
+                              os.path.join("X", "shop_alcohol_rum.txt"): {"added": 1, "removed": 0}}
+
+    # Ром исчез с сайта при полном обходе, появилось пиво
+    second = run_group(tmp_path, monkeypatch, ["Вино Shabo (арт. 1)", "Пиво Obolon"], "2")
+    assert second["files"] == {os.path.join("X", "shop_alcohol_rum.txt"): {"added": 0, "removed": 1},
+                               os.path.join("X", "shop_alcohol_beer.txt"): {"added": 1, "removed": 0}}
+    rum_delta = tmp_path / "deltas" / "2" / "X" / "shop_alcohol_rum.jsonl"
+    assert list(deltas.iter_delta(str(rum_delta))) == [("remove", "Ром Bacardi")]
+
+    # Неполный обход ничего не удаляет
+    third = run_group(tmp_path, monkeypatch, ["Пиво Obolon"], "3", complete=False)
+    assert third["files"] == {}
+
+    snapshot = {relative: set(products) for relative, products in deltas.replay(str(tmp_path)).items()}
+    assert snapshot == current_files(tmp_path)
+    assert snapshot[os.path.join("X", "shop_alcohol_wine.txt")] == {"Вино Shabo"}
+    assert deltas.replay(str(tmp_path), until="1")[os.path.join("X", "shop_alcohol_rum.txt")] == {"Ром Bacardi": None}
+
+
+def test_skipped_config_does_not_remove_its_products(tmp_path, monkeypatch):
+    listings = {"a": ["Вино Shabo"], "b": ["Ром Bacardi"]}
+    configs = [dict(CONFIG), dict(CONFIG, category_name="b")]
+
+    async def output_folder(category_path):
+        os.makedirs(tmp_path / category_path, exist_ok=True)
+        return str(tmp_path / category_path)
+
+    async def keywords(keywords_file):
+        return KEYWORDS
+
+    async def fake_parse(site_config, known, page_limit=None, stats=None):
+        found = listings[site_config['category_name']]
+        stats.update(seen=set(found), complete=True)
+        return [name for name in found if name not in known]
+
+    monkeypatch.setattr(main, "create_category_folders", output_folder)
+    monkeypatch.setattr(main, "load_external_keywords", keywords)
+    monkeypatch.setattr(main, "parse_site_with_pagination", fake_parse)
+    asyncio.run(main.process_config_group(("shop", "alcohol"), configs))
+
+    # Категория "b" не запланирована: ее ром не увиден, но с сайта не пропал
+    deltas.start_run(str(tmp_path), "2")
+    asyncio.run(main.process_config_group(("shop", "alcohol"), configs[:1], group_configs=configs))
+    assert deltas.finish_run()["files"] == {}
+    assert set(iter_products(tmp_path / "X" / "shop_alcohol_rum.txt")) == {"Ром Bacardi"}
+
+
+def test_recategorized_product_moves_between_files(tmp_path):
+    path = tmp_path / "X" / "shop_alcohol_other.txt"
+    os.makedirs(path.parent)
+    write_products(str(path), ["Вино Shabo", "Сидр"])
+    writer = deltas.start_run(str(tmp_path), "7")
+    deltas.record_file_change(str(path), ["Сидр (0.5)"])
+    deltas.record_file_change(str(tmp_path / "X" / "shop_alcohol_wine.txt"), ["Вино Shabo"])
+    deltas.finish_run()
+
+    assert writer.files == {os.path.join("X", "shop_alcohol_other.txt"): {"added": 0, "removed": 1},
+                            os.path.join("X", "shop_alcohol_wine.txt"): {"added": 1, "removed": 0}}
+    assert deltas.active_run() is None
+
+
+def test_compact_folds_old_runs_into_base(tmp_path):
+    target = str(tmp_path / "X" / "shop_alcohol_wine.txt")
+    for run_id, added, removed in (("a", ["Вино 1", "Вино 2"], []), ("b", ["Вино 3"], ["Вино 1"]), ("c", ["Вино 4"], [])):
+        writer = deltas.DeltaWriter(str(tmp_path), run_id)
+        writer.record(target, added, removed)
+        writer.write_manifest()
+    before = deltas.replay(str(tmp_path))
+
+    assert deltas.compact(str(tmp_path), keep=1) == 2
+    assert [run["run_id"] for run in deltas.list_runs(str(tmp_path))] == ["base", "c"]
+    assert deltas.replay(str(tmp_path)) == before
+    assert deltas.compact(str(tmp_path), keep=1) == 0
+
+    assert deltas.materialize(str(tmp_path / "snapshot"), str(tmp_path)) == 1
+    assert list(iter_products(tmp_path / "snapshot" / "X" / "shop_alcohol_wine.txt")) == ["Вино 2", "Вино 3", "Вино 4"]
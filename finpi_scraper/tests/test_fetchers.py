@@ -0,0 +1,130 @@
+# finpi_scraper/tests/test_fetchers.py
+import asyncio
+import sys
+import os
+
+import pytest
+from aiohttp import web
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать fetchers
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fetchers import PlaywrightFetcher, ScraperAPIFetcher, close_browser_pool, get_fetcher
+from fetchers import playwright_fetcher
+from scrapers import get_scraper
+
+ROST_CONFIG = {
+    "site_name": "rost",
+    "category_name": "alcohol",
+    "url": "https://rostmarket.com.ua/alkogol/",
+    "product_name_selector": ".product-item-link",
+    "pagination_template": "?p={page}",
+    "needs_scrolling": True,
+    "js_rendering": True,
+}
+
+# Листинг, который дорисовывает карточки через JS и подгружает еще при прокрутке
+LAZY_LISTING = """<!DOCTYPE html>
+<html><head><link rel="stylesheet" href="/style.css"></head>
+<body style="margin:0"><div id="list"></div><div style="height:3000px"></div>
+<img src="/banner.png">
+<script>
+  let loaded = 0;
+  function addBatch() {
+    const list = document.getElementById('list');
+    for (let i = 0; i < 5; i++) {
+      loaded += 1;
+      const a = document.createElement('a');
+      a.className = 'product-item-link';
+      a.textContent = 'Товар ' + loaded;
+      list.appendChild(a);
+    }
+  }
+  setTimeout(addBatch, 300);
+  window.addEventListener('scroll', () => { if (loaded < 15) setTimeout(addBatch, 100); });
+</script></body></html>"""
+
+
+def test_get_fetcher_selects_backend():
+    assert isinstance(get_fetcher(ROST_CONFIG), ScraperAPIFetcher)
+    assert isinstance(get_fetcher(dict(ROST_CONFIG, fetch_backend="playwright")), PlaywrightFetcher)
+    with pytest.raises(ValueError):
+        get_fetcher(dict(ROST_CONFIG, fetch_backend="curl"))
+
+
+def test_scraperapi_fetcher_against_mock(monkeypatch):
+    from benchmarks.mock_scraperapi import run_mock_server
+
+    async def scenario():
+        async with run_mock_server(products_per_page=7) as (url, mock):
+            monkeypatch.setenv("SCRAPERAPI_KEY", "test")
+            monkeypatch.setenv("SCRAPERAPI_ENDPOINT", url)
+            scraper = get_scraper(ROST_CONFIG)
+            async with get_fetcher(ROST_CONFIG) as fetcher:
+                html = await fetcher.fetch(scraper.get_page_url(2), 2)
+            return scraper.parse(html), mock.stats
+
+    products, stats = asyncio.run(scenario())
+    assert len(products) == 7
+    assert stats["requests"] == 1
+
+
+def test_playwright_fetcher_waits_and_scrolls():
+    pytest.importorskip("playwright")
+    requested = []
+
+    async def listing(request):
+        requested.append(request.path)
+        return web.Response(text=LAZY_LISTING, content_type="text/html")
+
+    async def asset(request):
+        requested.append(request.path)
+        return web.Response(body=b"", content_type="application/octet-stream")
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/", listing)
+        app.router.add_get("/{name}", asset)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        config = dict(ROST_CONFIG, fetch_backend="playwright", render_timeout_ms=5000, scroll_wait_ms=1000)
+        try:
+            async with get_fetcher(config) as fetcher:
+                return await fetcher.fetch(f"http://127.0.0.1:{port}/", 1)
+        finally:
+            await close_browser_pool()
+            await runner.cleanup()
+
+    try:
+        html = asyncio.run(scenario())
+    except Exception as e:
+        if "Executable doesn't exist" in str(e):
+            pytest.skip("Chromium для Playwright не установлен")
+        raise
+
+    products = get_scraper(ROST_CONFIG).parse(html)
+    assert len(products) == 15  # 5 после отрисовки + 10 после прокрутки
+    assert requested == ["/"]  # стили и картинки заблокированы
+
+
+def test_browser_pool_lock_works_across_event_loops(monkeypatch):
+    async def start(self):
+        await asyncio.sleep(0)  # конкурирующие вызовы ждут на блокировке
+
+    async def close(self):
+        pass
+
+    monkeypatch.setattr(playwright_fetcher.BrowserPool, "start", start)
+    monkeypatch.setattr(playwright_fetcher.BrowserPool, "close", close)
+
+    async def scenario():
+        pools = await asyncio.gather(*(playwright_fetcher.get_browser_pool() for _ in range(3)))
+        await close_browser_pool()
+        return len({id(pool) for pool in pools})
+
+    # Каждый asyncio.run — новый цикл событий
+    assert asyncio.run(scenario()) == 1
+    assert asyncio.run(scenario()) == 1
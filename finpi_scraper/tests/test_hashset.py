@@ -0,0 +1,111 @@
+# finpi_scraper/tests/test_hashset.py
+import asyncio
+import sys
+import os
+
+import pytest
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать utils и main
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import distributed
+import main
+from utils import deltas
+from utils.hashset import ProductHashSet, seen_path
+from utils.product_io import iter_products
+from utils.work_queue import WorkQueue
+
+
+def test_membership_uses_normalized_names_and_grows():
+    seen = ProductHashSet()
+    assert seen.add("Віскі Jameson 0.7л")
+    assert not seen.add("віскі  JAMESON 0.7л")  # тот же нормализованный ключ
+    assert "ВІСКІ JAMESON 0.7Л" in seen and "Віскі Bushmills" not in seen
+
+    names = [f"Товар {i}" for i in range(5000)]  # больше начальной емкости
+    assert seen.update(names) == 5000
+    assert len(seen) == 5001 and all(name in seen for name in names)
+    assert seen.memory_bytes() / len(seen) < 32
+
+
+def test_save_and_mmap_load(tmp_path):
+    path = str(tmp_path / "shop_alcohol.seen")
+    seen = ProductHashSet(bloom_bits=0)
+    seen.update(["Ром Bacardi", "Пиво Obolon"])
+    seen.save(path)
+
+    loaded = ProductHashSet.load(path)
+    assert len(loaded) == 2 and "ром bacardi" in loaded and "Вино" not in loaded
+    loaded.add("Вино")  # изменения не попадают в файл до save()
+    assert "Вино" not in ProductHashSet.load(path)
+    loaded.save(path)
+    assert "Вино" in ProductHashSet.load(path)
+
+    (tmp_path / "broken.seen").write_bytes(b"not a hash set")
+    with pytest.raises(ValueError):
+        ProductHashSet.load(str(tmp_path / "broken.seen"))
+
+
+def test_compact_group_appends_only_new_products(tmp_path, monkeypatch):
+    (tmp_path / "shop_alcohol_alcohol.txt").write_text("Ром Bacardi\nПиво Obolon\n", encoding='utf-8')
+    config = {"site_name": "shop", "category_name": "a", "group": "alcohol", "category_path": "X",
+              "compact_dedup": True, "target_count": 10}
+
+    async def output_folder(category_path):
+        return str(tmp_path)
+
+    async def fake_parse(site_config, known, page_limit=None, stats=None):
+        return [name for name in ("ром BACARDI", "Вино Shabo") if name not in known]
+
+    monkeypatch.setattr(main, "create_category_folders", output_folder)
+    monkeypatch.setattr(main, "parse_site_with_pagination", fake_parse)
+    new_products = asyncio.run(main.process_config_group(("shop", "alcohol"), [config]))
+
+    assert new_products == ["Вино Shabo"]
+    assert list(iter_products(tmp_path / "shop_alcohol_alcohol.txt")) == ["Ром Bacardi", "Пиво Obolon", "Вино Shabo"]
+    seen = ProductHashSet.load(seen_path(str(tmp_path), "shop", "alcohol"))
+    assert len(seen) == 3 and "Вино Shabo" in seen
+
+
+def test_compact_plan_seeds_hashes_instead_of_names(tmp_path, monkeypatch):
+    seen = ProductHashSet()
+    seen.update(["Ром Bacardi", "Пиво Obolon"])
+    seen.save(seen_path(str(tmp_path), "shop", "alcohol"))
+    config = {"site_name": "shop", "category_name": "a", "group": "alcohol", "category_path": "X",
+              "compact_dedup": True, "target_count": 10}
+
+    async def output_folder(category_path):
+        return str(tmp_path)
+
+    async def no_text_files(*args):
+        raise AssertionError("compact_dedup не должен читать текстовые файлы группы")
+
+    monkeypatch.setattr(main, "create_category_folders", output_folder)
+    monkeypatch.setattr(main, "load_group_products", no_text_files)
+    monkeypatch.setattr(distributed, "load_grouped_configs", lambda site=None: {("shop", "alcohol"): [config]})
+    with WorkQueue(str(tmp_path / "queue.db")) as queue:
+        assert asyncio.run(distributed.plan(queue)) == 1
+        assert queue.conn.execute("SELECT COUNT(*) AS n FROM known_products").fetchone()["n"] == 0
+        assert queue.filter_new("shop", "alcohol", ["ром BACARDI", "Вино Shabo"]) == ["Вино Shabo"]
+
+
+def test_compact_merge_appends_only_new_products(tmp_path, monkeypatch):
+    (tmp_path / "shop_alcohol_alcohol.txt").write_text("Ром Bacardi\nПиво Obolon\n", encoding='utf-8')
+    config = {"site_name": "shop", "category_name": "a", "group": "alcohol", "category_path": "X",
+              "compact_dedup": True, "target_count": 10}
+
+    async def output_folder(category_path):
+        return str(tmp_path)
+
+    start_run = deltas.start_run
+    monkeypatch.setattr(deltas, "start_run", lambda: start_run(str(tmp_path), "1"))
+    monkeypatch.setattr(main, "create_category_folders", output_folder)
+    monkeypatch.setattr(distributed, "create_category_folders", output_folder)
+    with WorkQueue(str(tmp_path / "queue.db")) as queue:
+        queue.enqueue(config, 1, 1)
+        queue.complete(queue.claim("w1")["id"], [("ром BACARDI", 1), ("Вино Shabo", 1)])
+        assert asyncio.run(distributed.merge(queue)) == {"shop_alcohol": 1}
+
+    assert list(iter_products(tmp_path / "shop_alcohol_alcohol.txt")) == ["Ром Bacardi", "Пиво Obolon", "Вино Shabo"]
+    seen = ProductHashSet.load(seen_path(str(tmp_path), "shop", "alcohol"))
+    assert len(seen) == 3 and "Вино Shabo" in seen
@@ -0,0 +1,93 @@
+# finpi_scraper/tests/test_hedging.py
+import asyncio
+import sys
+import os
+
+import pytest
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать fetchers
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fetchers import hedging
+from fetchers.hedging import HedgePolicy, LatencyTracker
+
+
+def warmed_policy(latency=0.01, budget=1.0):
+    policy = HedgePolicy(percentile=90, budget=budget)
+    for _ in range(hedging.MIN_SAMPLES):
+        policy.tracker.record(latency)
+    return policy
+
+
+def make_requests(delays, errors=()):
+    """Фабрика попыток: i-я попытка спит delays[i] и возвращает i (или падает, если i в errors)."""
+    calls, cancelled = [], []
+
+    async def make_request():
+        index = len(calls)
+        calls.append(index)
+        try:
+            await asyncio.sleep(delays[index])
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+        if index in errors:
+            raise ConnectionError(f"attempt {index}")
+        return index
+
+    return make_request, calls, cancelled
+
+
+def test_percentile_needs_min_samples():
+    tracker = LatencyTracker(min_samples=3)
+    tracker.record(1.0)
+    tracker.record(2.0)
+    assert tracker.percentile(90) is None
+    tracker.record(10.0)
+    assert tracker.percentile(50) == 2.0
+    assert tracker.percentile(90) == 10.0
+
+
+def test_slow_request_is_hedged_and_loser_cancelled(monkeypatch):
+    monkeypatch.setattr(hedging, "MIN_HEDGE_DELAY", 0.01)
+    policy = warmed_policy()
+    make_request, calls, cancelled = make_requests([5.0, 0.01])
+
+    async def scenario():
+        result = await policy.run(make_request)
+        await asyncio.sleep(0)  # даем отмене дойти до проигравшей попытки
+        return result
+
+    assert asyncio.run(scenario()) == 1
+    assert calls == [0, 1] and cancelled == [0]
+    assert policy.stats == {"primary": 1, "hedged": 1, "hedge_wins": 1}
+
+
+def test_budget_caps_extra_requests(monkeypatch):
+    monkeypatch.setattr(hedging, "MIN_HEDGE_DELAY", 0.01)
+    policy = warmed_policy(budget=0.0)
+    make_request, calls, _ = make_requests([0.05])
+    assert asyncio.run(policy.run(make_request)) == 0
+    assert calls == [0] and policy.stats["hedged"] == 0
+
+
+def test_failed_hedge_waits_for_primary(monkeypatch):
+    monkeypatch.setattr(hedging, "MIN_HEDGE_DELAY", 0.01)
+    policy = warmed_policy()
+    make_request, _, _ = make_requests([0.1, 0.0], errors={1})
+    assert asyncio.run(policy.run(make_request)) == 0
+
+
+def test_primary_error_raised_when_all_attempts_fail(monkeypatch):
+    monkeypatch.setattr(hedging, "MIN_HEDGE_DELAY", 0.01)
+    policy = warmed_policy()
+    make_request, _, _ = make_requests([0.05, 0.0], errors={0, 1})
+    with pytest.raises(ConnectionError, match="attempt 0"):
+        asyncio.run(policy.run(make_request))
+
+
+def test_policy_only_when_enabled():
+    hedging._policies.clear()
+    assert hedging.get_hedge_policy({"site_name": "rost"}) is None
+    policy = hedging.get_hedge_policy({"site_name": "rost", "hedge_requests": True})
+    assert hedging.get_hedge_policy({"site_name": "rost", "hedge_requests": True}) is policy
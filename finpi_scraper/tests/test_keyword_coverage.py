@@ -0,0 +1,70 @@
+# finpi_scraper/tests/test_keyword_coverage.py
+import sys
+import os
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import product_store
+from utils.categorization import categorize_lemmas
+from utils.keyword_coverage import PatternAutomaton, analyze_coverage
+
+KEYWORDS = {
+    "whisky": {"keywords": ["віскі", "jack daniels", "скотч"], "negative_keywords": ["келих"]},
+    "liqueur": {"keywords": ["лікер", "віскі"]},
+    "rum": ["ром"],
+    "other_analysis": {"keywords": ["ігнорується"]},
+}
+
+
+def write_lines(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding='utf-8')
+    return str(path)
+
+
+def test_builtin_automaton_finds_overlapping_patterns():
+    automaton = PatternAutomaton()
+    for word in ("he", "she", "his", "hers"):
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+    assert sorted(automaton.iter("ushers")) == [(3, "he"), (3, "she"), (5, "hers")]
+
+
+def test_coverage_report(tmp_path):
+    files = [
+        write_lines(tmp_path / "a.txt", ["Віскі Jack Daniels", "Лікер на віскі", "Келих для віскі"]),
+        write_lines(tmp_path / "b.txt", ["Ром Bacardi", "Громадський пиріг", "Пиво"]),
+    ]
+    report = analyze_coverage(KEYWORDS, files, match='substring', workers=1)
+    assert report["match"] == "substring" and "note" in report
+    assert report["products"] == 6 and report["unmatched"] == 1
+    assert report["hits"]["whisky"] == {"віскі": 3, "jack daniels": 1, "скотч": 0}
+    assert report["dead"] == {"whisky": ["скотч"]}
+    assert report["vetoes"]["whisky"] == {"келих": 1}
+    assert report["categories"]["whisky"] == {"matched": 3, "vetoed": 1}
+    assert report["categories"]["rum"]["matched"] == 2  # подстрока: "ром" в "Громадський"
+    assert report["conflicts"][0]["categories"] == ["liqueur", "whisky"]
+    assert report["conflicts"][0]["products"] == 2
+    assert "other_analysis" not in report["hits"]
+
+    whole = analyze_coverage(KEYWORDS, files, match='words', workers=1)
+    assert whole["categories"]["rum"]["matched"] == 1
+
+    # Параллельная обработка файлов дает тот же отчет
+    assert analyze_coverage(KEYWORDS, files, match='substring', workers=2) == report
+
+
+def test_lemma_coverage_matches_categorizer(tmp_path):
+    keywords = {"rum": ["ром"], "whisky": {"keywords": ["віскі", "jack daniels"], "negative_keywords": ["келих"]}}
+    path = write_lines(tmp_path / "shop_alcohol_other.txt", ["Рому Bacardi", "Кромка для келиха", "Келих для віскі"])
+    # Леммы словоформ — из хранилища группы, как их записал категоризатор
+    product_store.append_records(product_store.store_path(str(tmp_path), "shop", "alcohol"), [
+        product_store.make_record("Рому Bacardi", "shop", "alcohol", "other", ["ром", "bacardi"]),
+    ])
+    report = analyze_coverage(keywords, [path], workers=1, languages={"shop_alcohol": "xx"})
+    assert report["match"] == "lemmas" and "note" not in report
+    assert report["hits"]["rum"] == {"ром": 1}  # словоформа найдена, "кромка" — нет
+    assert report["vetoes"]["whisky"] == {"келих": 1}
+    assert report["dead"] == {"whisky": ["jack daniels"]}  # фраза не совпадает ни с одной леммой
+    assert categorize_lemmas({"ром", "bacardi"}, keywords) == "rum"
+    assert categorize_lemmas({"кромка", "для", "келиха"}, keywords) == "other"
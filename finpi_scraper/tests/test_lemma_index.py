@@ -0,0 +1,93 @@
+# finpi_scraper/tests/test_lemma_index.py
+import json
+import sys
+import os
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import product_store
+from utils.lemma_index import LemmaIndex, affected_lemmas, apply_keywords
+from utils.product_io import iter_products
+
+LANG = "xx"  # Без модели spaCy: леммы — слова в нижнем регистре
+
+
+def write_lines(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding='utf-8')
+
+
+def test_affected_lemmas_cover_only_the_edit():
+    old = {"whisky": {"keywords": ["віскі", "скотч"]}, "rum": ["ром"], "wine": ["вино"]}
+    new = {"whisky": {"keywords": ["віскі", "бурбон"], "negative_keywords": ["келих"]}, "rum": ["ром"], "wine": ["вино"]}
+    assert affected_lemmas(old, new) == {"скотч", "бурбон", "келих"}
+    # Перестановка подкатегорий меняет победителя для товаров с обоими словами
+    reordered = {"wine": ["вино"], "whisky": {"keywords": ["віскі", "скотч"]}, "rum": ["ром"]}
+    assert affected_lemmas(old, reordered) >= {"вино", "віскі", "скотч"}
+    assert affected_lemmas(old, old) == set()
+
+
+def test_keyword_edit_moves_only_affected_products(tmp_path):
+    output = tmp_path / "output"
+    output.mkdir()
+    write_lines(output / "shop_alcohol_whisky.txt", ["Віскі Jameson", "Віскі келих"])
+    write_lines(output / "shop_alcohol_other.txt", ["Ром Bacardi", "Пиво Obolon"])
+    keywords_file = tmp_path / "alcohol_keywords.json"
+    keywords_file.write_text(json.dumps({"whisky": ["віскі"]}), encoding='utf-8')
+    groups = [("shop", "alcohol", str(output), LANG)]
+
+    with LemmaIndex(str(tmp_path / "index.db")) as index:
+        assert index.sync_group(str(output), "shop", "alcohol", LANG) == (4, 0)
+        assert index.sync_group(str(output), "shop", "alcohol", LANG) == (0, 0)  # файлы не менялись
+        assert apply_keywords(index, str(keywords_file), groups)["affected"] == 0  # исходный снимок
+
+        keywords_file.write_text(json.dumps({
+            "whisky": {"keywords": ["віскі"], "negative_keywords": ["келих"]},
+            "rum": ["ром"],
+        }, ensure_ascii=False), encoding='utf-8')
+        preview = apply_keywords(index, str(keywords_file), groups, dry_run=True)
+        assert preview["affected"] == 2 and preview["moved"] == 2
+        assert list(iter_products(output / "shop_alcohol_other.txt")) == ["Ром Bacardi", "Пиво Obolon"]
+
+        summary = apply_keywords(index, str(keywords_file), groups)
+        assert summary["moves"] == {"whisky → other": 1, "other → rum": 1}
+        assert index.sync_group(str(output), "shop", "alcohol", LANG) == (0, 0)  # индекс уже учел перенос
+        assert apply_keywords(index, str(keywords_file), groups)["affected"] == 0
+
+    assert list(iter_products(output / "shop_alcohol_whisky.txt")) == ["Віскі Jameson"]
+    assert list(iter_products(output / "shop_alcohol_rum.txt")) == ["Ром Bacardi"]
+    assert sorted(iter_products(output / "shop_alcohol_other.txt")) == ["Віскі келих", "Пиво Obolon"]
+
+
+def test_sync_tracks_moved_and_removed_products(tmp_path):
+    write_lines(tmp_path / "shop_alcohol_other.txt", ["Ром Bacardi", "Пиво Obolon"])
+    with LemmaIndex(str(tmp_path / "index.db")) as index:
+        index.sync_group(str(tmp_path), "shop", "alcohol", LANG)
+        write_lines(tmp_path / "shop_alcohol_other.txt", ["Пиво Obolon"])
+        write_lines(tmp_path / "shop_alcohol_rum.txt", ["Ром Bacardi"])
+        assert index.sync_group(str(tmp_path), "shop", "alcohol", LANG) == (1, 0)
+        assert [row[2] for row in index.products_with_lemmas({"ром"}, "shop", "alcohol")] == ["rum"]
+        (tmp_path / "shop_alcohol_rum.txt").unlink()
+        assert index.sync_group(str(tmp_path), "shop", "alcohol", LANG) == (0, 1)
+        assert index.products_with_lemmas({"ром"}, "shop", "alcohol") == []
+
+
+def test_apply_keywords_skips_products_from_dedicated_listings(tmp_path):
+    write_lines(tmp_path / "shop_alcohol_chacha.txt", ["Чача Gold", "Сироп чача"])
+    product_store.append_records(product_store.store_path(str(tmp_path), "shop", "alcohol"), [
+        product_store.make_record("Чача Gold", "shop", "alcohol", "chacha", source="chacha"),
+        product_store.make_record("Сироп чача", "shop", "alcohol", "chacha"),
+    ])
+    keywords_file = tmp_path / "alcohol_keywords.json"
+    keywords_file.write_text(json.dumps({"chacha": ["чача"]}, ensure_ascii=False), encoding='utf-8')
+    groups = [("shop", "alcohol", str(tmp_path), LANG)]
+
+    with LemmaIndex(str(tmp_path / "index.db")) as index:
+        index.sync_group(str(tmp_path), "shop", "alcohol", LANG)
+        apply_keywords(index, str(keywords_file), groups)  # исходный снимок
+        keywords_file.write_text(json.dumps({"chacha": {"keywords": ["чача"], "negative_keywords": ["сироп", "gold"]}},
+                                            ensure_ascii=False), encoding='utf-8')
+        summary = apply_keywords(index, str(keywords_file), groups)
+
+    assert summary["affected"] == 1 and summary["moves"] == {"chacha → other": 1}
+    assert list(iter_products(tmp_path / "shop_alcohol_chacha.txt")) == ["Чача Gold"]
@@ -0,0 +1,59 @@
+# finpi_scraper/tests/test_lemmatizer.py
+import json
+import sys
+import os
+
+import pytest
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import lemmatizer
+from utils.categorization import compile_keywords
+from utils.lemma_agreement import agreement_report
+from utils.lemmatizer import LookupBackend, parse_backend_setting, set_backend, tokenize
+
+
+@pytest.fixture(autouse=True)
+def reset_backends():
+    yield
+    lemmatizer._backends.clear()
+
+
+def test_tokenize_keeps_words_and_numbers():
+    assert tokenize("Віскі JAMESON 0.7л, пʼять-зірок 40%") == ["віскі", "jameson", "0", "7", "л", "пʼять", "зірок", "40"]
+
+
+def test_parse_backend_setting():
+    assert parse_backend_setting("uk=pymorphy, ru = lookup,bad") == {"uk": "pymorphy", "ru": "lookup"}
+    assert parse_backend_setting(None) == {}
+
+
+def test_lookup_backend_uses_table_and_cache(tmp_path):
+    table = tmp_path / "lemma_lookup_uk.json"
+    table.write_text(json.dumps({"віскі": "віскі", "ірландського": "ірландський"}, ensure_ascii=False), encoding='utf-8')
+    backend = LookupBackend("uk", str(table))
+    assert list(backend.lemmatize_batch(["Віскі ірландського 0.7л"])) == [["віскі", "ірландський", "0", "7", "л"]]
+    assert backend.cache["ірландського"] == "ірландський"
+
+    lemmatizer._backends["uk"] = backend
+    assert lemmatizer.lemmatize_text("Ірландського віскі", "uk") == ["ірландський", "віскі"]
+
+
+def test_unavailable_backend_falls_back_to_spacy(monkeypatch, tmp_path):
+    monkeypatch.setattr(lemmatizer, "LOOKUP_DIR", str(tmp_path))
+    assert set_backend("ru", "lookup").name == "spacy"
+    with pytest.raises(ValueError):
+        set_backend("ru", "unknown")
+
+
+def test_agreement_report():
+    keywords = compile_keywords({"whisky": ["віскі"], "cognac": ["коньяк"]})
+    reference = [["віскі", "ірландський"], ["коньяк", "коньяк"], ["вино"]]
+    candidate = [["віскі", "ірландський"], ["коньяк"], ["вина"]]
+    report = agreement_report(reference, candidate, keywords)
+    assert report["exact"] == round(1 / 3, 4)
+    assert report["set"] == round(2 / 3, 4)
+    assert report["tokens"] == round(3 / 5, 4)
+    assert report["category"] == 1.0
+    assert report["missing"] == [("вино", 1)] and report["extra"] == [("вина", 1)]
@@ -0,0 +1,89 @@
+# finpi_scraper/tests/test_log_pipeline.py
+import logging
+import sys
+import os
+import time
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import log_pipeline
+from utils.log_pipeline import LOG_FORMAT, RateLimitFilter, StructuredFormatter
+
+
+def make_record(msg, level=logging.INFO, lineno=10, **extra):
+    record = logging.LogRecord("root", level, "crawler.py", lineno, msg, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_rate_limit_per_message_type(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(log_pipeline.time, "monotonic", lambda: clock[0])
+    limiter = RateLimitFilter(rate=1, burst=2)
+
+    passed = [limiter.filter(make_record(f"стр. {i}", event="page_fetched")) for i in range(5)]
+    assert passed == [True, True, False, False, False]
+    # Другой тип (место вызова) и ошибки без event не ограничиваются общим ведром
+    assert limiter.filter(make_record("сохранено", lineno=20))
+    assert all(limiter.filter(make_record("ошибка", logging.ERROR)) for _ in range(5))
+
+    clock[0] += 1
+    record = make_record("стр. 6", event="page_fetched")
+    assert limiter.filter(record) and record.suppressed == 3
+    assert limiter.suppressed_total() == 0
+    # Результаты запуска (сохраненные файлы, страницы с новыми товарами) не отбрасываются
+    assert all(limiter.filter(make_record("💾 файл", event="file_saved")) for _ in range(10))
+    assert all(limiter.filter(make_record("новых: 3", event="page_parsed")) for _ in range(10))
+
+
+def test_structured_fields_are_appended():
+    formatter = StructuredFormatter(LOG_FORMAT)
+    line = formatter.format(make_record("Стр. 3: загружена", site="rost", page=3, latency_ms=412))
+    assert line.endswith("Стр. 3: загружена | site=rost page=3 latency_ms=412")
+    assert formatter.format(make_record("без полей")).endswith("без полей")
+
+
+class SlowHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        time.sleep(0.02)  # Медленный диск или консоль
+        self.lines.append(self.format(record))
+
+
+def test_logging_from_caller_does_not_wait_for_handlers():
+    handler = SlowHandler()
+    handler.setFormatter(StructuredFormatter(LOG_FORMAT))
+    try:
+        log_pipeline.start_logging([handler], rate=0)
+        start = time.perf_counter()
+        for page in range(20):
+            logging.info(f"Стр. {page}", extra={"site": "rost", "page": page})
+        elapsed = time.perf_counter() - start
+    finally:
+        log_pipeline.stop_logging()
+        logging.getLogger().handlers = []
+
+    assert elapsed < 0.2  # синхронная запись заняла бы 20 × 20 мс
+    assert len(handler.lines) == 20 and handler.lines[-1].endswith("Стр. 19 | site=rost page=19")
+
+
+def test_flush_and_stop_follow_listener_state():
+    handler = SlowHandler()
+    handler.setFormatter(StructuredFormatter(LOG_FORMAT))
+    try:
+        log_pipeline.start_logging([handler], rate=0)
+        logging.info("до сброса")
+        log_pipeline.flush_logging()
+        assert handler.lines[-1].endswith("до сброса")
+        logging.info("после сброса")
+    finally:
+        log_pipeline.stop_logging()
+        logging.getLogger().handlers = []
+
+    assert handler.lines[-1].endswith("после сброса")
+    log_pipeline.flush_logging()  # слушатель уже остановлен — ничего не делает
+    log_pipeline.stop_logging()
@@ -0,0 +1,97 @@
+# finpi_scraper/tests/test_ngram_classifier.py
+import json
+import random
+import sys
+import os
+
+import pytest
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("numpy")
+
+from utils import ngram_classifier
+from utils.ngram_classifier import NgramClassifier, categorize_batch, get_classifier
+from utils.product_io import write_products
+
+KEYWORDS = {"wine": ["вино"], "beer": ["пиво"]}
+BRANDS = ["Shabo", "Koblevo", "Obolon", "Chernihivske", "Inkerman", "Lvivske", "Villa Krim", "Zhyguli"]
+
+
+def synthetic_products(count, seed=0):
+    generator = random.Random(seed)
+    products = {"wine": [], "beer": [], "other": []}
+    for i in range(count):
+        brand, volume = generator.choice(BRANDS), generator.choice(["0.5л", "0.75л", "1л"])
+        products["wine"].append(f"Вино {brand} червоне {volume} #{i}")
+        products["beer"].append(f"Пиво {brand} світле {volume} #{i}")
+        products["other"].append(f"Сік {brand} яблучний {volume} #{i}")
+    return products
+
+
+def test_fit_predict_and_other_is_never_accepted():
+    products = synthetic_products(400)
+    names = [name for sub in products for name in products[sub]]
+    labels = [sub for sub in products for _ in products[sub]]
+    classifier = NgramClassifier(["beer", "other", "wine"], feature_bits=14).fit(names, labels, epochs=3)
+
+    assert classifier.predict(["Вино Shabo біле 0.75л", "Пиво Obolon 0.5л"], threshold=0.5) == ["wine", "beer"]
+    assert classifier.predict(["Сік Shabo яблучний 1л"], threshold=0.5) == [None]
+    assert classifier.predict(["Вино Shabo біле 0.75л"], threshold=1.01) == [None]
+    assert classifier.predict([]) == []
+
+
+def prepare_training_data(tmp_path, monkeypatch):
+    monkeypatch.setattr(ngram_classifier, "BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(ngram_classifier, "KEYWORDS_DIR", str(tmp_path / "keywords"))
+    (tmp_path / "keywords").mkdir()
+    (tmp_path / "keywords" / "drinks.json").write_text(json.dumps(KEYWORDS), encoding='utf-8')
+    config = {"site_name": "shop", "category_name": "a", "group": "drinks", "category_path": "X",
+              "language": "uk", "external_keywords_file": "keywords/drinks.json"}
+    (tmp_path / "config.json").write_text(json.dumps([config]), encoding='utf-8')
+    os.makedirs(tmp_path / "output" / "X")
+    for subcategory, names in synthetic_products(300).items():
+        write_products(str(tmp_path / "output" / "X" / f"shop_drinks_{subcategory}.txt"), names)
+
+
+def test_train_saves_model_bound_to_keywords(tmp_path, monkeypatch):
+    prepare_training_data(tmp_path, monkeypatch)
+    classifier, path, report = ngram_classifier.train("keywords/drinks.json", epochs=3)
+    assert os.path.exists(path) and classifier.labels == ["beer", "other", "wine"]
+    assert report["agreement"] >= ngram_classifier.TARGET_AGREEMENT and report["coverage"] > 0.5
+
+    loaded = get_classifier(dict(KEYWORDS))
+    assert loaded is not None and loaded.threshold == classifier.threshold
+    assert get_classifier(dict(KEYWORDS, beer=["пиво", "ель"])) is None  # ключевые слова изменились
+
+    products = ["Вино Koblevo червоне 1л", "Квас Obolon 1л"]
+    subcategories, lemmas = categorize_batch(products, KEYWORDS, "uk", loaded)
+    assert subcategories == ["wine", "other"]
+    assert list(lemmas) == ["Квас Obolon 1л"]  # уверенный ответ модели не лемматизировался
+
+
+def test_choose_threshold_returns_none_when_target_is_unreachable():
+    import numpy as np
+    probabilities = np.array([[0.995, 0.005], [0.6, 0.4], [0.2, 0.8]])
+    labels = ["beer", "wine"]
+    assert ngram_classifier.choose_threshold(probabilities, labels, ["beer", "wine", "wine"]) == 0.7
+    # Самый уверенный ответ неверен при любом пороге
+    assert ngram_classifier.choose_threshold(probabilities, labels, ["wine", "wine", "wine"]) is None
+
+
+def test_train_does_not_save_model_below_target(tmp_path, monkeypatch):
+    prepare_training_data(tmp_path, monkeypatch)
+    monkeypatch.setattr(ngram_classifier, "choose_threshold", lambda *args, **kwargs: None)
+    classifier, path, report = ngram_classifier.train("keywords/drinks.json", epochs=3)
+    assert classifier is None and path is None and report["names"] > 0
+    assert os.listdir(tmp_path / "keywords") == ["drinks.json"]
+    assert get_classifier(dict(KEYWORDS)) is None
+
+
+def test_train_does_not_save_model_without_held_out(tmp_path, monkeypatch):
+    prepare_training_data(tmp_path, monkeypatch)
+    monkeypatch.setattr(ngram_classifier, "holdout", lambda name: False)
+    assert ngram_classifier.train("keywords/drinks.json", epochs=3) == (None, None, None)
+    assert os.listdir(tmp_path / "keywords") == ["drinks.json"]
+    assert get_classifier(dict(KEYWORDS)) is None
@@ -0,0 +1,118 @@
+# finpi_scraper/tests/test_pagination.py
+import asyncio
+import sys
+import os
+
+import pytest
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать main и scrapers
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import main
+from benchmarks.mock_scraperapi import run_mock_server
+from scrapers import get_scraper
+
+ROST_CONFIG = {
+    "site_name": "rost",
+    "category_name": "alcohol",
+    "url": "https://rostmarket.com.ua/alkogol/",
+    "product_name_selector": ".product-item-link",
+    "pagination_template": "?p={page}",
+    "js_rendering": True,
+    "target_count": 500,
+}
+
+
+@pytest.mark.parametrize("site_name, html, expected", [
+    ("rozetka", '<a class="pagination__link" href="/page=2/">2</a><a class="pagination__link" href="/page=67/"> 67 </a>',
+     {"total_pages": 67}),
+    ("rost", '<p class="toolbar-amount">Товари <span class="toolbar-number">1</span>-'
+             '<span class="toolbar-number">36</span> з <span class="toolbar-number">1 487</span></p>',
+     {"total_products": 1487}),
+    ("rost", '<ul class="pages-items"><li><a class="page" href="?p=2">2</a></li><li><a href="?p=9">9</a></li></ul>',
+     {"total_pages": 9}),
+    ("tesco", "<nav><span>Showing 1 to 24 of 1,204 items</span></nav>", {"total_products": 1204}),
+    ("tesco", "<nav></nav>", None),
+])
+def test_extract_pagination_info(site_name, html, expected):
+    config = dict(ROST_CONFIG, site_name=site_name, url="https://example.com/c123/")
+    assert get_scraper(config).extract_pagination_info(html) == expected
+
+
+def test_total_listing_pages():
+    assert main.total_listing_pages({"total_pages": 4}, 36) == 4
+    assert main.total_listing_pages({"total_products": 73}, 36) == 3
+    assert main.total_listing_pages({"total_products": 73}, 0) is None
+    assert main.total_listing_pages(None, 36) is None
+
+
+def test_crawl_requests_only_existing_pages(monkeypatch):
+    async def scenario():
+        async with run_mock_server(max_pages=5, products_per_page=36) as (url, mock):
+            monkeypatch.setenv("SCRAPERAPI_KEY", "test")
+            monkeypatch.setenv("SCRAPERAPI_ENDPOINT", url)
+            products = await main.parse_site_with_pagination(ROST_CONFIG, set())
+            return products, mock.stats
+
+    products, stats = asyncio.run(scenario())
+    assert len(products) == 5 * 36
+    assert stats["requests"] == 5  # без пустой "пробной" страницы после конца листинга
+
+
+def test_crawl_respects_page_limit_and_fills_stats(monkeypatch):
+    async def scenario():
+        async with run_mock_server(max_pages=5, products_per_page=36) as (url, mock):
+            monkeypatch.setenv("SCRAPERAPI_KEY", "test")
+            monkeypatch.setenv("SCRAPERAPI_ENDPOINT", url)
+            stats = {}
+            products = await main.parse_site_with_pagination(dict(ROST_CONFIG, target_count=1000), set(), 2, stats)
+            return products, stats, mock.stats
+
+    products, stats, server_stats = asyncio.run(scenario())
+    assert len(products) == 2 * 36 and server_stats["requests"] == 2
+    assert stats == {"new": 72, "pages_fetched": 2, "pages_failed": 0, "deepest_new_page": 2, "page_limit": 2}
+
+
+def test_track_removals_crawls_whole_listing(monkeypatch):
+    async def scenario():
+        async with run_mock_server(max_pages=5, products_per_page=36) as (url, mock):
+            monkeypatch.setenv("SCRAPERAPI_KEY", "test")
+            monkeypatch.setenv("SCRAPERAPI_ENDPOINT", url)
+            stats = {}
+            config = dict(ROST_CONFIG, target_count=10, track_removals=True)
+            products = await main.parse_site_with_pagination(config, set(), None, stats)
+            return products, stats, mock.stats
+
+    products, stats, server_stats = asyncio.run(scenario())
+    assert server_stats["requests"] == 5  # target_count не останавливает обход
+    assert stats["complete"] and len(stats["seen"]) == 5 * 36 == len(products)
+
+
+def test_empty_first_page_with_pagination_info_falls_back_to_probing(monkeypatch):
+    pages = {1: [], 2: ["Віскі Jameson", "Ром Bacardi"], 3: []}
+
+    class FakeScraper:
+        def get_source_url(self, page):
+            return page
+
+        def parse(self, content):
+            return pages[content]
+
+        def extract_pagination_info(self, content):
+            return {"total_pages": 3, "total_products": 70}
+
+    class FakeFetcher:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def fetch(self, url, page):
+            return pages.get(url) is not None and url
+
+    monkeypatch.setattr(main, "get_scraper", lambda config: FakeScraper())
+    monkeypatch.setattr(main, "get_fetcher", lambda config: FakeFetcher())
+    monkeypatch.setattr(main, "BATCH_DELAY", 0)
+    products = asyncio.run(main.parse_site_with_pagination(dict(ROST_CONFIG, target_count=10), set()))
+    assert sorted(products) == ["Віскі Jameson", "Ром Bacardi"]
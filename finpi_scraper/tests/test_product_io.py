@@ -0,0 +1,74 @@
+# finpi_scraper/tests/test_product_io.py
+import asyncio
+import sys
+import os
+import pytest
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import product_io
+from utils.product_io import append_products, atomic_write, iter_batches, iter_products, rewrite_products, write_products
+from utils.clean_products import clean_file
+
+
+def test_iter_products_skips_blank_lines(tmp_path):
+    path = tmp_path / "products.txt"
+    path.write_text("Віскі A\n\n  Ром B  \n   \n", encoding="utf-8")
+    assert list(iter_products(str(path))) == ["Віскі A", "Ром B"]
+
+
+def test_iter_batches():
+    assert list(iter_batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(iter_batches([], 2)) == []
+
+
+def test_append_products_appends_in_place(tmp_path):
+    path = tmp_path / "products.txt"
+    path.write_text("Віскі A", encoding="utf-8")  # без перевода строки в конце
+    inode = os.stat(path).st_ino
+    assert append_products(str(path), ["Ром B", "Джин C"]) == 2
+    assert list(iter_products(str(path))) == ["Віскі A", "Ром B", "Джин C"]
+    assert os.stat(path).st_ino == inode  # файл не пересоздавался
+    assert append_products(str(tmp_path / "new.txt"), ["Вино D"]) == 1
+
+
+def test_atomic_write_keeps_original_on_error(tmp_path):
+    path = tmp_path / "products.txt"
+    write_products(str(path), ["Віскі A"])
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path)) as f:
+            f.write("наполовину записано\n")
+            raise RuntimeError("сбой")
+    assert path.read_text(encoding="utf-8") == "Віскі A\n"
+    assert os.listdir(tmp_path) == ["products.txt"]  # временный файл удален
+
+
+def test_rewrite_products_and_clean_file(tmp_path):
+    path = tmp_path / "products.txt"
+    path.write_text("Віскі (123) A\n\n(артикул)\nРом B\n", encoding="utf-8")
+    assert clean_file(str(path))
+    assert path.read_text(encoding="utf-8") == "Віскі A\nРом B\n"
+    assert rewrite_products(str(path), str.upper) == (2, 2)
+
+
+def test_write_products_async_fsyncs_before_replace(tmp_path, monkeypatch):
+    path = tmp_path / "products.txt"
+    path.write_text("Старий\n", encoding="utf-8")
+    calls = []
+    fsync, replace = os.fsync, product_io._replace
+
+    def recording_fsync(fd):
+        calls.append("fsync")
+        fsync(fd)
+
+    def recording_replace(temp_path, file_path):
+        # К моменту замены временный файл уже записан целиком
+        calls.append(("replace", open(temp_path, encoding="utf-8").read()))
+        replace(temp_path, file_path)
+
+    monkeypatch.setattr(product_io.os, "fsync", recording_fsync)
+    monkeypatch.setattr(product_io, "_replace", recording_replace)
+    assert asyncio.run(product_io.write_products_async(str(path), ["Віскі A", "Ром B"])) == 2
+    assert calls == ["fsync", ("replace", "Віскі A\nРом B\n")]
+    assert list(iter_products(str(path))) == ["Віскі A", "Ром B"]
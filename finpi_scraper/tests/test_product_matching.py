@@ -0,0 +1,54 @@
+# finpi_scraper/tests/test_product_matching.py
+import sys
+import os
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.product_io import write_products
+from utils.product_matching import ProductMatcher, parse_volume, sync
+
+ROZETKA = ["Віскі Jameson 0.7л", "Віскі Jameson Black Barrel 0.7л", "Віскі Chivas Regal 12 років 0.7 л",
+           "Віскі Chivas Regal 18 років 0.7 л", "Віскі Jameson 1л"]
+TESCO = ["Jameson Irish Whiskey 70cl", "Chivas Regal 18 Year Old Blended Scotch Whisky 70cl",
+         "Jameson Black Barrel Irish Whiskey 70cl", "Monkey Shoulder Blended Malt Whisky 70cl"]
+# Остальной ассортимент: у каждого сайта свои бренды, как в реальных каталогах
+FILLER = ["Aberlour", "Balvenie", "Bowmore", "Bushmills", "Dalmore", "Glenfiddich", "Glenlivet", "Highland",
+          "Johnnie", "Lagavulin", "Laphroaig", "Macallan", "Oban", "Talisker", "Teeling", "Tullamore"]
+
+
+def test_parse_volume():
+    assert parse_volume("Віскі Jameson 0,7 л") == parse_volume("Jameson 70cl") == parse_volume("Jameson 700ml") == "700"
+    assert parse_volume("Пиво Obolon 4х0.5л") == "4x500"
+    assert parse_volume("Jameson Irish Whiskey") == "?"
+
+
+def test_sync_matches_across_sites_incrementally(tmp_path):
+    output = tmp_path / "output"
+    output.mkdir()
+    write_products(str(output / "rozetka_alcohol_whisky.txt"), ROZETKA + [f"Віскі {b} 0.7л" for b in FILLER[:8]])
+    write_products(str(output / "tesco_alcohol_whisky.txt"), TESCO + [f"{b} Scotch Whisky 70cl" for b in FILLER[8:]])
+    groups = [("rozetka", "alcohol", str(output), "uk"), ("tesco", "alcohol", str(output), "en")]
+
+    with ProductMatcher(str(tmp_path / "matching.db")) as matcher:
+        assert sync(matcher, groups) == {"added": 25, "removed": 0, "matched": 3}
+        rozetka, tesco = matcher.product_ids("rozetka", "alcohol"), matcher.product_ids("tesco", "alcohol")
+        assert tesco["Jameson Irish Whiskey 70cl"] == rozetka["Віскі Jameson 0.7л"]
+        assert tesco["Jameson Black Barrel Irish Whiskey 70cl"] == rozetka["Віскі Jameson Black Barrel 0.7л"]
+        assert tesco["Chivas Regal 18 Year Old Blended Scotch Whisky 70cl"] == rozetka["Віскі Chivas Regal 18 років 0.7 л"]
+        assert tesco["Monkey Shoulder Blended Malt Whisky 70cl"] not in rozetka.values()
+        assert rozetka["Віскі Jameson 1л"] not in tesco.values()  # другой объем
+
+        # Неизмененные файлы не перечитываются, выданные ID не меняются
+        assert sync(matcher, groups) == {"added": 0, "removed": 0, "matched": 0}
+        write_products(str(output / "rost_alcohol_whisky.txt"),
+                       ["Віскі Monkey Shoulder 0.7л", "Віскі Jameson 0.7 л"] + [f"Віскі {b} 0,7 л" for b in FILLER[:8]])
+        summary = sync(matcher, groups + [("rost", "alcohol", str(output), "uk")])
+        assert summary == {"added": 10, "removed": 0, "matched": 10}
+        rost = matcher.product_ids("rost", "alcohol")
+        assert rost["Віскі Jameson 0.7 л"] == rozetka["Віскі Jameson 0.7л"] == matcher.product_ids("rozetka", "alcohol")["Віскі Jameson 0.7л"]
+        assert rost["Віскі Monkey Shoulder 0.7л"] == tesco["Monkey Shoulder Blended Malt Whisky 70cl"]
+
+        matches = list(matcher.iter_matches(min_sites=3))
+        assert len(matches) == 1 and matches[0]["volume"] == "700"
+        assert {product["site"] for product in matches[0]["products"]} == {"rozetka", "tesco", "rost"}
@@ -0,0 +1,162 @@
+# finpi_scraper/tests/test_product_store.py
+import sys
+import os
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import product_store
+
+
+def test_records_are_appended_and_projected(tmp_path):
+    path = str(tmp_path / "rost_alcohol.jsonl.gz")
+    product_store.append_records(path, [
+        product_store.make_record("Віскі Jameson (12345) 0.7 л", "rost", "alcohol", "other", ["віскі", "jameson"]),
+    ])
+    product_store.append_records(path, [
+        product_store.make_record("Ром Bacardi 1 л", "rost", "alcohol", "rum", ["ром", "bacardi"]),
+    ])
+
+    records = list(product_store.iter_records(path, ("key", "subcategory")))
+    assert records == [
+        {"key": "віскі jameson 0.7 л", "subcategory": "other"},
+        {"key": "ром bacardi 1 л", "subcategory": "rum"},
+    ]
+
+
+def test_iter_latest_keeps_last_record_per_key(tmp_path):
+    path = str(tmp_path / "rost_alcohol.jsonl.gz")
+    product_store.append_records(path, [product_store.make_record("Віскі Jameson", "rost", "alcohol", "other", ["віскі"])])
+    product_store.append_records(path, [product_store.make_record("Віскі Jameson", "rost", "alcohol", "whisky", ["віскі"])])
+
+    latest = list(product_store.iter_latest(path, ("subcategory",)))
+    assert latest == [{"subcategory": "whisky"}]
+    assert product_store.load_keys(path) == {"віскі jameson"}
+
+
+def test_lemma_hash_ignores_order_and_duplicates():
+    assert product_store.lemma_hash(["a", "b", "a"]) == product_store.lemma_hash(["b", "a"])
+    assert product_store.lemma_hash(None) is None
+
+
+def test_store_path_for_text_file():
+    path = os.path.join("out", "rozetka_alcohol_whisky.txt")
+    assert product_store.store_path_for_text_file(path) == os.path.join("out", "rozetka_alcohol.jsonl.gz")
+
+
+def test_dedicated_configs_skip_categorization_across_runs(tmp_path, monkeypatch):
+    import asyncio
+    import main
+    from utils.product_io import iter_products
+
+    keywords = {"chacha": {"keywords": ["чача"], "negative_keywords": ["сироп"]}, "wine": ["вино"]}
+    listings = {"alcohol": ["Вино Shabo", "Чача Kakheti"], "chacha": ["Чача Kakheti", "Чача Gold", "Сироп чача"],
+                "beer": ["Obolon Premium"]}
+    base = {"site_name": "shop", "group": "alcohol", "category_path": "X", "target_count": 10}
+    configs = [dict(base, category_name="alcohol"),
+               dict(base, category_name="chacha", sub_category="chacha", negative_keyword_veto=True),
+               dict(base, category_name="beer", sub_category="beer")]
+    categorized, categorize_batch = [], main.categorize_batch
+
+    async def output_folder(category_path):
+        os.makedirs(tmp_path / category_path, exist_ok=True)
+        return str(tmp_path / category_path)
+
+    async def load_keywords(keywords_file):
+        return keywords
+
+    async def fake_parse(site_config, known, page_limit=None, stats=None):
+        if site_config.get('sub_category'):
+            stats['seen'] = set(listings[site_config['category_name']])
+        return [name for name in listings[site_config['category_name']] if name not in known]
+
+    def counting_categorize_batch(products, keyword_index, lang, classifier=None):
+        categorized.extend(products)
+        return categorize_batch(products, keyword_index, lang, classifier)
+
+    monkeypatch.setattr(main, "create_category_folders", output_folder)
+    monkeypatch.setattr(main, "load_external_keywords", load_keywords)
+    monkeypatch.setattr(main, "parse_site_with_pagination", fake_parse)
+    monkeypatch.setattr(main, "categorize_batch", counting_categorize_batch)
+
+    # Сначала только общий листинг: "Чача Kakheti" сохраняется без источника
+    asyncio.run(main.process_config_group(("shop", "alcohol"), configs[:1]))
+    categorized.clear()
+    asyncio.run(main.process_config_group(("shop", "alcohol"), configs))
+    files = {path.name: set(iter_products(path)) for path in (tmp_path / "X").glob("*.txt")}
+    assert files["shop_alcohol_chacha.txt"] == {"Чача Kakheti", "Чача Gold"}
+    assert files["shop_alcohol_beer.txt"] == {"Obolon Premium"}  # подкатегории нет в ключевых словах
+    assert files["shop_alcohol_other.txt"] == {"Сироп чача"}  # негативное слово: обычная категоризация
+    # "Чача Kakheti" уже сохранена, но увидена на листинге чачи — источник дописан в хранилище
+    assert sorted(categorized) == ["Вино Shabo", "Сироп чача"]
+    store = product_store.store_path(str(tmp_path / "X"), "shop", "alcohol")
+    expected_sources = {"чача kakheti": "chacha", "чача gold": "chacha", "сироп чача": "chacha",
+                        "obolon premium": "beer"}
+    assert product_store.load_sources(store) == expected_sources
+
+    # Следующий запуск: источник уже сохраненных товаров берется из хранилища и не дописывается заново
+    categorized.clear()
+    records = len(list(product_store.iter_records(store)))
+    asyncio.run(main.process_config_group(("shop", "alcohol"), configs))
+    assert len(list(product_store.iter_records(store))) == records
+    assert sorted(categorized) == ["Вино Shabo", "Сироп чача"]
+    assert product_store.load_sources(store) == expected_sources
+
+
+def test_recategorized_products_get_new_store_record(tmp_path, monkeypatch):
+    import asyncio
+    import main
+    from utils.keyword_extractor import analyze_other_products
+
+    async def output_folder(category_path):
+        return str(tmp_path)
+
+    monkeypatch.setattr(main, "create_category_folders", output_folder)
+    products = ["Віскі Jameson", "Ром Bacardi"]
+    asyncio.run(main.save_products_by_subcategory(products, "shop", "alcohol", "X", {"rum": ["ром"]}, "uk", set(products)))
+    store = product_store.store_path(str(tmp_path), "shop", "alcohol")
+    first_seen = {r["key"]: r["first_seen"] for r in product_store.iter_latest(store, ("key", "first_seen"))}
+
+    # Ключевые слова пополнены: без новых товаров виски уходит из 'other'
+    keywords = {"rum": ["ром"], "whisky": ["віскі"]}
+    asyncio.run(main.save_products_by_subcategory(products, "shop", "alcohol", "X", keywords, "uk", set()))
+    latest = {r["key"]: r for r in product_store.iter_latest(store, ("key", "subcategory", "first_seen"))}
+    assert latest["віскі jameson"]["subcategory"] == "whisky"
+    assert latest["віскі jameson"]["first_seen"] == first_seen["віскі jameson"]
+    assert len(list(product_store.iter_records(store))) == 3  # ром не менялся — новой записи нет
+    assert not (tmp_path / "shop_alcohol_other.txt").read_text(encoding='utf-8').strip()
+    assert analyze_other_products(str(tmp_path / "shop_alcohol_other.txt")) == (None, None)
+
+
+def test_merge_assigns_dedicated_config_results(tmp_path, monkeypatch):
+    import asyncio
+    import distributed
+    import main
+    from utils import deltas
+    from utils.product_io import iter_products
+    from utils.work_queue import WorkQueue
+
+    base = {"site_name": "shop", "group": "alcohol", "category_path": "X", "target_count": 10}
+    configs = [dict(base, category_name="alcohol"), dict(base, category_name="chacha", sub_category="chacha")]
+
+    async def output_folder(category_path):
+        return str(tmp_path)
+
+    async def load_keywords(keywords_file):
+        return {"wine": ["вино"]}
+
+    start_run = deltas.start_run
+    monkeypatch.setattr(deltas, "start_run", lambda: start_run(str(tmp_path), "1"))
+    monkeypatch.setattr(main, "create_category_folders", output_folder)
+    monkeypatch.setattr(distributed, "create_category_folders", output_folder)
+    monkeypatch.setattr(distributed, "load_external_keywords", load_keywords)
+    with WorkQueue(str(tmp_path / "queue.db")) as queue:
+        for config, products in zip(configs, (["Вино Shabo"], ["Чача Gold"])):
+            queue.enqueue(config, 1, 1)
+            queue.complete(queue.claim("w1")["id"], [(name, 1) for name in products])
+        asyncio.run(distributed.merge(queue))
+
+    assert list(iter_products(tmp_path / "shop_alcohol_chacha.txt")) == ["Чача Gold"]
+    assert list(iter_products(tmp_path / "shop_alcohol_wine.txt")) == ["Вино Shabo"]
+    store = product_store.store_path(str(tmp_path), "shop", "alcohol")
+    assert product_store.load_sources(store) == {"чача gold": "chacha"}
@@ -0,0 +1,29 @@
+# finpi_scraper/tests/test_profiling.py
+import asyncio
+import json
+import sys
+import os
+import time
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать main и utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import main
+
+
+def test_profile_run_reports_blocking_call(tmp_path, monkeypatch):
+    async def blocking_main_async(site=None, page_budget=None, full=False):
+        await asyncio.sleep(0.05)
+        time.sleep(0.3)  # синхронный вызов внутри event loop
+        await asyncio.sleep(0.05)
+
+    monkeypatch.setattr(main, "main_async", blocking_main_async)
+    monkeypatch.setattr(main, "clean_output_files", lambda: None)
+    main.run_profiled(main.parse_args(["--profile", "--stall-ms", "50"]), str(tmp_path))
+
+    profile_dir, = (tmp_path / "profiles").iterdir()
+    for name in ("main_async.prof", "main_async.txt", "cleaning.prof", "loop_stalls.json"):
+        assert (profile_dir / name).exists()
+    report = json.loads((profile_dir / "loop_stalls.json").read_text(encoding='utf-8'))
+    assert report["summary"]["count"] >= 1 and report["summary"]["max_ms"] >= 200
+    assert any("blocking_main_async" in location for location in report["summary"]["hotspots_ms"])
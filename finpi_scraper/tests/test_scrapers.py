@@ -0,0 +1,105 @@
+# finpi_scraper/tests/test_scrapers.py
+import json
+import logging
+import sys
+import os
+from urllib.parse import unquote
+
+import pytest
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать scrapers
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scrapers import base_scraper, get_scraper
+
+ROZETKA_CONFIG = {
+    "site_name": "rozetka",
+    "url": "https://rozetka.com.ua/ua/krepkie-napitki/c4594292/",
+    "product_name_selector": [".tile-title", ".product-title"],
+    "pagination_template": "/page={page}/",
+    "data_source": "api",
+    "api": {
+        "url_template": "https://xl-catalog-api.rozetka.com.ua/v4/goods/get?category_id={category_id}&page={page}",
+        "products_path": "data.goods.item.title",
+    },
+}
+ROST_CONFIG = {
+    "site_name": "rost",
+    "url": "https://rostmarket.com.ua/alkogol/",
+    "product_name_selector": ".product-item-link",
+    "pagination_template": "?p={page}",
+    "data_source": "api",
+    "api": {
+        "url_template": "https://rostmarket.com.ua/graphql?query={query}",
+        "page_size": 36,
+        "products_path": "data.products.items.item.name",
+    },
+}
+PAYLOAD = json.dumps({"data": {"goods": [
+    {"id": 1, "title": " Віскі Jameson 0.7 л "},
+    {"id": 2, "title": ""},
+    {"id": 3, "title": "Коньяк Shustov 0.5 л", "tags": {"title": "не товар"}},
+]}}, ensure_ascii=False)
+
+
+def test_api_urls_from_listing_url():
+    assert get_scraper(ROZETKA_CONFIG).get_source_url(3).endswith("category_id=4594292&page=3")
+    rost_url = unquote(get_scraper(ROST_CONFIG).get_source_url(2))
+    assert 'category_url_path:{eq:"alkogol"}' in rost_url
+    assert "pageSize:36,currentPage:2" in rost_url
+
+
+def test_html_source_is_default():
+    config = dict(ROZETKA_CONFIG, data_source="html")
+    scraper = get_scraper(config)
+    assert scraper.get_source_url(2) == "https://rozetka.com.ua/ua/krepkie-napitki/c4594292/page=2/"
+    assert scraper.parse('<a class="tile-title">Ром Bacardi</a>') == ["Ром Bacardi"]
+
+
+@pytest.mark.parametrize("use_ijson", [False, True])
+def test_parse_json_by_products_path(monkeypatch, use_ijson):
+    if use_ijson:
+        pytest.importorskip("ijson")
+    else:
+        monkeypatch.setattr(base_scraper, "ijson", None)
+    assert get_scraper(ROZETKA_CONFIG).parse(PAYLOAD) == ["Віскі Jameson 0.7 л", "Коньяк Shustov 0.5 л"]
+
+
+def test_parse_json_without_ijson_logs_fallback_once(monkeypatch, caplog):
+    monkeypatch.setattr(base_scraper, "ijson", None)
+    monkeypatch.setattr(base_scraper, "_ijson_fallback_logged", False)
+    scraper = get_scraper(ROZETKA_CONFIG)
+    with caplog.at_level(logging.INFO):
+        for _ in range(3):
+            assert len(scraper.parse(PAYLOAD)) == 2
+    assert sum("ijson" in record.getMessage() for record in caplog.records) == 1
+
+
+def test_parse_json_rejects_html_error_page():
+    assert get_scraper(ROZETKA_CONFIG).parse("<html>Access denied</html>") == []
+
+
+def test_api_mode_requires_products_path():
+    with pytest.raises(ValueError):
+        get_scraper(dict(ROST_CONFIG, api={"url_template": "https://x/{page}"}))
+
+
+def test_listing_region_and_selector_priority(monkeypatch):
+    monkeypatch.setattr(base_scraper, "_winning_selectors", {})
+    config = dict(ROZETKA_CONFIG, data_source="html",
+                  listing_region={"start": 'class="catalog-grid', "end": 'class="pagination'})
+    scraper = get_scraper(config)
+    page = ('<header><a class="product-title">Реклама</a></header>'
+            '<ul class="catalog-grid"><li><span class="product-title">Віскі Jameson</span></li>'
+            '<li><a class="tile-title">Ром Bacardi</a></li><li><a class="tile-title"> </a></li></ul>'
+            '<nav class="pagination"><a class="tile-title">2</a></nav>')
+    region = scraper.listing_region(page)
+    assert region.startswith('<ul class="catalog-grid">') and region.endswith('</ul>')
+    # Первый селектор списка, нашедший товары, побеждает, как и раньше
+    assert scraper.parse(page) == ["Ром Bacardi"]
+    assert base_scraper._winning_selectors[scraper.selector_key] == 0
+
+    # Якоря нет или в регионе пусто — разбирается вся страница, запомненный селектор не мешает
+    assert scraper.parse('<div><span class="product-title">Вино Shabo</span></div>') == ["Вино Shabo"]
+    assert base_scraper._winning_selectors[scraper.selector_key] == 1
+    assert scraper.parse('<ul class="catalog-grid"></ul><a class="tile-title">Пиво</a>') == ["Пиво"]
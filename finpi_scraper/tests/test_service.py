@@ -0,0 +1,66 @@
+# finpi_scraper/tests/test_service.py
+import asyncio
+import json
+import sys
+import os
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать service
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from service import MAX_BATCH, create_app
+from utils.categorization import categorize_lemmas, compile_keywords
+
+# Ключи приложения — web.AppKey, без NotAppKeyWarning
+pytestmark = pytest.mark.filterwarnings("error::aiohttp.web_exceptions.NotAppKeyWarning")
+
+KEYWORDS = {
+    "whisky": {"keywords": ["віскі", "whisky"], "negative_keywords": ["келих"]},
+    "wine": ["вино"],  # старый формат
+    "glassware": {"keywords": ["келих", "вино"]},
+}
+
+
+def run_client(keywords_dir, scenario):
+    async def runner():
+        async with TestClient(TestServer(create_app(str(keywords_dir)))) as client:
+            return await scenario(client)
+    return asyncio.run(runner())
+
+
+def test_compiled_index_matches_dict_order_and_negatives():
+    index = compile_keywords(KEYWORDS)
+    for lemmas in ({"віскі"}, {"віскі", "келих"}, {"вино", "келих"}, {"келих"}, {"пиво"}, set()):
+        assert categorize_lemmas(lemmas, index) == categorize_lemmas(lemmas, KEYWORDS)
+    assert categorize_lemmas({"віскі", "келих"}, index) == "glassware"
+    assert categorize_lemmas({"пиво"}, compile_keywords({})) == "other"
+
+
+def test_categorize_batch_keeps_order_and_duplicates(tmp_path):
+    (tmp_path / "alcohol_keywords.json").write_text(json.dumps(KEYWORDS, ensure_ascii=False), encoding='utf-8')
+    names = ["Віскі Jameson", "Пиво", "Віскі Jameson", "Келих віскі"]
+
+    async def scenario(client):
+        response = await client.post('/categorize', json={"names": names, "lang": "uk", "category": "alcohol"})
+        assert response.status == 200
+        body = await response.json()
+        health = await (await client.get('/health')).json()
+        return body, health
+
+    body, health = run_client(tmp_path, scenario)
+    assert body["count"] == 4
+    assert body["subcategories"] == ["whisky", "other", "whisky", "glassware"]
+    assert health["categories"] == ["alcohol"] and health["names"] == 4
+
+
+def test_categorize_rejects_bad_requests(tmp_path):
+    async def scenario(client):
+        statuses = []
+        for payload in ({"names": "Віскі"}, {"names": [], "lang": "fr"}, {"names": [], "category": "../config"},
+                        {"names": ["x"] * (MAX_BATCH + 1)}, {"names": ["Віскі"], "category": "missing"}):
+            statuses.append((await client.post('/categorize', json=payload)).status)
+        return statuses
+
+    assert run_client(tmp_path, scenario) == [400, 400, 400, 413, 404]
@@ -0,0 +1,73 @@
+# finpi_scraper/tests/test_work_queue.py
+import sys
+import os
+
+# Добавляем путь к родительской директории, чтобы можно было импортировать utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.work_queue import WorkQueue
+
+CONFIG = {"site_name": "rost", "category_name": "alcohol", "target_count": 40}
+
+
+def make_queue(tmp_path, **kwargs):
+    return WorkQueue(str(tmp_path / "queue.db"), **kwargs)
+
+
+def test_enqueue_is_idempotent(tmp_path):
+    with make_queue(tmp_path) as queue:
+        assert queue.enqueue(CONFIG, 1, 2)
+        assert not queue.enqueue(CONFIG, 1, 2)
+        assert queue.stats()["pending"] == 1
+
+
+def test_claim_complete_and_results(tmp_path):
+    with make_queue(tmp_path) as queue:
+        queue.enqueue(CONFIG, 1, 2)
+        unit = queue.claim("w1")
+        assert unit["config"] == CONFIG and unit["attempts"] == 1
+        assert queue.claim("w2") is None  # единица уже занята
+
+        queue.complete(unit["id"], [("Віскі A", 1), ("Ром B", 2), ("Віскі A", 2)])
+        assert queue.stats()["done"] == 1
+        assert queue.count_results("rost:alcohol") == 2
+        assert sorted(queue.iter_results("rost", "alcohol")) == ["Віскі A", "Ром B"]
+        assert queue.is_drained()
+
+
+def test_failed_unit_is_requeued_until_limit(tmp_path):
+    with make_queue(tmp_path, max_attempts=2) as queue:
+        queue.enqueue(CONFIG, 1, 2)
+        unit = queue.claim("w1")
+        assert queue.fail(unit["id"], "timeout") == "pending"
+        unit = queue.claim("w1")
+        assert unit["attempts"] == 2
+        assert queue.fail(unit["id"], "timeout") == "failed"
+        assert queue.claim("w1") is None
+        assert queue.is_drained()
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    with make_queue(tmp_path, lease_seconds=-1) as queue:
+        queue.enqueue(CONFIG, 1, 2)
+        first = queue.claim("dead-worker")
+        second = queue.claim("w2")
+        assert second["id"] == first["id"]
+        assert second["worker"] == "w2"
+
+
+def test_filter_new_skips_known_products(tmp_path):
+    with make_queue(tmp_path) as queue:
+        queue.seed_known_products("rost", "alcohol", ["Віскі A"])
+        assert queue.filter_new("rost", "alcohol", ["Віскі A", "Ром B"]) == ["Ром B"]
+
+
+def test_filter_new_skips_known_hashes(tmp_path):
+    from utils.hashset import ProductHashSet
+
+    seen = ProductHashSet()
+    seen.update(["Віскі A", f"Товар {2 ** 63}"])
+    with make_queue(tmp_path) as queue:
+        queue.seed_known_hashes("rost", "alcohol", seen.iter_hashes())
+        assert queue.filter_new("rost", "alcohol", ["віскі  a", "Ром B"]) == ["Ром B"]
+        assert queue.filter_new("rost", "beer", ["Віскі A"]) == ["Віскі A"]
@@ -1,6 +1,71 @@
 # finpi_scraper/utils/categorization.py
+import re
+
 from .lemmatizer import lemmatize_text
 
+
+class KeywordIndex:
+    """
+    Скомпилированный словарь подкатегорий: множества ключевых слов построены один раз,
+    а инвертированный индекс "лемма → номера подкатегорий" позволяет проверять только
+    подкатегории, с которыми у товара есть общие леммы. Порядок подкатегорий сохраняется,
+    поэтому результат совпадает с обходом исходного словаря.
+
+    Args:
+        subcategory_keywords (dict): Словарь с данными о подкатегориях (новый или старый формат).
+    """
+    def __init__(self, subcategory_keywords: dict):
+        self.rules = []  # [(подкатегория, положительные, негативные)] в исходном порядке
+        self.index = {}  # лемма → номера правил, где она положительное ключевое слово
+        self._veto_patterns = {}  # подкатегория → регулярное выражение ее негативных слов
+        for position, (subcategory, data) in enumerate((subcategory_keywords or {}).items()):
+            # Данные могут быть либо списком (старый формат), либо словарем
+            positive_keywords = frozenset(data if isinstance(data, list) else data.get('keywords', []))
+            negative_keywords = frozenset(data.get('negative_keywords', []) if isinstance(data, dict) else [])
+            self.rules.append((subcategory, positive_keywords, negative_keywords))
+            for keyword in positive_keywords:
+                self.index.setdefault(keyword, []).append(position)
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def categorize(self, product_lemmas_set: set) -> str:
+        """Первая по порядку подкатегория с совпадением и без негативных слов, иначе 'other'."""
+        candidates = set()
+        for lemma in product_lemmas_set:
+            positions = self.index.get(lemma)
+            if positions:
+                candidates.update(positions)
+        for position in sorted(candidates):
+            subcategory, _, negative_keywords = self.rules[position]
+            if product_lemmas_set.isdisjoint(negative_keywords):
+                return subcategory
+        return 'other'
+
+    def vetoes(self, subcategory: str, product_name: str) -> bool:
+        """
+        Есть ли в названии негативное слово подкатегории — без лемматизации.
+
+        Для товаров, подкатегория которых уже известна из конфигурации (sub_category):
+        слова и фразы ("без спирту", "0%") ищутся в названии целиком, как написаны
+        в файле ключевых слов, поэтому словоформы, отличные от записанной, не находятся.
+        """
+        if subcategory not in self._veto_patterns:
+            negative = next((rule[2] for rule in self.rules if rule[0] == subcategory), ())
+            self._veto_patterns[subcategory] = re.compile(
+                r"(?<!\w)(?:" + "|".join(sorted(map(re.escape, negative), key=len, reverse=True)) + r")(?!\w)"
+            ) if negative else None
+        pattern = self._veto_patterns[subcategory]
+        return bool(pattern and pattern.search(product_name.lower()))
+
+
+def compile_keywords(subcategory_keywords) -> KeywordIndex:
+    """Компилирует словарь подкатегорий в KeywordIndex (уже скомпилированный возвращается как есть)."""
+    if isinstance(subcategory_keywords, KeywordIndex):
+        return subcategory_keywords
+    return KeywordIndex(subcategory_keywords)
+
+
 def categorize_product(product_name: str, subcategory_keywords: dict, lang: str) -> str:
     """
     Определяет подкатегорию товара по ключевым словам с использованием лемматизации
@@ -8,7 +73,7 @@ def categorize_product(product_name: str, subcategory_keywords: dict, lang: str)
     
     Args:
         product_name (str): Название товара.
-        subcategory_keywords (dict): Словарь с данными о подкатегориях.
+        subcategory_keywords (dict | KeywordIndex): Словарь с данными о подкатегориях.
         lang (str): Код языка ('en', 'de', 'uk', 'ru').
 
     Returns:
@@ -18,7 +83,26 @@ def categorize_product(product_name: str, subcategory_keywords: dict, lang: str)
         return 'other'
     
     product_lemmas = lemmatize_text(product_name, lang)
-    product_lemmas_set = set(product_lemmas)
+    return categorize_lemmas(set(product_lemmas), subcategory_keywords)
+
+def categorize_lemmas(product_lemmas_set: set, subcategory_keywords) -> str:
+    """
+    Определяет подкатегорию по уже посчитанному множеству лемм товара.
+    Позволяет лемматизировать название один раз и переиспользовать леммы
+    (например, для сохранения в компактное хранилище).
+
+    Args:
+        product_lemmas_set (set): Множество лемм названия товара.
+        subcategory_keywords (dict | KeywordIndex): Словарь с данными о подкатегориях
+            или скомпилированный индекс (compile_keywords) — для больших пачек товаров.
+
+    Returns:
+        str: Название подкатегории или 'other'.
+    """
+    if not subcategory_keywords:
+        return 'other'
+    if isinstance(subcategory_keywords, KeywordIndex):
+        return subcategory_keywords.categorize(product_lemmas_set)
 
     for subcategory, data in subcategory_keywords.items():
         # Данные могут быть либо списком (старый формат), либо словарем
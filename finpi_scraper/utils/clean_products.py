@@ -8,6 +8,12 @@ import re
 import glob
 import logging
 
+try:
+    from .product_io import rewrite_products
+except ImportError:
+    # Фолбэк для прямого запуска скрипта
+    from product_io import rewrite_products
+
 # Настройка логирования для автономного запуска
 if __name__ == "__main__":
     logging.basicConfig(
@@ -30,6 +36,13 @@ def clean_product_name(product_name):
     cleaned = cleaned.strip()
     return cleaned
 
+def normalize_product_key(product_name):
+    """
+    Нормализованный ключ товара для дедупликации и сопоставления:
+    название без артикулов в скобках, в нижнем регистре, с одинарными пробелами.
+    """
+    return clean_product_name(product_name).casefold()
+
 def clean_file(file_path):
     """
     Очищает файл с товарами и возвращает результат.
@@ -39,20 +52,14 @@ def clean_file(file_path):
         return False
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        cleaned_lines = [clean_product_name(line) for line in lines if line.strip()]
-        cleaned_lines = [line for line in cleaned_lines if line] # Убираем пустые после очистки
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            for line in cleaned_lines:
-                f.write(line + '\n')
+        # Построчно через временный файл: память не зависит от размера файла,
+        # а при сбое исходный файл остается целым
+        lines_before, lines_after = rewrite_products(file_path, clean_product_name)
         
         # Логируем в одну строку для компактности
         logging.info(
             f"✅ Очищен файл: {os.path.basename(file_path)} "
-            f"(Было: {len(lines)} -> Стало: {len(cleaned_lines)})"
+            f"(Было: {lines_before} -> Стало: {lines_after})"
         )
         return True
         
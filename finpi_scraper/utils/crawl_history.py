@@ -0,0 +1,199 @@
+# finpi_scraper/utils/crawl_history.py
+"""
+История обхода категорий и планирование запусков по частоте изменений.
+
+Для каждой конфигурации (сайт + категория, см. work_queue.config_key) после запуска
+записывается, сколько новых товаров нашлось, сколько страниц запрошено и на какой
+самой глубокой странице еще были новые товары. По этой истории plan_crawl решает:
+
+- когда категорию обновлять: после каждого запуска без новых товаров интервал
+  (refresh_interval_minutes, по умолчанию сутки) удваивается, до MAX_BACKOFF раз;
+  первый же запуск с новыми товарами возвращает базовый интервал;
+- насколько глубоко идти: до самой глубокой страницы с новыми товарами за последние
+  RECENT_RUNS запусков плюс DEPTH_MARGIN, но не мельче последнего запуска с новыми
+  товарами (а без таких запусков — оценки по target_count); если новые товары были
+  на последней разрешенной странице, глубина удваивается; после FULL_PROBE_EVERY
+  запусков подряд с урезанной глубиной категория один раз обходится на всю глубину;
+- кому отдать общий бюджет страниц (платных запросов) на запуск: сначала категориям
+  без истории (глубина оценивается по target_count), затем по убыванию новых товаров
+  на запрошенную страницу.
+
+История хранится в JSON-файле (по умолчанию crawl_history.json рядом с main.py).
+"""
+import json
+import logging
+import math
+import os
+import time
+from datetime import datetime
+
+from .product_io import atomic_write
+from .work_queue import config_key
+
+MAX_RUNS_KEPT = 30  # Сколько последних запусков хранить на категорию
+RECENT_RUNS = 5  # По скольким последним запускам считаются глубина и отдача
+DEFAULT_REFRESH_INTERVAL_MINUTES = 24 * 60  # Базовый интервал, если в конфигурации нет refresh_interval_minutes
+MAX_BACKOFF = 16  # Во сколько раз максимум растягивается интервал стабильной категории
+DUE_TOLERANCE = 0.1  # Доля интервала, на которую запуск может прийти раньше (запуск по cron "дрейфует")
+DEPTH_MARGIN = 1  # Страниц сверх самой глубокой страницы с новыми товарами
+FULL_PROBE_EVERY = 10  # Через сколько запусков с урезанной глубиной обойти категорию целиком
+DEFAULT_PAGE_SIZE = 24  # Оценка товаров на странице для категорий без истории
+
+
+class CrawlHistory:
+    """
+    История запусков по категориям.
+
+    Args:
+        path (str): JSON-файл истории.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.categories = {}  # config_key → [запись о запуске, ...] (от старых к новым)
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.categories = json.load(f).get('categories', {})
+        except (OSError, ValueError) as e:
+            logging.warning(f"Не удалось прочитать историю обхода {self.path}: {e}")
+
+    def save(self) -> None:
+        """Атомарно записывает историю."""
+        with atomic_write(self.path) as f:
+            json.dump({"saved_at": datetime.now().isoformat(timespec='seconds'), "categories": self.categories},
+                      f, ensure_ascii=False, indent=2)
+
+    def runs(self, config: dict) -> list:
+        return self.categories.get(config_key(config), [])
+
+    def record(self, config: dict, stats: dict, at: float = None) -> dict:
+        """
+        Добавляет запись о запуске категории.
+
+        Args:
+            stats (dict): Статистика parse_site_with_pagination: new, pages_fetched,
+                pages_failed, deepest_new_page, page_limit.
+        """
+        run = {
+            "at": at if at is not None else time.time(),
+            "new": stats.get('new', 0),
+            "pages_fetched": stats.get('pages_fetched', 0),
+            "pages_failed": stats.get('pages_failed', 0),
+            "deepest_new_page": stats.get('deepest_new_page', 0),
+            "page_limit": stats.get('page_limit'),
+        }
+        runs = self.categories.setdefault(config_key(config), [])
+        runs.append(run)
+        del runs[:-MAX_RUNS_KEPT]
+        return run
+
+    def empty_streak(self, config: dict) -> int:
+        """Сколько последних успешных запусков подряд не нашли новых товаров."""
+        streak = 0
+        for run in reversed(self.runs(config)):
+            if run['pages_fetched'] <= run['pages_failed']:
+                continue  # Сбой загрузки — не признак стабильности категории
+            if run['new']:
+                break
+            streak += 1
+        return streak
+
+    def refresh_interval(self, config: dict) -> float:
+        """Текущий интервал обновления категории в секундах."""
+        base = config.get('refresh_interval_minutes', DEFAULT_REFRESH_INTERVAL_MINUTES) * 60
+        return base * min(2 ** self.empty_streak(config), MAX_BACKOFF)
+
+    def is_due(self, config: dict, now: float = None) -> bool:
+        runs = self.runs(config)
+        if not runs:
+            return True
+        now = now if now is not None else time.time()
+        return now - runs[-1]['at'] >= self.refresh_interval(config) * (1 - DUE_TOLERANCE)
+
+    def page_depth(self, config: dict, max_pages: int):
+        """
+        Сколько страниц запрашивать по истории.
+
+        Returns:
+            int | None: Глубина или None, если истории нет.
+        """
+        runs = self.runs(config)
+        if not runs:
+            return None
+        recent = runs[-RECENT_RUNS:]
+        last = recent[-1]
+        if last['page_limit'] and last['deepest_new_page'] >= last['page_limit']:
+            # Новые товары были на последней разрешенной странице — листинг может быть глубже
+            return min(max_pages, last['page_limit'] * 2)
+
+        shallow_streak = 0
+        for run in reversed(runs):
+            if not run['page_limit'] or run['page_limit'] >= max_pages:
+                break
+            shallow_streak += 1
+        if shallow_streak >= FULL_PROBE_EVERY:
+            # Новые товары могли появиться глубже, чем заглядывали урезанные запуски
+            return max_pages
+
+        # Пустые запуски не сужают обход до первой страницы: нижняя граница — последний
+        # запуск с новыми товарами, а если их не было — оценка по target_count
+        productive = [run['deepest_new_page'] for run in runs if run['new'] and run['deepest_new_page']]
+        floor = productive[-1] if productive else initial_depth(config, max_pages)
+        deepest = max(floor, *(run['deepest_new_page'] for run in recent))
+        return max(1, min(max_pages, deepest + DEPTH_MARGIN))
+
+    def yield_per_page(self, config: dict) -> float:
+        """Новых товаров на запрошенную страницу за последние запуски."""
+        recent = self.runs(config)[-RECENT_RUNS:]
+        pages = sum(run['pages_fetched'] for run in recent)
+        return sum(run['new'] for run in recent) / pages if pages else 0.0
+
+
+def initial_depth(config: dict, max_pages: int) -> int:
+    """Глубина для категории без истории: страниц, достаточных для target_count."""
+    page_size = config.get('page_size', DEFAULT_PAGE_SIZE)
+    return max(1, min(max_pages, math.ceil(config['target_count'] / page_size)))
+
+
+def plan_crawl(configs, history: CrawlHistory, max_pages: int, page_budget: int = None, now: float = None) -> dict:
+    """
+    Выбирает категории для запуска и глубину обхода каждой.
+
+    Args:
+        configs (list[dict]): Включенные конфигурации.
+        max_pages (int): Предел глубины (MAX_PAGES).
+        page_budget (int): Общий лимит страниц на запуск (None — без лимита).
+            Это верхняя граница: обход категории может остановиться раньше.
+
+    Returns:
+        dict: config_key → предел страниц для категорий, которые запускаются сейчас.
+    """
+    now = now if now is not None else time.time()
+    due = [config for config in configs if history.is_due(config, now)]
+    for config in configs:
+        if config not in due:
+            logging.info(f"💤 [{config_key(config)}] пропуск: стабильная категория, "
+                         f"интервал {history.refresh_interval(config) / 3600:.0f} ч")
+
+    # Сначала категории без истории, затем самые "урожайные" на страницу
+    due.sort(key=lambda config: (bool(history.runs(config)), -history.yield_per_page(config)))
+
+    plan = {}
+    remaining = page_budget
+    for config in due:
+        depth = history.page_depth(config, max_pages)
+        if depth is None:
+            # Без истории и без бюджета — обычный обход до цели; с бюджетом — оценка по target_count
+            depth = max_pages if page_budget is None else initial_depth(config, max_pages)
+        if remaining is not None:
+            if remaining <= 0:
+                logging.info(f"💸 [{config_key(config)}] отложена: исчерпан бюджет страниц")
+                continue
+            depth = min(depth, remaining)
+            remaining -= depth
+        plan[config_key(config)] = depth
+    return plan
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Журналы изменений (дельты) файлов output/ по запускам.
+
+Каждый запуск пишет в output/deltas/<run_id>/ только изменения файлов подкатегорий:
+
+    output/deltas/<run_id>/<category_path>/{site}_{group}_{subcategory}.jsonl
+        {"op": "add", "name": "..."}
+        {"op": "remove", "name": "..."}
+    output/deltas/<run_id>/run.json — run_id, время и счетчики по файлам
+
+Добавление — новый товар или товар, перешедший в эту подкатегорию; удаление — товар,
+ушедший в другую подкатегорию или исчезнувший с сайта (track_removals: листинг
+обойден целиком, а товара на нем нет). Названия записываются в том виде, в каком
+они окажутся в файле после clean_products, поэтому снимок, собранный из дельт,
+совпадает с файлами output/.
+
+run_id берется из FINPI_RUN_ID (например, номер запуска в CI) или из текущего времени.
+
+Сборка снимков и уплотнение (из finpi_scraper/):
+    python -m utils.deltas list
+    python -m utils.deltas materialize --out /tmp/snapshot [--until <run_id>]
+    python -m utils.deltas compact --keep 7   # старые запуски сливаются в один базовый
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+from collections import defaultdict
+from datetime import datetime
+
+from .clean_products import clean_product_name
+from .product_io import atomic_write, iter_products, write_products
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT_OUTPUT_DIR = os.path.join(BASE_DIR, 'output')
+DELTAS_DIRNAME = 'deltas'
+MANIFEST_NAME = 'run.json'
+BASE_RUN_ID = 'base'  # Запуск, в который compact сливает старые дельты
+DELTA_SUFFIX = '.jsonl'
+
+_active = None  # Текущий DeltaWriter процесса (start_run / finish_run)
+
+
+def timestamp_run_id() -> str:
+    return datetime.now().strftime('%Y%m%dT%H%M%S')
+
+
+def new_run_id() -> str:
+    return os.getenv("FINPI_RUN_ID") or timestamp_run_id()
+
+
+class DeltaWriter:
+    """
+    Пишет дельты одного запуска.
+
+    Args:
+        output_dir (str): Директория output/.
+        run_id (str): Идентификатор запуска.
+    """
+    def __init__(self, output_dir: str, run_id: str):
+        self.output_dir = output_dir
+        self.run_id = run_id
+        self.run_dir = os.path.join(output_dir, DELTAS_DIRNAME, run_id)
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.files = {}  # относительный путь текстового файла → {"added": N, "removed": N}
+
+    def record(self, text_file_path: str, added, removed) -> None:
+        """Дописывает изменения файла подкатегории в журнал запуска."""
+        added, removed = list(added), list(removed)
+        if not added and not removed:
+            return
+        relative = os.path.relpath(text_file_path, self.output_dir)
+        delta_path = os.path.join(self.run_dir, relative[:-len('.txt')] + DELTA_SUFFIX)
+        os.makedirs(os.path.dirname(delta_path), exist_ok=True)
+        with open(delta_path, 'a', encoding='utf-8') as f:
+            for op, names in (('remove', removed), ('add', added)):
+                for name in names:
+                    f.write(json.dumps({"op": op, "name": name}, ensure_ascii=False) + '\n')
+        counts = self.files.setdefault(relative, {"added": 0, "removed": 0})
+        counts["added"] += len(added)
+        counts["removed"] += len(removed)
+
+    def write_manifest(self) -> dict:
+        manifest = {
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "finished_at": datetime.now().isoformat(timespec='seconds'),
+            "files": self.files,
+        }
+        if self.files:
+            os.makedirs(self.run_dir, exist_ok=True)
+            with atomic_write(os.path.join(self.run_dir, MANIFEST_NAME)) as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest
+
+
+def start_run(output_dir: str = DEFAULT_OUTPUT_DIR, run_id: str = None) -> DeltaWriter:
+    """Начинает запись дельт запуска; save_products_by_subcategory пишет в active_run()."""
+    global _active
+    _active = DeltaWriter(output_dir, run_id or new_run_id())
+    return _active
+
+
+def active_run():
+    return _active
+
+
+def finish_run():
+    """Записывает манифест текущего запуска. Returns: манифест или None."""
+    global _active
+    writer, _active = _active, None
+    if writer is None:
+        return None
+    manifest = writer.write_manifest()
+    added = sum(counts["added"] for counts in writer.files.values())
+    removed = sum(counts["removed"] for counts in writer.files.values())
+    logging.info(f"🧾 Дельта запуска {writer.run_id}: +{added} / -{removed} в {len(writer.files)} файлах")
+    return manifest
+
+
+def diff_products(old_products, new_products) -> tuple[list, list]:
+    """
+    Изменения файла подкатегории в названиях после очистки (clean_product_name).
+
+    Args:
+        old_products (Iterable[str]): Текущее содержимое файла.
+        new_products (Iterable[str]): Что будет записано.
+
+    Returns:
+        tuple[list, list]: (добавленные, удаленные).
+    """
+    old = dict.fromkeys(clean_product_name(product) for product in old_products)
+    new = dict.fromkeys(clean_product_name(product) for product in new_products)
+    old.pop('', None)
+    new.pop('', None)
+    return [name for name in new if name not in old], [name for name in old if name not in new]
+
+
+def record_file_change(text_file_path: str, new_products, append: bool = False) -> None:
+    """
+    Пишет в журнал текущего запуска изменения файла, который сейчас будет перезаписан
+    (append=True — в файл только дописываются new_products). Без активного запуска ничего не делает.
+    """
+    writer = active_run()
+    if writer is None:
+        return
+    if append:
+        added, removed = diff_products([], new_products)
+    else:
+        old_products = iter_products(text_file_path) if os.path.exists(text_file_path) else []
+        added, removed = diff_products(old_products, new_products)
+    writer.record(text_file_path, added, removed)
+
+
+# --- Чтение, сборка снимков и уплотнение ---
+
+def list_runs(output_dir: str = DEFAULT_OUTPUT_DIR) -> list:
+    """Манифесты запусков по времени начала (базовый — первым)."""
+    deltas_dir = os.path.join(output_dir, DELTAS_DIRNAME)
+    runs = []
+    if os.path.isdir(deltas_dir):
+        for run_id in os.listdir(deltas_dir):
+            manifest_path = os.path.join(deltas_dir, run_id, MANIFEST_NAME)
+            if os.path.exists(manifest_path):
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    runs.append(json.load(f))
+    return sorted(runs, key=lambda run: (run["run_id"] != BASE_RUN_ID, run["started_at"], run["run_id"]))
+
+
+def iter_delta(path: str):
+    """Yields: (op, name) из файла дельты."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                yield entry["op"], entry["name"]
+
+
+def replay(output_dir: str = DEFAULT_OUTPUT_DIR, until: str = None, runs=None) -> dict:
+    """
+    Применяет дельты запусков по порядку.
+
+    Args:
+        until (str): Последний применяемый run_id (по умолчанию все).
+
+    Returns:
+        dict: Относительный путь файла → dict названий (порядок добавления).
+    """
+    snapshot = defaultdict(dict)
+    for run in runs if runs is not None else list_runs(output_dir):
+        run_dir = os.path.join(output_dir, DELTAS_DIRNAME, run["run_id"])
+        for relative in run["files"]:
+            products = snapshot[relative]
+            for op, name in iter_delta(os.path.join(run_dir, relative[:-len('.txt')] + DELTA_SUFFIX)):
+                if op == 'add':
+                    products[name] = None
+                else:
+                    products.pop(name, None)
+        if run["run_id"] == until:
+            break
+    return snapshot
+
+
+def materialize(target_dir: str, output_dir: str = DEFAULT_OUTPUT_DIR, until: str = None) -> int:
+    """
+    Собирает снимок файлов подкатегорий из дельт в target_dir.
+
+    Returns:
+        int: Количество записанных файлов.
+    """
+    snapshot = replay(output_dir, until)
+    for relative, products in snapshot.items():
+        path = os.path.join(target_dir, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_products(path, products)
+    return len(snapshot)
+
+
+def compact(output_dir: str = DEFAULT_OUTPUT_DIR, keep: int = 7) -> int:
+    """
+    Сливает все запуски, кроме последних keep, в базовый запуск (одни добавления).
+
+    Returns:
+        int: Сколько запусков слито.
+    """
+    runs = list_runs(output_dir)
+    to_fold = runs[:max(0, len(runs) - keep)]
+    if len(to_fold) < 2 and not (to_fold and to_fold[0]["run_id"] != BASE_RUN_ID):
+        return 0
+
+    snapshot = replay(output_dir, runs=to_fold)
+    deltas_dir = os.path.join(output_dir, DELTAS_DIRNAME)
+    staging_id = BASE_RUN_ID + '.new'
+    shutil.rmtree(os.path.join(deltas_dir, staging_id), ignore_errors=True)
+    writer = DeltaWriter(output_dir, staging_id)
+    for relative, products in snapshot.items():
+        writer.record(os.path.join(output_dir, relative), products, [])
+    writer.run_id = BASE_RUN_ID
+    writer.started_at = to_fold[0]["started_at"]
+    writer.write_manifest()
+    for run in to_fold:
+        shutil.rmtree(os.path.join(deltas_dir, run["run_id"]))
+    os.replace(os.path.join(deltas_dir, staging_id), os.path.join(deltas_dir, BASE_RUN_ID))
+    return len(to_fold)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Дельты output/ по запускам")
+    parser.add_argument("command", choices=["list", "materialize", "compact"])
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="Директория output/")
+    parser.add_argument("--out", help="Куда собрать снимок (для materialize)")
+    parser.add_argument("--until", help="Последний применяемый run_id (для materialize)")
+    parser.add_argument("--keep", type=int, default=7, help="Сколько последних запусков не сливать (для compact)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M')
+    args = parse_args(argv)
+    if args.command == "list":
+        for run in list_runs(args.output):
+            added = sum(counts["added"] for counts in run["files"].values())
+            removed = sum(counts["removed"] for counts in run["files"].values())
+            logging.info(f"🧾 {run['run_id']} ({run['started_at']}): +{added} / -{removed}, файлов {len(run['files'])}")
+    elif args.command == "materialize":
+        if not args.out:
+            logging.error("Укажите --out для снимка")
+            return 1
+        logging.info(f"📦 Снимок собран: файлов {materialize(args.out, args.output, args.until)} → {args.out}")
+    elif args.command == "compact":
+        logging.info(f"🗜️ Слито запусков в '{BASE_RUN_ID}': {compact(args.output, args.keep)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,212 @@
+# finpi_scraper/utils/hashset.py
+"""
+Компактное множество уже известных товаров для дедупликации на больших каталогах.
+
+Вместо set полных строк хранятся 64-битные хеши нормализованных названий
+(normalize_product_key) в таблице с открытой адресацией (array('Q'), линейное
+пробирование, заполнение не выше MAX_LOAD) — 10–20 байт на товар вместо сотни с лишним.
+Перед таблицей может стоять фильтр Блума: отрицательный ответ ("точно не видели")
+дается без обращения к таблице.
+
+Множество сохраняется в файл (заголовок + таблица + фильтр) и при следующем запуске
+открывается через mmap без перестроения из текстовых файлов: загрузка не зависит
+от размера каталога. Изменения после открытия остаются в памяти процесса
+(mmap.ACCESS_COPY) и попадают на диск только через save().
+
+Вероятность ложного "уже видели" для двух разных названий — порядка n²/2⁶⁵
+(для миллиона товаров ~3·10⁻⁸).
+"""
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+
+from .clean_products import normalize_product_key
+from .product_io import atomic_write
+
+SEEN_SUFFIX = ".seen"
+MAGIC = b"FPHS0001"
+HEADER = struct.Struct("<8sQQQII")  # magic, количество, емкость таблицы, байт фильтра, хешей фильтра, резерв
+MIN_CAPACITY = 1024
+MAX_LOAD = 0.8  # Доля заполнения, после которой таблица удваивается
+DEFAULT_BLOOM_BITS = 10  # Бит фильтра Блума на товар (~1% ложных срабатываний фильтра)
+BLOOM_HASHES = 7
+
+
+def product_hash(name: str) -> int:
+    """64-битный хеш нормализованного названия (0 зарезервирован под пустую ячейку)."""
+    digest = hashlib.blake2b(normalize_product_key(name).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+def seen_path(output_path: str, site_name: str, group_name: str) -> str:
+    """Файл множества товаров группы: output/<category_path>/{site}_{group}.seen."""
+    return os.path.join(output_path, f"{site_name}_{group_name}{SEEN_SUFFIX}")
+
+
+def _capacity_for(count: int) -> int:
+    capacity = MIN_CAPACITY
+    while count > capacity * MAX_LOAD:
+        capacity *= 2
+    return capacity
+
+
+class ProductHashSet:
+    """
+    Множество товаров по 64-битным хешам с интерфейсом set: in, add, update, len.
+
+    Args:
+        expected (int): Ожидаемое количество товаров (чтобы не перестраивать таблицу при загрузке).
+        bloom_bits (int): Бит фильтра Блума на товар; 0 — без фильтра.
+    """
+    def __init__(self, expected: int = 0, bloom_bits: int = DEFAULT_BLOOM_BITS):
+        self.count = 0
+        self.table = array('Q', bytes(8 * _capacity_for(expected)))
+        self.bloom_bits = bloom_bits
+        self.bloom = bytearray(self._bloom_size(len(self.table))) if bloom_bits else None
+        self._mmap = None
+
+    def _bloom_size(self, capacity: int) -> int:
+        return max(64, int(capacity * MAX_LOAD * self.bloom_bits) // 8)
+
+    # --- Фильтр Блума ---
+
+    def _bloom_positions(self, value: int):
+        bits = len(self.bloom) * 8
+        first, second = value & 0xFFFFFFFF, (value >> 32) | 1
+        return ((first + i * second) % bits for i in range(BLOOM_HASHES))
+
+    def _bloom_add(self, value: int) -> None:
+        bloom = self.bloom
+        for position in self._bloom_positions(value):
+            bloom[position >> 3] |= 1 << (position & 7)
+
+    def _bloom_check(self, value: int) -> bool:
+        bloom = self.bloom
+        return all(bloom[position >> 3] & (1 << (position & 7)) for position in self._bloom_positions(value))
+
+    # --- Таблица ---
+
+    def contains_hash(self, value: int) -> bool:
+        if self.bloom is not None and not self._bloom_check(value):
+            return False
+        table = self.table
+        mask = len(table) - 1
+        slot = value & mask
+        while True:
+            stored = table[slot]
+            if stored == value:
+                return True
+            if not stored:
+                return False
+            slot = (slot + 1) & mask
+
+    def add_hash(self, value: int) -> bool:
+        """Добавляет хеш. Returns: True, если его еще не было."""
+        if (self.count + 1) > len(self.table) * MAX_LOAD:
+            self._resize(len(self.table) * 2)
+        table = self.table
+        mask = len(table) - 1
+        slot = value & mask
+        while True:
+            stored = table[slot]
+            if stored == value:
+                return False
+            if not stored:
+                table[slot] = value
+                self.count += 1
+                if self.bloom is not None:
+                    self._bloom_add(value)
+                return True
+            slot = (slot + 1) & mask
+
+    def _resize(self, capacity: int) -> None:
+        self._release_mmap()
+        old_table = self.table
+        self.table = array('Q', bytes(8 * capacity))
+        if self.bloom is not None:
+            self.bloom = bytearray(self._bloom_size(capacity))
+        self.count = 0
+        for value in old_table:
+            if value:
+                self.add_hash(value)
+
+    # --- Интерфейс set ---
+
+    def __contains__(self, name) -> bool:
+        return self.contains_hash(product_hash(name))
+
+    def add(self, name: str) -> bool:
+        return self.add_hash(product_hash(name))
+
+    def update(self, names) -> int:
+        """Returns: Сколько названий оказались новыми."""
+        return sum(self.add_hash(product_hash(name)) for name in names)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def iter_hashes(self):
+        """Перечисляет хранимые хеши (например, чтобы передать множество в очередь работ)."""
+        return (value for value in self.table if value)
+
+    def memory_bytes(self) -> int:
+        """Размер таблицы и фильтра в байтах."""
+        return len(self.table) * 8 + (len(self.bloom) if self.bloom is not None else 0)
+
+    # --- Файл ---
+
+    def save(self, path: str) -> None:
+        """Атомарно записывает множество в файл (открытое через mmap копируется в память)."""
+        self._release_mmap()
+        with atomic_write(path, 'wb') as f:
+            bloom_size = len(self.bloom) if self.bloom is not None else 0
+            f.write(HEADER.pack(MAGIC, self.count, len(self.table), bloom_size, BLOOM_HASHES, 0))
+            f.write(self.table.tobytes())
+            if bloom_size:
+                f.write(self.bloom)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Открывает сохраненное множество через mmap (без чтения таблицы целиком).
+
+        Raises:
+            ValueError: Файл поврежден или другого формата.
+        """
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        try:
+            magic, count, capacity, bloom_size, bloom_hashes, _ = HEADER.unpack_from(mapped, 0)
+            if magic != MAGIC or bloom_hashes != BLOOM_HASHES \
+                    or len(mapped) != HEADER.size + capacity * 8 + bloom_size or capacity & (capacity - 1):
+                raise ValueError(f"Некорректный файл множества товаров: {path}")
+        except (struct.error, ValueError):
+            mapped.close()
+            raise ValueError(f"Некорректный файл множества товаров: {path}")
+
+        hashset = cls.__new__(cls)
+        hashset.count = count
+        view = memoryview(mapped)
+        hashset.table = view[HEADER.size:HEADER.size + capacity * 8].cast('Q')
+        hashset.bloom = view[HEADER.size + capacity * 8:] if bloom_size else None
+        hashset.bloom_bits = (bloom_size * 8) // max(1, int(capacity * MAX_LOAD)) if bloom_size else 0
+        hashset._mmap = (mapped, view)
+        return hashset
+
+    def _release_mmap(self) -> None:
+        """Копирует данные из mmap в память процесса и закрывает отображение."""
+        if self._mmap is None:
+            return
+        mapped, view = self._mmap
+        self.table = array('Q', self.table)
+        if self.bloom is not None:
+            self.bloom = bytearray(self.bloom)
+        view.release()
+        mapped.close()
+        self._mmap = None
+
+    def close(self) -> None:
+        """Закрывает mmap (данные при этом остаются доступны из памяти)."""
+        self._release_mmap()
@@ -7,8 +7,11 @@
 
 import json
 import os
+from collections import Counter
 from datetime import datetime
 
+from .keyword_coverage import analyze_coverage, output_files
+
 def load_keywords(keywords_file):
     """
     Загружает ключевые слова из файла.
@@ -59,9 +62,21 @@ def merge_keywords(existing_keywords, new_keywords, category_name):
     else:
         print(f"ℹ️ Новых ключевых слов для '{category_name}' не найдено")
 
-def analyze_keywords_effectiveness(keywords_file, other_file):
+def analyze_keywords_effectiveness(keywords_file, product_files=None, report_file=None, match='lemmas'):
     """
-    Анализирует эффективность ключевых слов.
+    Анализирует эффективность ключевых слов по всем файлам товаров за один проход
+    (utils/keyword_coverage.py): совпадения по ключевым словам, "мертвые" ключевые слова,
+    срабатывания негативных слов и конфликты подкатегорий.
+
+    Args:
+        keywords_file (str): Файл ключевых слов.
+        product_files (str | list[str]): Файл или файлы товаров (по умолчанию все .txt в output/).
+        report_file (str): Если задан, полный отчет сохраняется в JSON.
+        match (str): 'lemmas' — совпадения как у категоризатора; 'words' или 'substring' — быстрое
+            приближение по тексту названия (см. utils/keyword_coverage.py).
+
+    Returns:
+        dict | None: Отчет analyze_coverage.
     """
     print("📊 АНАЛИЗ ЭФФЕКТИВНОСТИ КЛЮЧЕВЫХ СЛОВ")
     print("="*50)
@@ -71,42 +86,43 @@ def analyze_keywords_effectiveness(keywords_file, other_file):
     
     if not keywords_data:
         print("❌ Ключевые слова не найдены")
-        return
+        return None
     
-    # Читаем товары из OTHER
-    if not os.path.exists(other_file):
-        print(f"❌ Файл {other_file} не найден")
-        return
+    if isinstance(product_files, str):
+        product_files = [product_files]
+    product_files = [path for path in (product_files or output_files()) if os.path.exists(path)]
+    if not product_files:
+        print("❌ Файлы товаров не найдены")
+        return None
     
-    with open(other_file, 'r', encoding='utf-8') as f:
-        other_products = [line.strip() for line in f.readlines() if line.strip()]
+    report = analyze_coverage(keywords_data, product_files, match)
+    print(f"📁 Проанализировано {report['products']} товаров из {len(product_files)} файлов")
+    if report.get('note'):
+        print(f"⚠️ {report['note']}")
     
-    print(f"📁 Анализирую {len(other_products)} товаров из OTHER")
+    for category, counts in sorted(report['categories'].items(), key=lambda item: -item[1]['matched']):
+        top_keywords = Counter(report['hits'][category]).most_common(5)
+        print(f"\n🎯 {category.upper()}:")
+        print(f"   📊 Найдено совпадений: {counts['matched']} (отсеяно негативными словами: {counts['vetoed']})")
+        print(f"   🔤 Самые частые ключевые слова: {[keyword for keyword, hits in top_keywords if hits]}")
+        if report['dead'].get(category):
+            print(f"   💀 Ни одного совпадения: {report['dead'][category]}")
     
-    # Анализируем каждую категорию
-    for category, data in keywords_data.items():
-        if category == 'other_analysis':
-            continue
-            
-        keywords = data['keywords']
-        matched_products = []
-        
-        for product in other_products:
-            product_lower = product.lower()
-            for keyword in keywords:
-                if keyword.lower() in product_lower:
-                    matched_products.append(product)
-                    break
-        
-        if matched_products:
-            print(f"\n🎯 {category.upper()}:")
-            print(f"   📊 Найдено совпадений: {len(matched_products)}")
-            print(f"   🔤 Ключевые слова: {keywords[:5]}...")  # Показываем первые 5
-            print(f"   📝 Примеры товаров: {matched_products[:3]}")  # Показываем первые 3
+    if report['conflicts']:
+        print("\n⚔️ Конфликты подкатегорий:")
+        for conflict in report['conflicts'][:10]:
+            print(f"   {' / '.join(conflict['categories'])}: {conflict['products']} товаров, "
+                  f"например: {conflict['examples'][:3]}")
     
     print(f"\n📈 Общая статистика:")
-    print(f"   📁 Всего товаров в OTHER: {len(other_products)}")
-    print(f"   🏷️ Всего категорий: {len(keywords_data)}")
+    print(f"   📁 Всего товаров: {report['products']}, без совпадений: {report['unmatched']}")
+    print(f"   🏷️ Всего категорий: {len(report['categories'])}")
+    
+    if report_file:
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"   💾 Отчет: {report_file}")
+    return report
 
 def suggest_keyword_improvements(keywords_file):
     """
@@ -145,10 +161,9 @@ def main():
     Основная функция для анализа ключевых слов.
     """
     keywords_file = "keywords/alcohol_keywords.json"
-    other_file = "output/GOODS/GROCERIES/BEVERAGES/rozetka_alcohol_other.txt"
     
-    # Анализируем эффективность
-    analyze_keywords_effectiveness(keywords_file, other_file)
+    # Анализируем эффективность по всем файлам output/
+    analyze_keywords_effectiveness(keywords_file, report_file="keywords/keyword_coverage_report.json")
     
     # Предлагаем улучшения
     suggest_keyword_improvements(keywords_file)
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Аудит покрытия ключевых слов по всем файлам товаров за один проход.
+
+Совпадения считаются так же, как их видит категоризатор (KeywordIndex.categorize):
+ключевое слово совпадает с леммой названия (--match lemmas, по умолчанию). Леммы берутся
+из компактного хранилища группы (колонка lemmas), а недостающие считаются lemmatize_batch
+на языке группы из config.json.
+
+Быстрое приближение без лемматизации: все ключевые слова компилируются в один автомат
+Ахо-Корасик (pyahocorasick, если установлен, иначе встроенная реализация), и название
+проверяется одним проходом по строке в нижнем регистре: --match words — вхождение целым
+словом, --match substring — любое вхождение. Приближение расходится с категоризатором:
+словоформы (uk/ru) не находят ключевое слово в начальной форме, а с substring ключевое
+слово находится и внутри других слов ("ром" в "кромка"). Отчет помечает это полем note.
+
+Отчет:
+- hits: сколько товаров содержит каждое ключевое слово;
+- dead: ключевые слова, не встретившиеся ни разу;
+- categories: товаров с совпадением по подкатегории и сколько из них отсеяно негативными словами;
+- vetoes: сколько раз каждое негативное слово отменило совпадение подкатегории;
+- conflicts: пары подкатегорий, совпавших в одном товаре (после негативных слов), с примерами;
+- files: товаров и товаров без единого совпадения по каждому файлу.
+
+Файлы обрабатываются параллельно в нескольких процессах.
+
+Примеры (из finpi_scraper/):
+    python -m utils.keyword_coverage                        # все файлы output/
+    python -m utils.keyword_coverage output/GOODS/**/rost_*.txt --match words --workers 4
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .clean_products import normalize_product_key
+from .lemmatizer import lemmatize_batch
+from .product_io import iter_products
+from .product_store import iter_latest, store_path_for_text_file
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick — необязательная зависимость
+    ahocorasick = None
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT_KEYWORDS_FILE = os.path.join(BASE_DIR, 'keywords', 'alcohol_keywords.json')
+DEFAULT_REPORT_PATH = os.path.join(BASE_DIR, 'keywords', 'keyword_coverage_report.json')
+DEFAULT_CONFIG_PATH = os.path.join(BASE_DIR, 'config.json')
+DEFAULT_LANG = 'uk'  # Язык файлов, группа которых не найдена в config.json
+MATCH_MODES = ('lemmas', 'words', 'substring')
+APPROXIMATION_NOTE = ("Приближение по тексту названия ({match}), а не по леммам, как KeywordIndex.categorize: "
+                      "словоформы не совпадают с ключевыми словами{substring}.")
+SKIP_CATEGORIES = ('other_analysis',)  # Служебные разделы файла ключевых слов
+CONFLICT_EXAMPLES = 5  # Примеров товаров на пару конфликтующих подкатегорий
+
+
+class PatternAutomaton:
+    """
+    Встроенный автомат Ахо-Корасик: iter(text) выдает (индекс конца, значение)
+    для каждого вхождения каждого шаблона, как pyahocorasick.Automaton.iter.
+    """
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+    def add_word(self, word: str, value) -> None:
+        state = 0
+        for char in word:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append(value)
+
+    def make_automaton(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def iter(self, text: str):
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for value in output[state]:
+                yield index, value
+
+
+def keyword_entries(keywords_data: dict):
+    """
+    Ключевые слова файла в нижнем регистре.
+
+    Yields:
+        tuple: (шаблон, подкатегория, 'positive' | 'negative').
+    """
+    for category, data in keywords_data.items():
+        if category in SKIP_CATEGORIES:
+            continue
+        positive = data if isinstance(data, list) else data.get('keywords', [])
+        negative = data.get('negative_keywords', []) if isinstance(data, dict) else []
+        for kind, keywords in (('positive', positive), ('negative', negative)):
+            for keyword in keywords:
+                if keyword.strip():
+                    yield keyword.strip().lower(), category, kind
+
+
+def keyword_targets(keywords_data: dict) -> dict:
+    """Шаблон → [(подкатегория, вид), ...]."""
+    patterns = defaultdict(list)
+    for pattern, category, kind in keyword_entries(keywords_data):
+        patterns[pattern].append((category, kind))
+    return dict(patterns)
+
+
+def build_automaton(keywords_data: dict):
+    """Автомат по всем шаблонам; значение — (шаблон, [(подкатегория, вид), ...])."""
+    patterns = keyword_targets(keywords_data)
+    automaton = ahocorasick.Automaton() if ahocorasick is not None else PatternAutomaton()
+    for pattern, targets in patterns.items():
+        automaton.add_word(pattern, (pattern, targets))
+    automaton.make_automaton()
+    return automaton
+
+
+def is_whole_word(text: str, end: int, length: int) -> bool:
+    start = end - length + 1
+    return (start == 0 or not text[start - 1].isalnum()) and (end + 1 == len(text) or not text[end + 1].isalnum())
+
+
+def new_stats() -> dict:
+    return {
+        "products": 0,
+        "hits": Counter(),  # (подкатегория, шаблон) → товаров
+        "vetoes": Counter(),  # (подкатегория, негативный шаблон) → отмененных совпадений
+        "category_hits": Counter(),  # подкатегория → товаров с положительным совпадением
+        "category_vetoed": Counter(),  # подкатегория → из них отсеяно негативными словами
+        "conflicts": Counter(),  # (подкатегория, подкатегория) → товаров
+        "conflict_examples": defaultdict(list),
+        "files": {},
+    }
+
+
+def text_matches(product: str, automaton, whole_words: bool):
+    """Совпадения по тексту названия: (шаблон, [(подкатегория, вид), ...])."""
+    text = product.lower()
+    for end, (pattern, targets) in automaton.iter(text):
+        if not whole_words or is_whole_word(text, end, len(pattern)):
+            yield pattern, targets
+
+
+def lemma_matches(lemmas, patterns: dict):
+    """Совпадения по леммам — как в KeywordIndex.categorize: лемма равна ключевому слову."""
+    for lemma in set(lemmas):
+        targets = patterns.get(lemma)
+        if targets:
+            yield lemma, targets
+
+
+def scan_products(products, match_product, stats: dict) -> tuple[int, int]:
+    """
+    Проверяет поток названий и дополняет stats.
+
+    Args:
+        products (Iterable[tuple[str, object]]): Пары (название, данные для match_product).
+        match_product (Callable): По паре выдает совпадения (шаблон, [(подкатегория, вид), ...]).
+
+    Returns:
+        tuple[int, int]: (товаров, товаров без положительных совпадений).
+    """
+    total = unmatched = 0
+    for product, data in products:
+        total += 1
+        positive, negative = defaultdict(set), defaultdict(set)
+        for pattern, targets in match_product(product, data):
+            for category, kind in targets:
+                (positive if kind == 'positive' else negative)[category].add(pattern)
+
+        if not positive:
+            unmatched += 1
+            continue
+        accepted = []
+        for category, patterns in positive.items():
+            stats["category_hits"][category] += 1
+            for pattern in patterns:
+                stats["hits"][(category, pattern)] += 1
+            if negative.get(category):
+                stats["category_vetoed"][category] += 1
+                for pattern in negative[category]:
+                    stats["vetoes"][(category, pattern)] += 1
+            else:
+                accepted.append(category)
+        accepted.sort()
+        for i, first in enumerate(accepted):
+            for second in accepted[i + 1:]:
+                stats["conflicts"][(first, second)] += 1
+                examples = stats["conflict_examples"][(first, second)]
+                if len(examples) < CONFLICT_EXAMPLES:
+                    examples.append(product)
+    stats["products"] += total
+    return total, unmatched
+
+
+def file_group(path: str):
+    """Префикс {site}_{group} файла подкатегории {site}_{group}_{subcategory}.txt."""
+    filename = os.path.basename(path)
+    return filename.rsplit('_', 1)[0] if '_' in filename else None
+
+
+def config_languages(config_path: str = DEFAULT_CONFIG_PATH) -> dict:
+    """{site}_{group} → язык группы по config.json (пустой словарь, если файла нет)."""
+    if not os.path.exists(config_path):
+        return {}
+    with open(config_path, 'r', encoding='utf-8') as f:
+        configs = json.load(f)
+    return {f"{config['site_name']}_{config.get('group', config['category_name'])}": config.get('language', 'en')
+            for config in configs}
+
+
+def iter_product_lemmas(path: str, lang: str, store_cache: dict):
+    """
+    Пары (название, леммы) для файла товаров: леммы из хранилища группы, если они там есть,
+    остальные названия лемматизируются пакетно.
+    """
+    products = list(iter_products(path))
+    store_file = store_path_for_text_file(path)
+    if store_file not in store_cache:
+        store_cache[store_file] = {
+            record["key"]: record["lemmas"] for record in iter_latest(store_file, ("key", "lemmas"))
+            if record["lemmas"] is not None
+        } if store_file and os.path.exists(store_file) else {}
+    stored = store_cache[store_file]
+    missing = [product for product in products if normalize_product_key(product) not in stored]
+    computed = dict(zip(missing, lemmatize_batch(missing, lang)))
+    for product in products:
+        lemmas = computed.get(product)
+        yield product, lemmas if lemmas is not None else stored[normalize_product_key(product)]
+
+
+_worker = {}
+
+
+def _init_worker(keywords_data: dict, match: str, lang: str, languages: dict) -> None:
+    _worker.update(match=match, lang=lang, languages=languages, stores={})
+    if match == 'lemmas':
+        patterns = keyword_targets(keywords_data)
+        _worker["match_product"] = lambda product, lemmas: lemma_matches(lemmas, patterns)
+    else:
+        automaton, whole_words = build_automaton(keywords_data), match == 'words'
+        _worker["match_product"] = lambda product, _: text_matches(product, automaton, whole_words)
+
+
+def _scan_file(path: str) -> dict:
+    stats = new_stats()
+    if _worker["match"] == 'lemmas':
+        lang = _worker["languages"].get(file_group(path), _worker["lang"])
+        products = iter_product_lemmas(path, lang, _worker["stores"])
+    else:
+        products = ((product, None) for product in iter_products(path))
+    total, unmatched = scan_products(products, _worker["match_product"], stats)
+    stats["files"][path] = {"products": total, "unmatched": unmatched}
+    stats["conflict_examples"] = dict(stats["conflict_examples"])
+    return stats
+
+
+def merge_stats(target: dict, source: dict) -> dict:
+    target["products"] += source["products"]
+    for key in ("hits", "vetoes", "category_hits", "category_vetoed", "conflicts"):
+        target[key].update(source[key])
+    for pair, examples in source["conflict_examples"].items():
+        merged = target["conflict_examples"][pair]
+        merged.extend(examples[:CONFLICT_EXAMPLES - len(merged)])
+    target["files"].update(source["files"])
+    return target
+
+
+def analyze_coverage(keywords_data: dict, files, match: str = 'lemmas', workers: int = None,
+                     lang: str = DEFAULT_LANG, languages: dict = None) -> dict:
+    """
+    Собирает статистику покрытия ключевых слов по файлам товаров.
+
+    Args:
+        files (list[str]): Файлы товаров.
+        match (str): 'lemmas' (как категоризатор), 'words' или 'substring' (приближение по тексту).
+        workers (int): Процессов для параллельной обработки (1 — в текущем процессе).
+        lang (str): Язык лемматизации файлов, группы которых нет в languages.
+        languages (dict): {site}_{group} → язык (по умолчанию из config.json).
+
+    Returns:
+        dict: Отчет (см. описание модуля), пригодный для json.dump.
+    """
+    if match not in MATCH_MODES:
+        raise ValueError(f"Неизвестный режим совпадений {match!r}: {', '.join(MATCH_MODES)}")
+    files = list(files)
+    languages = config_languages() if languages is None else languages
+    stats = new_stats()
+    workers = workers or min(len(files), os.cpu_count() or 1)
+    init_args = (keywords_data, match, lang, languages)
+    if workers <= 1 or len(files) <= 1:
+        _init_worker(*init_args)
+        for path in files:
+            merge_stats(stats, _scan_file(path))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            for file_stats in pool.map(_scan_file, files):
+                merge_stats(stats, file_stats)
+    return build_report(keywords_data, stats, match)
+
+
+def build_report(keywords_data: dict, stats: dict, match: str = 'lemmas') -> dict:
+    hits, vetoes = defaultdict(dict), defaultdict(dict)
+    dead_keywords, dead_negative = defaultdict(list), defaultdict(list)
+    for pattern, category, kind in keyword_entries(keywords_data):
+        counter, target, dead = (stats["hits"], hits, dead_keywords) if kind == 'positive' \
+            else (stats["vetoes"], vetoes, dead_negative)
+        count = counter[(category, pattern)]
+        target[category][pattern] = count
+        if not count:
+            dead[category].append(pattern)
+
+    categories = {
+        category: {"matched": stats["category_hits"][category], "vetoed": stats["category_vetoed"][category]}
+        for category in hits
+    }
+    conflicts = [
+        {"categories": list(pair), "products": count, "examples": stats["conflict_examples"][pair]}
+        for pair, count in stats["conflicts"].most_common()
+    ]
+    unmatched = sum(file_stats["unmatched"] for file_stats in stats["files"].values())
+    report = {
+        "match": match,
+        "products": stats["products"],
+        "unmatched": unmatched,
+        "categories": categories,
+        "hits": hits,
+        "vetoes": vetoes,
+        "dead": dict(dead_keywords),
+        "dead_negative": dict(dead_negative),
+        "conflicts": conflicts,
+        "files": stats["files"],
+    }
+    if match != 'lemmas':
+        report["note"] = APPROXIMATION_NOTE.format(
+            match=match, substring=", а ключевые слова находятся и внутри других слов" if match == 'substring' else "")
+    return report
+
+
+def output_files() -> list:
+    return sorted(glob.glob(os.path.join(BASE_DIR, 'output', '**', '*.txt'), recursive=True))
+
+
+def log_report(report: dict) -> None:
+    logging.info(f"📊 Товаров: {report['products']}, без совпадений: {report['unmatched']} (совпадения: {report['match']})")
+    if report.get('note'):
+        logging.warning(f"⚠️ {report['note']}")
+    for category, counts in sorted(report["categories"].items(), key=lambda item: -item[1]["matched"]):
+        logging.info(f"   🏷️ {category}: совпадений {counts['matched']}, отсеяно негативными {counts['vetoed']}")
+    dead_total = sum(len(keywords) for keywords in report["dead"].values())
+    logging.info(f"💀 Ключевых слов без единого совпадения: {dead_total}")
+    for category, keywords in report["dead"].items():
+        logging.info(f"   {category}: {', '.join(keywords)}")
+    for conflict in report["conflicts"][:10]:
+        logging.info(f"⚔️ {' / '.join(conflict['categories'])}: {conflict['products']} товаров, "
+                     f"например: {conflict['examples'][:2]}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Покрытие ключевых слов по файлам товаров")
+    parser.add_argument("files", nargs="*", help="Файлы товаров (по умолчанию все .txt в output/)")
+    parser.add_argument("--keywords", default=DEFAULT_KEYWORDS_FILE)
+    parser.add_argument("--report", default=DEFAULT_REPORT_PATH, help="Куда сохранить JSON-отчет")
+    parser.add_argument("--match", choices=MATCH_MODES, default='lemmas',
+                        help="lemmas — как категоризатор; words и substring — быстрое приближение по тексту")
+    parser.add_argument("--lang", default=DEFAULT_LANG, help="Язык файлов, группы которых нет в config.json")
+    parser.add_argument("--workers", type=int, default=None, help="Процессов (по умолчанию по числу ядер)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M')
+    args = parse_args(argv)
+    with open(args.keywords, 'r', encoding='utf-8') as f:
+        keywords_data = json.load(f)
+    files = args.files or output_files()
+    if not files:
+        logging.error("Файлы товаров не найдены")
+        return 1
+
+    report = analyze_coverage(keywords_data, files, args.match, args.workers, args.lang)
+    log_report(report)
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logging.info(f"💾 Отчет: {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
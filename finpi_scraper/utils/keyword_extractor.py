@@ -11,7 +11,9 @@ from collections import Counter
 from datetime import datetime
 import nltk
 from nltk.collocations import BigramAssocMeasures, BigramCollocationFinder
-from .lemmatizer import lemmatize_text
+from .lemmatizer import lemmatize_batch, lemmatize_text
+from .product_io import iter_products
+from .product_store import iter_latest, store_path_for_text_file
 
 # --- Глобальные переменные и настройки ---
 _stopwords = {}
@@ -45,9 +47,18 @@ def extract_keywords_from_products(products, lang, min_freq=2):
     """
     print(f"🔍 Анализирую {len(products)} товаров (язык: {lang})...")
     
+    return extract_keywords_from_lemmas((lemmatize_text(product, lang) for product in products), lang, min_freq)
+
+def extract_keywords_from_lemmas(lemma_lists, lang, min_freq=2):
+    """
+    То же, что extract_keywords_from_products, но по уже посчитанным леммам
+    (например, из колонки lemmas компактного хранилища).
+    Возвращает (potential_keywords, stopword_candidates)
+    """
     all_lemmas = []
-    for product in products:
-        lemmas = lemmatize_text(product, lang)
+    products_count = 0
+    for lemmas in lemma_lists:
+        products_count += 1
         filtered = [lemma for lemma in lemmas if lemma not in _stopwords.get(lang, set()) and len(lemma) > 2]
         all_lemmas.extend(filtered)
 
@@ -67,11 +78,11 @@ def extract_keywords_from_products(products, lang, min_freq=2):
         potential_keywords[phrase] = finder.ngram_fd[bg]
 
     # Обработка униграмм - могут быть и ключами, и стоп-словами
-    stopword_freq_threshold = len(products) * STOPWORD_SUGGESTION_THRESHOLD
+    stopword_freq_threshold = products_count * STOPWORD_SUGGESTION_THRESHOLD
     for word, count in unigram_freq.items():
         if count >= min_freq:
             # Если слово встречается СЛИШКОМ часто, это кандидат в стоп-слова
-            if count > stopword_freq_threshold and len(products) > 10: # Порог для больших выборок
+            if count > stopword_freq_threshold and products_count > 10: # Порог для больших выборок
                 stopword_candidates.append(word)
             else:
                 potential_keywords[word] = count
@@ -88,21 +99,36 @@ def extract_keywords_from_products(products, lang, min_freq=2):
 def analyze_other_products(other_file_path, lang='uk'):
     """
     Анализирует товары из файла OTHER. Возвращает (ключи, кандидаты в стоп-слова).
+    Если рядом есть компактное хранилище с леммами, берет леммы оттуда
+    и не лемматизирует названия заново.
     """
     if not os.path.exists(other_file_path):
         print(f"❌ Файл {other_file_path} не найден")
         return None, None
+
+    store_file = store_path_for_text_file(other_file_path)
+    if store_file and os.path.exists(store_file):
+        lemma_lists = [
+            record["lemmas"]
+            for record in iter_latest(store_file, ("subcategory", "lemmas"))
+            if record["subcategory"] == 'other' and record["lemmas"] is not None
+        ]
+        if lemma_lists:
+            print(f"📁 Найдено {len(lemma_lists)} товаров OTHER в хранилище {os.path.basename(store_file)}")
+            print(f"🔍 Анализирую {len(lemma_lists)} товаров (язык: {lang})...")
+            return extract_keywords_from_lemmas(lemma_lists, lang)
     
-    with open(other_file_path, 'r', encoding='utf-8') as f:
-        products = [line.strip() for line in f.readlines() if line.strip()]
+    # Потоковое чтение и пакетная лемматизация без загрузки файла в память
+    lemma_lists = list(lemmatize_batch(iter_products(other_file_path), lang))
     
-    if not products:
+    if not lemma_lists:
         print("📁 Файл OTHER пуст")
         return None, None
     
-    print(f"📁 Найдено {len(products)} товаров в файле OTHER")
+    print(f"📁 Найдено {len(lemma_lists)} товаров в файле OTHER")
+    print(f"🔍 Анализирую {len(lemma_lists)} товаров (язык: {lang})...")
     
-    return extract_keywords_from_products(products, lang)
+    return extract_keywords_from_lemmas(lemma_lists, lang)
 
 def update_suggested_stopwords(stopwords_file, suggestions):
     """
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Сравнение бэкендов лемматизации (utils/lemmatizer.py) со spaCy на наших файлах товаров.
+
+Для каждого названия леммы считаются эталоном (spaCy) и проверяемым бэкендом,
+отчет показывает:
+- exact: доля названий с полностью совпавшими леммами;
+- set: доля названий с совпавшими множествами лемм (именно множество идет в категоризацию);
+- tokens: доля совпавших лемм с учетом повторов;
+- category: доля названий, получивших ту же подкатегорию по файлу ключевых слов;
+- скорость обоих бэкендов (названий в секунду) и самые частые расхождения.
+
+С --build-lookup по разбору spaCy строится таблица keywords/lemma_lookup_{lang}.json
+для бэкенда lookup.
+
+Примеры (из finpi_scraper/):
+    python -m utils.lemma_agreement --lang uk --backend pymorphy
+    python -m utils.lemma_agreement --lang uk --build-lookup --backend lookup
+    python -m utils.lemma_agreement --lang ru --backend lookup output/GOODS/**/rost_*.txt --limit 5000
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+from collections import Counter
+from itertools import islice
+
+from .categorization import categorize_lemmas, compile_keywords
+from .lemmatizer import SpacyBackend, build_lookup_table, lookup_path, set_backend
+from .product_io import iter_products
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT_KEYWORDS_FILE = os.path.join(BASE_DIR, 'keywords', 'alcohol_keywords.json')
+TOP_DIFFERENCES = 15  # Сколько самых частых расхождений показывать
+
+
+def site_languages(config_path: str) -> dict:
+    """site_name → язык по config.json."""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return {config['site_name']: config.get('language', 'en') for config in json.load(f)}
+
+
+def default_files(lang: str) -> list:
+    """Файлы товаров в output/ для сайтов с языком lang."""
+    languages = site_languages(os.path.join(BASE_DIR, 'config.json'))
+    files = glob.glob(os.path.join(BASE_DIR, 'output', '**', '*.txt'), recursive=True)
+    return sorted(path for path in files if languages.get(os.path.basename(path).split('_', 1)[0]) == lang)
+
+
+def load_names(files, limit=None) -> list:
+    """Уникальные названия из файлов (не больше limit)."""
+    names = dict.fromkeys(name for path in files for name in iter_products(path))
+    return list(islice(names, limit))
+
+
+def agreement_report(reference, candidate, keyword_index=None) -> dict:
+    """
+    Сравнивает леммы двух бэкендов.
+
+    Args:
+        reference (list[list[str]]): Леммы эталона по названиям.
+        candidate (list[list[str]]): Леммы проверяемого бэкенда в том же порядке.
+        keyword_index (KeywordIndex): Если задан, сравниваются и подкатегории.
+
+    Returns:
+        dict: Доли совпадений и самые частые расхождения.
+    """
+    total = len(reference)
+    exact = same_set = same_category = matched_tokens = all_tokens = 0
+    missing, extra = Counter(), Counter()
+    for ref_lemmas, cand_lemmas in zip(reference, candidate):
+        exact += ref_lemmas == cand_lemmas
+        ref_set, cand_set = set(ref_lemmas), set(cand_lemmas)
+        same_set += ref_set == cand_set
+        ref_counts, cand_counts = Counter(ref_lemmas), Counter(cand_lemmas)
+        matched_tokens += sum((ref_counts & cand_counts).values())
+        all_tokens += max(len(ref_lemmas), len(cand_lemmas))
+        missing.update(ref_set - cand_set)
+        extra.update(cand_set - ref_set)
+        if keyword_index is not None:
+            same_category += categorize_lemmas(ref_set, keyword_index) == categorize_lemmas(cand_set, keyword_index)
+
+    def share(count, of):
+        return round(count / of, 4) if of else 1.0
+
+    report = {
+        "names": total,
+        "exact": share(exact, total),
+        "set": share(same_set, total),
+        "tokens": share(matched_tokens, all_tokens),
+        "missing": missing.most_common(TOP_DIFFERENCES),  # Леммы spaCy, которых нет у бэкенда
+        "extra": extra.most_common(TOP_DIFFERENCES),  # Леммы бэкенда, которых нет у spaCy
+    }
+    if keyword_index is not None:
+        report["category"] = share(same_category, total)
+    return report
+
+
+def timed_lemmatize(backend, names) -> tuple:
+    """Леммы всех названий и скорость бэкенда (названий в секунду)."""
+    start = time.perf_counter()
+    lemmas = list(backend.lemmatize_batch(names))
+    elapsed = time.perf_counter() - start
+    return lemmas, (len(names) / elapsed if elapsed else float('inf'))
+
+
+def log_report(report: dict, lang: str, backend_name: str) -> None:
+    logging.info(f"📏 {backend_name} против spaCy ({lang}), названий: {report['names']}")
+    logging.info(f"   exact {report['exact']:.1%} | set {report['set']:.1%} | tokens {report['tokens']:.1%}"
+                 + (f" | category {report['category']:.1%}" if 'category' in report else ""))
+    logging.info(f"   скорость: spaCy {report['spacy_names_per_sec']:.0f}/сек, "
+                 f"{backend_name} {report['backend_names_per_sec']:.0f}/сек "
+                 f"(x{report['speedup']:.1f})")
+    if report['missing']:
+        logging.info("   нет у бэкенда: " + ", ".join(f"{lemma} ({n})" for lemma, n in report['missing']))
+    if report['extra']:
+        logging.info("   лишние у бэкенда: " + ", ".join(f"{lemma} ({n})" for lemma, n in report['extra']))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Согласие бэкенда лемматизации со spaCy")
+    parser.add_argument("files", nargs="*", help="Файлы товаров (по умолчанию output/ для сайтов с языком --lang)")
+    parser.add_argument("--lang", default="uk")
+    parser.add_argument("--backend", default="pymorphy", help="Проверяемый бэкенд (pymorphy, lookup)")
+    parser.add_argument("--limit", type=int, default=None, help="Не больше стольких названий")
+    parser.add_argument("--keywords", default=DEFAULT_KEYWORDS_FILE, help="Файл ключевых слов для сравнения подкатегорий")
+    parser.add_argument("--build-lookup", action="store_true",
+                        help="Сначала построить keywords/lemma_lookup_{lang}.json по разбору spaCy")
+    parser.add_argument("--json", dest="json_path", help="Сохранить отчет в JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M')
+    args = parse_args(argv)
+    files = args.files or default_files(args.lang)
+    names = load_names(files, args.limit)
+    if not names:
+        logging.error(f"Нет названий для сравнения (язык '{args.lang}', файлов: {len(files)})")
+        return 1
+
+    if args.build_lookup:
+        table = build_lookup_table(names, args.lang)
+        with open(lookup_path(args.lang), 'w', encoding='utf-8') as f:
+            json.dump(table, f, ensure_ascii=False, indent=0, sort_keys=True)
+        logging.info(f"📚 Таблица лемм: {len(table)} словоформ → {lookup_path(args.lang)}")
+
+    backend = set_backend(args.lang, args.backend)
+    if backend.name != args.backend:
+        return 1
+    keyword_index = None
+    if args.keywords and os.path.exists(args.keywords):
+        with open(args.keywords, 'r', encoding='utf-8') as f:
+            keyword_index = compile_keywords(json.load(f))
+
+    reference, spacy_speed = timed_lemmatize(SpacyBackend(args.lang), names)
+    candidate, backend_speed = timed_lemmatize(backend, names)
+    report = agreement_report(reference, candidate, keyword_index)
+    report.update(lang=args.lang, backend=args.backend, files=len(files),
+                  spacy_names_per_sec=spacy_speed, backend_names_per_sec=backend_speed,
+                  speedup=backend_speed / spacy_speed if spacy_speed else 0.0)
+    log_report(report, args.lang, args.backend)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Инвертированный индекс "лемма → товары" по всем файлам output/ для инкрементальной
+перекатегоризации после правки файла ключевых слов.
+
+Индекс хранится в SQLite (по умолчанию output/lemma_index.db):
+- products: товар группы (сайт, группа, название), его подкатегория и леммы;
+- postings: лемма → id товаров;
+- files: mtime проиндексированных текстовых файлов (неизмененные файлы не перечитываются);
+- keyword_snapshots: содержимое файла ключевых слов на момент последнего применения.
+
+apply_keywords сравнивает файл ключевых слов с сохраненным снимком, переводит разницу
+в множество затронутых лемм и перекатегоризирует только товары с этими леммами —
+в том числе уже разложенные по подкатегориям (например, после добавления негативного
+ключевого слова). Товары, собранные с листингов конфигураций с sub_category (колонка
+source хранилища), не перекатегоризируются. Перемещенные товары переписываются между файлами подкатегорий
+и фиксируются в компактном хранилище (product_store). Новые названия лемматизируются
+при синхронизации один раз; леммы берутся из хранилища, если они там уже есть.
+
+Примеры (из finpi_scraper/):
+    python -m utils.lemma_index sync                 # обновить индекс по output/
+    python -m utils.lemma_index apply --dry-run      # что изменит правка ключевых слов
+    python -m utils.lemma_index apply                # применить и переложить товары
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import defaultdict
+
+from . import product_store
+from .categorization import compile_keywords
+from .clean_products import normalize_product_key
+from .lemmatizer import lemmatize_batch
+from .product_io import iter_products, rewrite_products, write_products
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT_INDEX_PATH = os.path.join(BASE_DIR, 'output', 'lemma_index.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site_name TEXT NOT NULL,
+    group_name TEXT NOT NULL,
+    name TEXT NOT NULL,
+    subcategory TEXT NOT NULL,
+    lemmas TEXT NOT NULL,
+    UNIQUE (site_name, group_name, name)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    lemma TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    PRIMARY KEY (lemma, product_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_product ON postings (product_id);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS keyword_snapshots (
+    keywords_file TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    applied_at REAL NOT NULL
+);
+"""
+
+
+def keyword_sets(data) -> tuple:
+    """(положительные, негативные) ключевые слова подкатегории в любом формате."""
+    positive = set(data if isinstance(data, list) else data.get('keywords', []))
+    negative = set(data.get('negative_keywords', []) if isinstance(data, dict) else [])
+    return positive, negative
+
+
+def affected_lemmas(old_keywords: dict, new_keywords: dict) -> set:
+    """
+    Леммы, у товаров с которыми может измениться подкатегория.
+
+    Учитываются добавленные и удаленные положительные и негативные слова, а также
+    добавленные, удаленные и переставленные подкатегории: порядок важен, побеждает
+    первая подходящая подкатегория, поэтому для переставленных берутся все их слова.
+    """
+    lemmas = set()
+    old_order = [name for name in old_keywords if name in new_keywords]
+    new_order = [name for name in new_keywords if name in old_keywords]
+    moved = {old for old, new in zip(old_order, new_order) if old != new}
+    for name in set(old_keywords) | set(new_keywords):
+        old_positive, old_negative = keyword_sets(old_keywords.get(name, []))
+        new_positive, new_negative = keyword_sets(new_keywords.get(name, []))
+        if name not in old_keywords or name not in new_keywords or name in moved:
+            lemmas |= old_positive | new_positive
+        else:
+            lemmas |= old_positive ^ new_positive
+        # Добавленное или удаленное негативное слово затрагивает только товары, в которых оно есть
+        lemmas |= old_negative ^ new_negative
+    return lemmas
+
+
+class LemmaIndex:
+    """
+    Инвертированный индекс поверх SQLite.
+
+    Args:
+        db_path (str): Путь к файлу индекса.
+    """
+    def __init__(self, db_path: str = DEFAULT_INDEX_PATH):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # --- Синхронизация с файлами output/ ---
+
+    def sync_group(self, output_path: str, site_name: str, group_name: str, lang: str) -> tuple[int, int]:
+        """
+        Приводит индекс группы в соответствие с файлами {site}_{group}_*.txt.
+        Файлы с прежним mtime пропускаются, лемматизируются только новые названия.
+
+        Returns:
+            tuple[int, int]: (добавлено или перемещено товаров, удалено товаров).
+        """
+        prefix = f"{site_name}_{group_name}_"
+        paths = sorted(glob.glob(os.path.join(output_path, f"{prefix}*.txt")))
+        file_prefix = os.path.join(output_path, prefix)
+        known_mtimes = {path: mtime for path, mtime in self.conn.execute("SELECT path, mtime_ns FROM files")
+                        if path.startswith(file_prefix)}
+        changed = [path for path in paths if known_mtimes.get(path) != os.stat(path).st_mtime_ns]
+        removed_files = set(known_mtimes) - set(paths)
+        if not changed and not removed_files:
+            return 0, 0
+
+        # Перечитываем всю группу: товар мог переехать из одного файла в другой
+        current = {}
+        for path in paths:
+            subcategory = os.path.basename(path)[len(prefix):-len('.txt')]
+            for name in iter_products(path):
+                current.setdefault(name, subcategory)
+        indexed = {name: (product_id, subcategory) for product_id, name, subcategory in self.conn.execute(
+            "SELECT id, name, subcategory FROM products WHERE site_name = ? AND group_name = ?",
+            (site_name, group_name))}
+
+        gone = [indexed[name][0] for name in indexed.keys() - current.keys()]
+        moved = [(subcategory, indexed[name][0]) for name, subcategory in current.items()
+                 if name in indexed and indexed[name][1] != subcategory]
+        new_names = [name for name in current if name not in indexed]
+        new_lemmas = self._lemmas_for(new_names, output_path, site_name, group_name, lang)
+
+        with self.conn:
+            self._delete(gone)
+            self.conn.executemany("UPDATE products SET subcategory = ? WHERE id = ?", moved)
+            for name, lemmas in zip(new_names, new_lemmas):
+                cursor = self.conn.execute(
+                    "INSERT INTO products (site_name, group_name, name, subcategory, lemmas) VALUES (?, ?, ?, ?, ?)",
+                    (site_name, group_name, name, current[name], json.dumps(lemmas, ensure_ascii=False)))
+                self.conn.executemany("INSERT OR IGNORE INTO postings (lemma, product_id) VALUES (?, ?)",
+                                      ((lemma, cursor.lastrowid) for lemma in set(lemmas)))
+            self.conn.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in removed_files))
+            self.touch_files(paths)
+        return len(new_names) + len(moved), len(gone)
+
+    def _lemmas_for(self, names, output_path, site_name, group_name, lang) -> list:
+        """Леммы новых названий: из хранилища, если они там есть, иначе пакетная лемматизация."""
+        if not names:
+            return []
+        wanted = set(names)
+        stored = {}
+        store_file = product_store.store_path(output_path, site_name, group_name)
+        for record in product_store.iter_latest(store_file, ("name", "lemmas")):
+            if record["name"] in wanted and record["lemmas"] is not None:
+                stored[record["name"]] = record["lemmas"]
+        missing = [name for name in names if name not in stored]
+        stored.update(zip(missing, lemmatize_batch(missing, lang)))
+        return [stored[name] for name in names]
+
+    def _delete(self, product_ids) -> None:
+        self.conn.executemany("DELETE FROM postings WHERE product_id = ?", ((pid,) for pid in product_ids))
+        self.conn.executemany("DELETE FROM products WHERE id = ?", ((pid,) for pid in product_ids))
+
+    def touch_files(self, paths) -> None:
+        """Запоминает текущий mtime файлов (после записи, уже учтенной в индексе)."""
+        self.conn.executemany("INSERT OR REPLACE INTO files (path, mtime_ns) VALUES (?, ?)",
+                              ((path, os.stat(path).st_mtime_ns) for path in paths if os.path.exists(path)))
+
+    # --- Запросы ---
+
+    def products_with_lemmas(self, lemmas, site_name: str, group_name: str) -> list:
+        """
+        Товары группы, в леммах которых есть хотя бы одна из lemmas.
+
+        Returns:
+            list[tuple]: (id, название, подкатегория, леммы).
+        """
+        rows = {}
+        for lemma in lemmas:
+            for product_id, name, subcategory, lemma_json in self.conn.execute(
+                    "SELECT p.id, p.name, p.subcategory, p.lemmas FROM postings JOIN products p ON p.id = product_id "
+                    "WHERE lemma = ? AND p.site_name = ? AND p.group_name = ?", (lemma, site_name, group_name)):
+                if product_id not in rows:
+                    rows[product_id] = (product_id, name, subcategory, json.loads(lemma_json))
+        return [rows[product_id] for product_id in sorted(rows)]
+
+    def products_with_subcategories(self, subcategories, site_name: str, group_name: str) -> list:
+        """Товары группы из перечисленных подкатегорий (в том же формате, что products_with_lemmas)."""
+        rows = []
+        for subcategory in subcategories:
+            rows.extend((pid, name, sub, json.loads(lemmas)) for pid, name, sub, lemmas in self.conn.execute(
+                "SELECT id, name, subcategory, lemmas FROM products WHERE site_name = ? AND group_name = ? "
+                "AND subcategory = ?", (site_name, group_name, subcategory)))
+        return rows
+
+    def set_subcategories(self, changes) -> None:
+        """changes: [(новая подкатегория, id товара), ...]."""
+        with self.conn:
+            self.conn.executemany("UPDATE products SET subcategory = ? WHERE id = ?", changes)
+
+    def count_products(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    # --- Снимки файлов ключевых слов ---
+
+    def get_snapshot(self, keywords_file: str):
+        row = self.conn.execute("SELECT content FROM keyword_snapshots WHERE keywords_file = ?",
+                                (keywords_file,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_snapshot(self, keywords_file: str, keywords: dict) -> None:
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO keyword_snapshots (keywords_file, content, applied_at) "
+                              "VALUES (?, ?, ?)", (keywords_file, json.dumps(keywords, ensure_ascii=False), time.time()))
+
+
+def move_products(output_path: str, site_name: str, group_name: str, moves) -> list:
+    """
+    Переносит товары между файлами подкатегорий группы.
+
+    Args:
+        moves (list[tuple]): (название, старая подкатегория, новая подкатегория).
+
+    Returns:
+        list[str]: Затронутые файлы.
+    """
+    removals, additions = defaultdict(set), defaultdict(list)
+    for name, old_subcategory, new_subcategory in moves:
+        removals[old_subcategory].add(name)
+        additions[new_subcategory].append(name)
+
+    def path_for(subcategory):
+        return os.path.join(output_path, f"{site_name}_{group_name}_{subcategory}.txt")
+
+    touched = []
+    for subcategory, names in removals.items():
+        if os.path.exists(path_for(subcategory)):
+            rewrite_products(path_for(subcategory), lambda line, names=names: None if line in names else line)
+            touched.append(path_for(subcategory))
+    for subcategory, names in additions.items():
+        path = path_for(subcategory)
+        existing = list(iter_products(path)) if os.path.exists(path) else []
+        present = set(existing)
+        write_products(path, existing + [name for name in names if name not in present])
+        touched.append(path)
+    return touched
+
+
+def apply_keywords(index: LemmaIndex, keywords_file: str, groups, full: bool = False, dry_run: bool = False) -> dict:
+    """
+    Применяет текущий файл ключевых слов к уже собранным товарам групп.
+
+    Args:
+        keywords_file (str): Путь к файлу ключевых слов (как в config.json).
+        groups (list[tuple]): (site_name, group_name, output_path, lang) групп, использующих этот файл.
+        full (bool): Перепроверить все товары групп, а не только затронутые правкой.
+        dry_run (bool): Только посчитать перемещения, ничего не меняя.
+
+    Returns:
+        dict: {"affected": товаров проверено, "moved": перемещено, "moves": {"old → new": N}}.
+    """
+    with open(os.path.join(BASE_DIR, keywords_file), 'r', encoding='utf-8') as f:
+        new_keywords = json.load(f)
+    old_keywords = index.get_snapshot(keywords_file)
+    if old_keywords is None and not full:
+        # Первое применение: считаем, что файлы уже соответствуют текущим ключевым словам
+        if not dry_run:
+            index.save_snapshot(keywords_file, new_keywords)
+        logging.info(f"📸 Сохранен исходный снимок {keywords_file}; следующая правка применится инкрементально")
+        return {"affected": 0, "moved": 0, "moves": {}}
+
+    keyword_index = compile_keywords(new_keywords)
+    lemmas = None if full else affected_lemmas(old_keywords, new_keywords)
+    # Товары из исчезнувших подкатегорий проверяются всегда
+    stale = set(old_keywords or {}) - set(new_keywords)
+
+    summary = {"affected": 0, "moved": 0, "moves": defaultdict(int)}
+    for site_name, group_name, output_path, lang in groups:
+        if lemmas is None:
+            candidates = index.conn.execute(
+                "SELECT id, name, subcategory, lemmas FROM products WHERE site_name = ? AND group_name = ?",
+                (site_name, group_name)).fetchall()
+            candidates = [(pid, name, sub, json.loads(lemma_json)) for pid, name, sub, lemma_json in candidates]
+        else:
+            candidates = {row[0]: row for row in index.products_with_lemmas(lemmas, site_name, group_name)}
+            candidates.update((row[0], row) for row in index.products_with_subcategories(stale, site_name, group_name))
+            candidates = list(candidates.values())
+        # Товары с листингов конфигураций с sub_category назначены без ключевых слов — их не трогаем
+        store_file = product_store.store_path(output_path, site_name, group_name)
+        sources = product_store.load_sources(store_file)
+        candidates = [row for row in candidates if normalize_product_key(row[1]) not in sources]
+        summary["affected"] += len(candidates)
+
+        changes, moves = [], []
+        for product_id, name, subcategory, product_lemmas in candidates:
+            new_subcategory = keyword_index.categorize(set(product_lemmas))
+            if new_subcategory != subcategory:
+                changes.append((new_subcategory, product_id))
+                moves.append((name, subcategory, new_subcategory, product_lemmas))
+                summary["moves"][f"{subcategory} → {new_subcategory}"] += 1
+        summary["moved"] += len(moves)
+        if dry_run or not moves:
+            continue
+
+        touched = move_products(output_path, site_name, group_name, [move[:3] for move in moves])
+        index.set_subcategories(changes)
+        with index.conn:
+            index.touch_files(touched)
+        if os.path.exists(store_file):
+            product_store.append_records(store_file, [
+                product_store.make_record(name, site_name, group_name, new_subcategory, product_lemmas)
+                for name, _, new_subcategory, product_lemmas in moves
+            ])
+
+    if not dry_run:
+        index.save_snapshot(keywords_file, new_keywords)
+    summary["moves"] = dict(summary["moves"])
+    return summary
+
+
+def keyword_groups(config_path: str) -> dict:
+    """
+    Группы, использующие каждый файл ключевых слов, по config.json.
+
+    Returns:
+        dict: keywords_file → [(site_name, group_name, output_path, lang), ...].
+    """
+    with open(config_path, 'r', encoding='utf-8') as f:
+        configs = json.load(f)
+    groups = defaultdict(dict)
+    for config in configs:
+        keywords_file = config.get('external_keywords_file')
+        if not keywords_file:
+            continue
+        key = (config['site_name'], config.get('group', config['category_name']))
+        output_path = os.path.join(BASE_DIR, 'output', config['category_path'])
+        groups[keywords_file].setdefault(key, (*key, output_path, config.get('language', 'en')))
+    return {keywords_file: list(by_group.values()) for keywords_file, by_group in groups.items()}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Инвертированный индекс лемм и инкрементальная перекатегоризация")
+    parser.add_argument("command", choices=["sync", "apply"])
+    parser.add_argument("--keywords", help="Только этот файл ключевых слов (путь как в config.json)")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Файл индекса SQLite")
+    parser.add_argument("--full", action="store_true", help="Перепроверить все товары, а не только затронутые")
+    parser.add_argument("--dry-run", action="store_true", help="Показать перемещения, не меняя файлы")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M')
+    args = parse_args(argv)
+    by_keywords = keyword_groups(os.path.join(BASE_DIR, 'config.json'))
+    if args.keywords:
+        by_keywords = {args.keywords: by_keywords.get(args.keywords, [])}
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.index)), exist_ok=True)
+    with LemmaIndex(args.index) as index:
+        for keywords_file, groups in by_keywords.items():
+            for site_name, group_name, output_path, lang in groups:
+                added, removed = index.sync_group(output_path, site_name, group_name, lang)
+                if added or removed:
+                    logging.info(f"🗂️ [{site_name} - {group_name}] индекс: +{added}, -{removed}")
+            if args.command == "apply":
+                summary = apply_keywords(index, keywords_file, groups, args.full, args.dry_run)
+                logging.info(f"🔁 {keywords_file}: проверено {summary['affected']}, перемещено {summary['moved']}"
+                             + (" (dry run)" if args.dry_run else ""))
+                for move, count in sorted(summary["moves"].items(), key=lambda item: -item[1]):
+                    logging.info(f"   {move}: {count}")
+        logging.info(f"📚 Товаров в индексе: {index.count_products()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,9 +1,36 @@
 # finpi_scraper/utils/lemmatizer.py
-import spacy
+"""
+Лемматизация названий товаров с выбором бэкенда по языку.
+
+- spacy (по умолчанию): статистические модели spaCy, самый точный и самый медленный путь;
+- pymorphy: морфологический словарь pymorphy3/pymorphy2 (uk, ru) поверх простого токенизатора;
+- lookup: таблица "словоформа → лемма" (keywords/lemma_lookup_{lang}.json, строится
+  из результатов spaCy на наших файлах: python -m utils.lemma_agreement --build-lookup).
+
+Словарные бэкенды кэшируют лемму каждого токена — в названиях товаров одни и те же
+слова повторяются тысячи раз. Бэкенд выбирается переменной окружения FINPI_LEMMATIZER
+("uk=pymorphy,ru=lookup") или set_backend(); если бэкенд недоступен, используется spaCy.
+Насколько бэкенд расходится со spaCy на реальных данных, показывает utils/lemma_agreement.py.
+"""
+import json
 import logging
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+
+import spacy
 
-# Загружаем модели один раз при старте, чтобы избежать повторной загрузки
-# Это может занять несколько секунд при первом импорте модуля
+try:
+    import pymorphy3 as pymorphy
+except ImportError:  # pymorphy3 (или pymorphy2) — необязательная зависимость
+    try:
+        import pymorphy2 as pymorphy
+    except ImportError:
+        pymorphy = None
+
+# Модели загружаются лениво, при первом обращении к языку, и дальше переиспользуются:
+# процесс, работающий с одним языком, не платит за загрузку остальных
 NLP_MODELS = {}
 MODEL_NAMES = {
     "en": "en_core_web_sm",
@@ -11,16 +38,187 @@ MODEL_NAMES = {
     "uk": "uk_core_news_sm",
     "ru": "ru_core_news_sm",
 }
+_MISSING_MODELS = set()
+_load_lock = threading.Lock()
+
+LOOKUP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'keywords')
+TOKEN_CACHE_SIZE = 200000  # Сколько лемм токенов держать в кэше словарного бэкенда
+# Слова (с апострофом внутри, как в украинском "пʼять") и числа — аналог token.is_alpha / token.is_digit
+TOKEN_RE = re.compile(r"[^\W\d_]+(?:['’ʼ][^\W\d_]+)*|\d+")
+
+def get_nlp(lang: str):
+    """
+    Возвращает модель spaCy для языка, загружая ее при первом обращении.
+
+    Returns:
+        spacy.Language | None: Модель или None, если она не установлена.
+    """
+    if lang in NLP_MODELS:
+        return NLP_MODELS[lang]
+    if lang in _MISSING_MODELS or lang not in MODEL_NAMES:
+        return None
+    with _load_lock:
+        if lang not in NLP_MODELS and lang not in _MISSING_MODELS:
+            model_name = MODEL_NAMES[lang]
+            try:
+                NLP_MODELS[lang] = spacy.load(model_name)
+                logging.info(f"Загружена NLP модель для языка: '{lang}'")
+            except OSError:
+                _MISSING_MODELS.add(lang)
+                logging.error(
+                    f"Не удалось загрузить модель spaCy '{model_name}'. "
+                    f"Пожалуйста, скачайте ее командой: python -m spacy download {model_name}"
+                )
+    return NLP_MODELS.get(lang)
+
+def tokenize(text: str) -> list[str]:
+    """Простой токенизатор для словарных бэкендов: слова и числа в нижнем регистре."""
+    return TOKEN_RE.findall(text.lower())
+
+
+class SpacyBackend:
+    """Статистическая модель spaCy (tagger + lemmatizer)."""
+    name = "spacy"
+
+    def __init__(self, lang: str):
+        self.lang = lang
 
-for lang, model_name in MODEL_NAMES.items():
+    def lemmatize_batch(self, texts, batch_size: int = 256):
+        nlp = get_nlp(self.lang)
+        if nlp is None:
+            logging.warning(f"Модель для языка '{self.lang}' не найдена. Лемматизация пропущена.")
+            # Возвращаем просто слова в нижнем регистре, если нет модели
+            for text in texts:
+                yield text.lower().split()
+            return
+
+        for doc in nlp.pipe(texts, batch_size=batch_size):
+            # Лемма для каждого токена, если это слово или число
+            yield [
+                token.lemma_.lower()
+                for token in doc
+                if token.is_alpha or token.is_digit
+            ]
+
+
+class TokenBackend(ABC):
+    """
+    Основа словарных бэкендов: токенизатор TOKEN_RE и кэш "токен → лемма".
+    Наследники реализуют lemmatize_token.
+    """
+    name = None
+
+    def __init__(self, lang: str):
+        self.lang = lang
+        self.cache = {}
+
+    @abstractmethod
+    def lemmatize_token(self, token: str) -> str:
+        """Лемма одного токена (токены уже в нижнем регистре, см. tokenize)."""
+        pass
+
+    def lemma(self, token: str) -> str:
+        lemma = self.cache.get(token)
+        if lemma is None:
+            if len(self.cache) >= TOKEN_CACHE_SIZE:
+                self.cache.clear()
+            lemma = self.cache[token] = self.lemmatize_token(token)
+        return lemma
+
+    def lemmatize_batch(self, texts, batch_size: int = 256):
+        lemma = self.lemma
+        for text in texts:
+            yield [lemma(token) for token in tokenize(text)]
+
+
+class PymorphyBackend(TokenBackend):
+    """Морфологический словарь pymorphy (нужны pymorphy3 и словари языка, например pymorphy3-dicts-uk)."""
+    name = "pymorphy"
+
+    def __init__(self, lang: str):
+        super().__init__(lang)
+        if pymorphy is None:
+            raise ImportError("Для бэкенда pymorphy установите pymorphy3: pip install pymorphy3 pymorphy3-dicts-uk")
+        self.morph = pymorphy.MorphAnalyzer(lang=lang)
+
+    def lemmatize_token(self, token: str) -> str:
+        if token.isdigit():
+            return token
+        return self.morph.parse(token)[0].normal_form
+
+
+class LookupBackend(TokenBackend):
+    """
+    Таблица "словоформа → лемма" из JSON-файла. Неизвестные слова остаются как есть.
+
+    Args:
+        path (str): Файл таблицы (по умолчанию keywords/lemma_lookup_{lang}.json).
+    """
+    name = "lookup"
+
+    def __init__(self, lang: str, path: str = None):
+        super().__init__(lang)
+        self.path = path or lookup_path(lang)
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Нет таблицы лемм {self.path}: постройте ее через "
+                                    f"python -m utils.lemma_agreement --lang {lang} --build-lookup")
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.table = json.load(f)
+
+    def lemmatize_token(self, token: str) -> str:
+        return self.table.get(token, token)
+
+
+BACKEND_CLASSES = {
+    "spacy": SpacyBackend,
+    "pymorphy": PymorphyBackend,
+    "lookup": LookupBackend,
+}
+DEFAULT_BACKEND = "spacy"
+_backends = {}  # lang → экземпляр бэкенда
+
+
+def lookup_path(lang: str) -> str:
+    return os.path.join(LOOKUP_DIR, f"lemma_lookup_{lang}.json")
+
+
+def parse_backend_setting(value: str) -> dict:
+    """Разбирает FINPI_LEMMATIZER: "uk=pymorphy,ru=lookup" → {"uk": "pymorphy", "ru": "lookup"}."""
+    selection = {}
+    for item in (value or "").split(','):
+        if '=' in item:
+            lang, name = (part.strip() for part in item.split('=', 1))
+            if lang and name:
+                selection[lang] = name
+    return selection
+
+
+def set_backend(lang: str, name: str):
+    """
+    Выбирает бэкенд для языка. Если он недоступен (нет пакета или таблицы), остается spaCy.
+
+    Returns:
+        Бэкенд, который будет использоваться.
+    """
+    if name not in BACKEND_CLASSES:
+        raise ValueError(f"Неизвестный бэкенд лемматизации '{name}'. Доступны: {', '.join(BACKEND_CLASSES)}")
     try:
-        NLP_MODELS[lang] = spacy.load(model_name)
-        logging.info(f"Загружена NLP модель для языка: '{lang}'")
-    except OSError:
-        logging.error(
-            f"Не удалось загрузить модель spaCy '{model_name}'. "
-            f"Пожалуйста, скачайте ее командой: python -m spacy download {model_name}"
-        )
+        backend = BACKEND_CLASSES[name](lang)
+    except (ImportError, OSError, ValueError, KeyError) as e:
+        logging.warning(f"Бэкенд лемматизации '{name}' для '{lang}' недоступен ({e}). Использую spaCy.")
+        backend = SpacyBackend(lang)
+    _backends[lang] = backend
+    return backend
+
+
+def get_backend(lang: str):
+    """Бэкенд языка: из FINPI_LEMMATIZER при первом обращении, иначе spaCy."""
+    backend = _backends.get(lang)
+    if backend is None:
+        name = parse_backend_setting(os.getenv("FINPI_LEMMATIZER")).get(lang, DEFAULT_BACKEND)
+        backend = set_backend(lang, name)
+    return backend
+
 
 def lemmatize_text(text: str, lang: str) -> list[str]:
     """
@@ -33,21 +231,39 @@ def lemmatize_text(text: str, lang: str) -> list[str]:
     Returns:
         list[str]: Список лемм (базовых форм слов).
     """
-    if lang not in NLP_MODELS:
-        logging.warning(f"Модель для языка '{lang}' не найдена. Лемматизация пропущена.")
-        # Возвращаем просто слова в нижнем регистре, если нет модели
-        return text.lower().split()
-
-    doc = NLP_MODELS[lang](text)
-    
-    # Возвращаем лемму для каждого токена, если это слово или число
-    lemmas = [
-        token.lemma_.lower() 
-        for token in doc 
-        if token.is_alpha or token.is_digit
-    ]
-    
-    return lemmas
+    return next(get_backend(lang).lemmatize_batch([text]))
+
+def lemmatize_batch(texts, lang: str, batch_size: int = 256):
+    """
+    Пакетная лемматизация потока текстов: для spaCy через nlp.pipe (заметно быстрее,
+    чем вызывать lemmatize_text для каждого названия), для словарных бэкендов — с кэшем токенов.
+
+    Args:
+        texts (Iterable[str]): Тексты (можно ленивый поток).
+        lang (str): Код языка ('en', 'de', 'uk', 'ru').
+        batch_size (int): Размер пачки для spaCy.
+
+    Yields:
+        list[str]: Леммы очередного текста (в том же порядке, что и texts).
+    """
+    yield from get_backend(lang).lemmatize_batch(texts, batch_size)
+
+def build_lookup_table(texts, lang: str, batch_size: int = 256) -> dict:
+    """
+    Строит таблицу "словоформа → лемма" по разбору spaCy: для каждой формы берется
+    самая частая лемма. Результат используется бэкендом lookup.
+    """
+    from collections import Counter, defaultdict
+
+    nlp = get_nlp(lang)
+    if nlp is None:
+        raise OSError(f"Для построения таблицы нужна модель spaCy '{MODEL_NAMES.get(lang, lang)}'")
+    counts = defaultdict(Counter)
+    for doc in nlp.pipe(texts, batch_size=batch_size):
+        for token in doc:
+            if token.is_alpha:
+                counts[token.lower_][token.lemma_.lower()] += 1
+    return {form: lemmas.most_common(1)[0][0] for form, lemmas in sorted(counts.items())}
 
 def lemmatize_keywords(keywords: list[str], lang: str) -> list[str]:
     """
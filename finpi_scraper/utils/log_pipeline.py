@@ -0,0 +1,165 @@
+# finpi_scraper/utils/log_pipeline.py
+"""
+Неблокирующее логирование для асинхронного краулера.
+
+- Корневой логгер получает только QueueHandler: вызов logging.info из event loop
+  кладет запись в очередь, а запись в scraper.log и консоль выполняет QueueListener
+  в фоновом потоке.
+- RateLimitFilter ограничивает частоту однотипных сообщений (token bucket на тип):
+  тип — поле event из extra, а без него — место вызова (файл и строка). Лишние записи
+  отбрасываются до постановки в очередь, их количество дописывается к следующей
+  пропущенной записи того же типа (suppressed=N). Записи без event ограничиваются только
+  на уровне INFO и ниже: разовые предупреждения и ошибки не теряются. Не ограничиваются
+  и события с результатами запуска (UNLIMITED_EVENTS: сохраненные файлы, страницы с новыми
+  товарами) — ограничение касается загрузки страниц (page_fetched, page_retry). Объем лога
+  не растет вместе с параллельностью.
+- Структурные поля из extra (site, group, page, latency_ms, ...) выводятся в конце строки:
+  logging.info("...", extra={"site": "rost", "page": 3, "latency_ms": 412}).
+
+Лимит настраивается переменными FINPI_LOG_RATE (сообщений одного типа в секунду)
+и FINPI_LOG_BURST (запас на всплеск); FINPI_LOG_RATE=0 отключает ограничение.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+DEFAULT_RATE = 5.0  # Сообщений одного типа в секунду
+DEFAULT_BURST = 20  # Сколько однотипных сообщений проходит подряд до ограничения
+STRUCTURED_FIELDS = ('site', 'group', 'category', 'page', 'status', 'latency_ms', 'count', 'attempt', 'suppressed')
+LOG_FORMAT = '%(asctime)s - [%(levelname)s] - %(message)s%(fields)s'
+# События с результатами запуска: по одному на файл подкатегории и на страницу с новыми товарами
+UNLIMITED_EVENTS = frozenset({'file_saved', 'page_parsed'})
+
+_listener = None
+_listener_started = False  # Запущен ли поток _listener (без обращения к приватному QueueListener._thread)
+_rate_filter = None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket на тип сообщения.
+
+    Args:
+        rate (float): Пополнение в сообщениях в секунду; 0 — без ограничения.
+        burst (int): Емкость ведра.
+        max_level (int): Записи выше этого уровня без event не ограничиваются.
+    """
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST, max_level: int = logging.INFO):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.max_level = max_level
+        self.buckets = {}  # тип → [токены, время последнего пополнения, отброшено]
+        self.lock = threading.Lock()
+
+    def message_type(self, record):
+        event = getattr(record, 'event', None)
+        if event in UNLIMITED_EVENTS:
+            return None
+        if event is not None:
+            return event
+        if record.levelno > self.max_level:
+            return None
+        return record.pathname, record.lineno
+
+    def filter(self, record) -> bool:
+        if not self.rate:
+            return True
+        key = self.message_type(record)
+        if key is None:
+            return True
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = [float(self.burst), now, 0]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+    def suppressed_total(self) -> int:
+        """Отброшенные записи, еще не отраженные в логе."""
+        with self.lock:
+            return sum(bucket[2] for bucket in self.buckets.values())
+
+
+class StructuredFormatter(logging.Formatter):
+    """Дописывает к сообщению структурные поля записи: ' | site=rost page=3 latency_ms=412'."""
+    def format(self, record) -> str:
+        fields = [f"{name}={getattr(record, name)}" for name in STRUCTURED_FIELDS if getattr(record, name, None) is not None]
+        record.fields = f" | {' '.join(fields)}" if fields else ''
+        return super().format(record)
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        logging.warning(f"Некорректное значение {name}, используется {default}")
+        return default
+
+
+def start_logging(handlers, level: int = logging.INFO, rate: float = None, burst: int = None) -> QueueListener:
+    """
+    Переключает корневой логгер на очередь: handlers обслуживаются фоновым потоком.
+
+    Args:
+        handlers (list[logging.Handler]): Конечные обработчики (файл, консоль).
+        rate (float): Лимит однотипных сообщений в секунду (по умолчанию FINPI_LOG_RATE).
+        burst (int): Запас на всплеск (по умолчанию FINPI_LOG_BURST).
+
+    Returns:
+        QueueListener: Запущенный слушатель (останавливается stop_logging или при выходе).
+    """
+    global _listener, _listener_started, _rate_filter
+    stop_logging()
+    rate = _env_number("FINPI_LOG_RATE", DEFAULT_RATE) if rate is None else rate
+    burst = int(_env_number("FINPI_LOG_BURST", DEFAULT_BURST)) if burst is None else burst
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    _rate_filter = RateLimitFilter(rate, burst)
+    queue_handler.addFilter(_rate_filter)
+    root_logger = logging.getLogger()
+    root_logger.handlers = [queue_handler]
+    root_logger.setLevel(level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    _listener_started = True
+    return _listener
+
+
+def flush_logging() -> None:
+    """Дожидается записи всех сообщений из очереди (слушатель продолжает работу)."""
+    if _listener is not None and _listener_started:
+        _listener.stop()
+        _listener.start()
+
+
+def stop_logging() -> None:
+    """Дописывает очередь и останавливает фоновый поток."""
+    global _listener, _listener_started, _rate_filter
+    if _rate_filter is not None and _rate_filter.suppressed_total():
+        logging.info(f"🔇 Отброшено однотипных сообщений (FINPI_LOG_RATE): {_rate_filter.suppressed_total()}")
+    listener, started = _listener, _listener_started
+    _listener, _listener_started, _rate_filter = None, False, None
+    if listener is not None and started:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.flush()
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Быстрый первый проход категоризации без лемматизации.
+
+Названия превращаются в хешированные символьные n-граммы (2–4 символа, 2^18 признаков),
+линейная модель (softmax) обучается офлайн на товарах, уже разложенных по файлам
+подкатегорий в output/. Пачка названий классифицируется NumPy за один проход;
+в путь "лемматизация + ключевые слова" уходят только названия, в которых модель
+не уверена (вероятность ниже порога), и все, что модель относит к 'other'.
+
+Порог подбирается при обучении: наименьший, при котором на отложенной выборке уверенные
+ответы совпадают с категоризатором по ключевым словам не реже TARGET_AGREEMENT.
+Модель привязана к содержимому файла ключевых слов (keywords/ngram_model_<отпечаток>.npz):
+после правки ключевых слов старая модель просто не используется, пока не обучена новая.
+
+NumPy — необязательная зависимость (ставится вместе со spaCy); без нее первый проход отключен.
+
+Примеры (из finpi_scraper/):
+    python -m utils.ngram_classifier train --keywords keywords/alcohol_keywords.json
+    python -m utils.ngram_classifier evaluate --keywords keywords/alcohol_keywords.json --json report.json
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+import zlib
+
+from .categorization import categorize_lemmas, compile_keywords
+from .lemmatizer import lemmatize_batch
+from .product_io import iter_products
+
+try:
+    import numpy as np
+except ImportError:  # numpy — необязательная зависимость
+    np = None
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+KEYWORDS_DIR = os.path.join(BASE_DIR, 'keywords')
+DEFAULT_KEYWORDS_FILE = 'keywords/alcohol_keywords.json'
+NGRAM_SIZES = (2, 3, 4)
+FEATURE_BITS = 18  # 2^18 хешированных признаков
+MAX_CHARS = 96  # Длиннее названия обрезаются (ширина матрицы символов пачки)
+PREDICT_BATCH = 4096  # Названий в одной матричной операции
+HOLDOUT_SHARE = 10  # Каждое 10-е (по хешу) название — отложенная выборка
+TARGET_AGREEMENT = 0.99  # Требуемое совпадение уверенных ответов с ключевыми словами
+THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.97, 0.99)
+FALLBACK_LABEL = 'other'  # Этот ответ модели всегда перепроверяется ключевыми словами
+
+_HASH_STEP = 0x100000001B3  # FNV prime
+_HASH_MIX = 0x9E3779B97F4A7C15  # Мультипликативное хеширование: старшие биты хорошо перемешаны
+
+_classifiers = {}  # путь модели → (mtime_ns, классификатор)
+
+
+def keywords_fingerprint(subcategory_keywords: dict) -> str:
+    """Отпечаток содержимого файла ключевых слов (к нему привязана модель)."""
+    payload = json.dumps(subcategory_keywords, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def model_path(subcategory_keywords: dict) -> str:
+    return os.path.join(KEYWORDS_DIR, f"ngram_model_{keywords_fingerprint(subcategory_keywords)}.npz")
+
+
+def holdout(name: str) -> bool:
+    return zlib.crc32(name.encode('utf-8')) % HOLDOUT_SHARE == 0
+
+
+class NgramClassifier:
+    """
+    Softmax-классификатор по хешированным символьным n-граммам.
+
+    Args:
+        labels (list[str]): Подкатегории (классы).
+        feature_bits (int): log2 числа признаков.
+    """
+    def __init__(self, labels, feature_bits: int = FEATURE_BITS, threshold: float = THRESHOLDS[-1]):
+        self.labels = list(labels)
+        self.feature_bits = feature_bits
+        self.threshold = threshold
+        self.weights = np.zeros((1 << feature_bits, len(self.labels)), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+
+    # --- Признаки ---
+
+    def features(self, names):
+        """
+        Хешированные n-граммы пачки.
+
+        Returns:
+            tuple: (rows, cols, values) — номер названия, номер признака и вес
+            (1/√число n-грамм названия) для каждой n-граммы.
+        """
+        texts = [f" {name.lower()[:MAX_CHARS]} " for name in names]
+        width = max(map(len, texts))
+        codes = np.array(texts, dtype=f'<U{width}').view(np.uint32).reshape(len(texts), width).astype(np.uint64)
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        shift = np.uint64(64 - self.feature_bits)
+
+        rows, cols = [], []
+        for size in NGRAM_SIZES:
+            if width < size:
+                continue
+            span = width - size + 1
+            hashed = np.full((len(texts), span), size, dtype=np.uint64)
+            for offset in range(size):
+                hashed = hashed * np.uint64(_HASH_STEP) + codes[:, offset:offset + span]
+            valid = np.arange(span) <= (lengths - size)[:, None]
+            row, position = np.nonzero(valid)
+            rows.append(row)
+            cols.append((hashed[row, position] * np.uint64(_HASH_MIX)) >> shift)
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols).astype(np.int64)
+        counts = np.bincount(rows, minlength=len(texts))
+        values = (1.0 / np.sqrt(np.maximum(counts, 1)))[rows].astype(np.float32)
+        return rows, cols, values
+
+    def _scores(self, rows, cols, values, batch_size: int):
+        contributions = self.weights[cols] * values[:, None]
+        scores = np.empty((batch_size, len(self.labels)), dtype=np.float32)
+        for label in range(len(self.labels)):
+            scores[:, label] = np.bincount(rows, weights=contributions[:, label], minlength=batch_size)
+        return scores + self.bias
+
+    @staticmethod
+    def _softmax(scores):
+        scores = scores - scores.max(axis=1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    # --- Предсказание ---
+
+    def predict_proba(self, names):
+        """Вероятности классов: массив (названий × классов)."""
+        names = list(names)
+        if not names:
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+        parts = []
+        for start in range(0, len(names), PREDICT_BATCH):
+            batch = names[start:start + PREDICT_BATCH]
+            parts.append(self._softmax(self._scores(*self.features(batch), len(batch))))
+        return np.concatenate(parts)
+
+    def predict(self, names, threshold: float = None) -> list:
+        """
+        Уверенные ответы модели.
+
+        Returns:
+            list: Подкатегория для каждого названия или None, если ответ нужно
+            получить через лемматизацию и ключевые слова.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        probabilities = self.predict_proba(names)
+        best = probabilities.argmax(axis=1)
+        confident = probabilities[np.arange(len(best)), best] >= threshold
+        return [
+            self.labels[label] if is_confident and self.labels[label] != FALLBACK_LABEL else None
+            for label, is_confident in zip(best.tolist(), confident.tolist())
+        ]
+
+    # --- Обучение ---
+
+    def fit(self, names, labels, epochs: int = 5, batch_size: int = 512, learning_rate: float = 0.5, seed: int = 0):
+        """Обучение AdaGrad на минибатчах; labels — подкатегории из self.labels."""
+        names = list(names)
+        targets = np.array([self.labels.index(label) for label in labels], dtype=np.int64)
+        squared = np.zeros_like(self.weights)
+        bias_squared = np.zeros_like(self.bias)
+        random = np.random.default_rng(seed)
+        for _ in range(epochs):
+            order = random.permutation(len(names))
+            for start in range(0, len(names), batch_size):
+                batch = order[start:start + batch_size]
+                rows, cols, values = self.features([names[i] for i in batch])
+                gradient = self._softmax(self._scores(rows, cols, values, len(batch)))
+                gradient[np.arange(len(batch)), targets[batch]] -= 1
+                gradient /= len(batch)
+
+                unique_cols, inverse = np.unique(cols, return_inverse=True)
+                feature_gradient = np.empty((len(unique_cols), len(self.labels)), dtype=np.float32)
+                for label in range(len(self.labels)):
+                    feature_gradient[:, label] = np.bincount(inverse, weights=values * gradient[rows, label],
+                                                             minlength=len(unique_cols))
+                squared[unique_cols] += feature_gradient ** 2
+                self.weights[unique_cols] -= learning_rate * feature_gradient / np.sqrt(squared[unique_cols] + 1e-8)
+
+                bias_gradient = gradient.sum(axis=0)
+                bias_squared += bias_gradient ** 2
+                self.bias -= learning_rate * bias_gradient / np.sqrt(bias_squared + 1e-8)
+        return self
+
+    # --- Файл ---
+
+    def save(self, path: str, **meta) -> None:
+        meta.update(labels=self.labels, feature_bits=self.feature_bits, threshold=self.threshold)
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, weights=self.weights, bias=self.bias,
+                                meta=np.array(json.dumps(meta, ensure_ascii=False)))
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            classifier = cls.__new__(cls)
+            classifier.labels = meta['labels']
+            classifier.feature_bits = meta['feature_bits']
+            classifier.threshold = meta['threshold']
+            classifier.meta = meta
+            classifier.weights = data['weights'].astype(np.float32)
+            classifier.bias = data['bias']
+        return classifier
+
+
+def get_classifier(subcategory_keywords):
+    """
+    Модель первого прохода для этого файла ключевых слов или None
+    (нет numpy, модель не обучена или обучена для другой версии ключевых слов).
+    """
+    if np is None or not isinstance(subcategory_keywords, dict) or not subcategory_keywords:
+        return None
+    path = model_path(subcategory_keywords)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _classifiers.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        classifier = NgramClassifier.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logging.warning(f"Не удалось загрузить модель первого прохода {os.path.basename(path)}: {e}")
+        classifier = None
+    else:
+        logging.info(f"⚡ Модель первого прохода: {os.path.basename(path)} (порог {classifier.threshold})")
+    _classifiers[path] = (mtime, classifier)
+    return classifier
+
+
+def categorize_batch(products, subcategory_keywords, lang: str, classifier=None) -> tuple[list, dict]:
+    """
+    Подкатегории пачки: уверенные ответы модели, остальные — по леммам и ключевым словам.
+
+    Args:
+        classifier (NgramClassifier): Модель первого прохода (None — только ключевые слова).
+
+    Returns:
+        tuple[list, dict]: (подкатегории в порядке products, леммы лемматизированных названий).
+    """
+    products = list(products)
+    keyword_index = compile_keywords(subcategory_keywords)
+    predicted = classifier.predict(products) if classifier is not None else [None] * len(products)
+    pending = [product for product, subcategory in zip(products, predicted) if subcategory is None]
+    product_lemmas = dict(zip(pending, lemmatize_batch(pending, lang)))
+    subcategories = [
+        subcategory if subcategory is not None else categorize_lemmas(set(product_lemmas[product]), keyword_index)
+        for product, subcategory in zip(products, predicted)
+    ]
+    return subcategories, product_lemmas
+
+
+# --- Обучающие данные, обучение и оценка ---
+
+def training_files(keywords_file: str, config_path: str = None) -> list:
+    """
+    Файлы подкатегорий групп, использующих этот файл ключевых слов.
+
+    Returns:
+        list[tuple]: (путь, подкатегория, язык).
+    """
+    config_path = config_path or os.path.join(BASE_DIR, 'config.json')
+    with open(config_path, 'r', encoding='utf-8') as f:
+        configs = json.load(f)
+    files, seen_groups = [], set()
+    for config in configs:
+        if os.path.normpath(config.get('external_keywords_file', '')) != os.path.normpath(keywords_file):
+            continue
+        group = config.get('group', config['category_name'])
+        key = (config['site_name'], group, config['category_path'])
+        if key in seen_groups:
+            continue
+        seen_groups.add(key)
+        prefix = f"{config['site_name']}_{group}_"
+        for path in sorted(glob.glob(os.path.join(BASE_DIR, 'output', config['category_path'], prefix + '*.txt'))):
+            files.append((path, os.path.basename(path)[len(prefix):-len('.txt')], config.get('language', 'en')))
+    return files
+
+
+def load_dataset(files, subcategory_keywords: dict):
+    """
+    Названия из файлов подкатегорий, известных файлу ключевых слов, с разбиением
+    на обучающую и отложенную выборки.
+
+    Returns:
+        tuple: (train, holdout) — списки (название, подкатегория, язык).
+    """
+    known = set(subcategory_keywords) | {FALLBACK_LABEL}
+    train, held_out, seen = [], [], set()
+    for path, subcategory, lang in files:
+        if subcategory not in known:
+            continue
+        for name in iter_products(path):
+            if name in seen:
+                continue
+            seen.add(name)
+            (held_out if holdout(name) else train).append((name, subcategory, lang))
+    return train, held_out
+
+
+def keyword_labels(samples, subcategory_keywords) -> list:
+    """Подкатегории по леммам и ключевым словам (эталон для оценки)."""
+    keyword_index = compile_keywords(subcategory_keywords)
+    labels = [None] * len(samples)
+    by_lang = {}
+    for position, (name, _, lang) in enumerate(samples):
+        by_lang.setdefault(lang, []).append(position)
+    for lang, positions in by_lang.items():
+        names = [samples[position][0] for position in positions]
+        for position, lemmas in zip(positions, lemmatize_batch(names, lang)):
+            labels[position] = categorize_lemmas(set(lemmas), keyword_index)
+    return labels
+
+
+def choose_threshold(probabilities, labels: list, reference: list, target: float = TARGET_AGREEMENT):
+    """
+    Наименьший порог, при котором уверенные ответы совпадают с reference не реже target.
+
+    Returns:
+        float | None: Порог или None, если target не достигается ни при одном из THRESHOLDS.
+    """
+    best = probabilities.argmax(axis=1)
+    confidence = probabilities[np.arange(len(best)), best]
+    predicted = np.array([labels[label] for label in best.tolist()], dtype=object)
+    reference = np.array(reference, dtype=object)
+    accepted = predicted != FALLBACK_LABEL
+    for threshold in THRESHOLDS:
+        confident = accepted & (confidence >= threshold)
+        if not confident.any() or (predicted[confident] == reference[confident]).mean() >= target:
+            return threshold
+    logging.warning(f"Совпадение {target:.1%} с ключевыми словами не достигается ни при одном пороге "
+                    f"(до {THRESHOLDS[-1]}): модель не годится для первого прохода")
+    return None
+
+
+def evaluate(classifier, samples, subcategory_keywords, reference=None) -> dict:
+    """
+    Сравнение первого прохода с категоризатором по ключевым словам.
+
+    Returns:
+        dict: coverage (доля уверенных ответов), agreement (совпадение уверенных ответов
+        с ключевыми словами), hybrid_agreement (итог первого прохода с перепроверкой),
+        скорости и ускорение гибридного пути.
+    """
+    names = [name for name, _, _ in samples]
+    reference = reference if reference is not None else keyword_labels(samples, subcategory_keywords)
+
+    start = time.perf_counter()
+    predicted = classifier.predict(names)
+    classifier_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    keyword_labels(samples, subcategory_keywords)
+    keyword_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pending = [sample for sample, label in zip(samples, predicted) if label is None]
+    keyword_labels(pending, subcategory_keywords)
+    hybrid_seconds = classifier_seconds + time.perf_counter() - start
+
+    confident = [(label, truth) for label, truth in zip(predicted, reference) if label is not None]
+    agreed = sum(label == truth for label, truth in confident)
+
+    def rate(seconds):
+        return round(len(names) / seconds) if seconds else None
+
+    return {
+        "names": len(names),
+        "threshold": classifier.threshold,
+        "coverage": round(len(confident) / len(names), 4) if names else 0.0,
+        "agreement": round(agreed / len(confident), 4) if confident else 1.0,
+        "hybrid_agreement": round((agreed + len(names) - len(confident)) / len(names), 4) if names else 1.0,
+        "classifier_names_per_sec": rate(classifier_seconds),
+        "keyword_names_per_sec": rate(keyword_seconds),
+        "hybrid_names_per_sec": rate(hybrid_seconds),
+        "speedup": round(keyword_seconds / hybrid_seconds, 2) if hybrid_seconds else None,
+    }
+
+
+def train(keywords_file: str, epochs: int = 5, target: float = TARGET_AGREEMENT, config_path: str = None):
+    """
+    Обучает модель по файлам output/ и сохраняет ее рядом с ключевыми словами.
+
+    Returns:
+        tuple: (модель, путь, отчет по отложенной выборке); (None, None, None), если данных нет
+        или отложенная выборка пуста;
+        (None, None, отчет при наибольшем пороге), если модель не достигает target — она не сохраняется.
+    """
+    with open(os.path.join(BASE_DIR, keywords_file), 'r', encoding='utf-8') as f:
+        subcategory_keywords = json.load(f)
+    train_samples, held_out = load_dataset(training_files(keywords_file, config_path), subcategory_keywords)
+    labels = sorted({label for _, label, _ in train_samples})
+    if len(labels) < 2:
+        logging.error(f"Недостаточно данных для обучения: подкатегорий {len(labels)}, названий {len(train_samples)}")
+        return None, None, None
+    if not held_out:
+        # Без отложенной выборки порог не проверить, а непроверенная модель подменяла бы ключевые слова
+        logging.error(f"Нет отложенных названий для выбора порога (названий {len(train_samples)}): модель не сохраняется")
+        return None, None, None
+
+    logging.info(f"🏋️ Обучение: названий {len(train_samples)}, подкатегорий {len(labels)}, отложено {len(held_out)}")
+    classifier = NgramClassifier(labels).fit([name for name, _, _ in train_samples],
+                                             [label for _, label, _ in train_samples], epochs)
+    reference = keyword_labels(held_out, subcategory_keywords)
+    probabilities = classifier.predict_proba([name for name, _, _ in held_out])
+    threshold = choose_threshold(probabilities, classifier.labels, reference, target)
+    classifier.threshold = THRESHOLDS[-1] if threshold is None else threshold
+    report = evaluate(classifier, held_out, subcategory_keywords, reference)
+    if threshold is None:
+        # Иначе первый проход с ненадежной моделью молча подменял бы ключевые слова
+        return None, None, report
+
+    path = model_path(subcategory_keywords)
+    classifier.save(path, keywords_file=keywords_file, trained_on=len(train_samples),
+                    fingerprint=keywords_fingerprint(subcategory_keywords))
+    return classifier, path, report
+
+
+def log_report(report: dict) -> None:
+    logging.info(f"📏 Отложено названий: {report['names']}, порог {report['threshold']}")
+    logging.info(f"   уверенных ответов {report['coverage']:.1%}, совпадение с ключевыми словами "
+                 f"{report['agreement']:.1%}, итог с перепроверкой {report['hybrid_agreement']:.1%}")
+    logging.info(f"   скорость: модель {report['classifier_names_per_sec']}/сек, "
+                 f"ключевые слова {report['keyword_names_per_sec']}/сек, "
+                 f"вместе {report['hybrid_names_per_sec']}/сек (x{report['speedup']})")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Первый проход категоризации по символьным n-граммам")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--keywords", default=DEFAULT_KEYWORDS_FILE, help="Файл ключевых слов (путь от finpi_scraper/)")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--target", type=float, default=TARGET_AGREEMENT,
+                        help="Требуемое совпадение уверенных ответов с ключевыми словами")
+    parser.add_argument("--json", dest="json_path", help="Сохранить отчет в JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M')
+    args = parse_args(argv)
+    if np is None:
+        logging.error("Для модели первого прохода нужен numpy: pip install numpy")
+        return 1
+
+    if args.command == "train":
+        classifier, path, report = train(args.keywords, args.epochs, args.target)
+        if classifier is None:
+            if report:
+                log_report(report)
+            return 1
+        logging.info(f"💾 Модель: {path}")
+    else:
+        with open(os.path.join(BASE_DIR, args.keywords), 'r', encoding='utf-8') as f:
+            subcategory_keywords = json.load(f)
+        classifier = get_classifier(subcategory_keywords)
+        if classifier is None:
+            logging.error(f"Модель для текущей версии {args.keywords} не обучена: python -m utils.ngram_classifier train")
+            return 1
+        _, held_out = load_dataset(training_files(args.keywords), subcategory_keywords)
+        report = evaluate(classifier, held_out, subcategory_keywords) if held_out else None
+
+    if report:
+        log_report(report)
+        if args.json_path:
+            with open(args.json_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
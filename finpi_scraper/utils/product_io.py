@@ -0,0 +1,198 @@
+# finpi_scraper/utils/product_io.py
+"""
+Потоковый ввод-вывод файлов товаров (одно название на строку).
+
+- iter_products / aiter_products: ленивое чтение названий без readlines();
+- iter_batches: разбиение потока на пачки для пакетной лемматизации;
+- atomic_write / write_products / write_products_async: запись во временный файл
+  в той же директории и атомарная замена через os.replace — после сбоя на диске
+  остается либо старая, либо новая версия файла, но не наполовину записанная;
+- append_products: дописывание в конец файла за O(новых товаров) с fsync;
+- rewrite_products: построчная перезапись файла "на месте" с постоянным потреблением памяти.
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from itertools import islice
+
+import aiofiles
+
+DEFAULT_BATCH_SIZE = 1000  # Размер пачки для пакетной обработки
+
+
+def iter_products(file_path: str):
+    """
+    Лениво читает непустые названия товаров из файла.
+
+    Yields:
+        str: Название товара без пробелов по краям.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            product = line.strip()
+            if product:
+                yield product
+
+
+async def aiter_products(file_path: str):
+    """Асинхронный вариант iter_products (aiofiles)."""
+    async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
+        async for line in f:
+            product = line.strip()
+            if product:
+                yield product
+
+
+def iter_batches(items, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Разбивает итерируемый поток на списки длиной не более batch_size.
+
+    Yields:
+        list: Очередная пачка.
+    """
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _temp_path_for(file_path: str) -> str:
+    directory, filename = os.path.split(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{filename}.", suffix=".tmp", dir=directory)
+    os.close(fd)
+    return temp_path
+
+
+def _replace(temp_path: str, file_path: str) -> None:
+    """Переносит права исходного файла (mkstemp создает 0600) и атомарно подменяет его."""
+    if os.path.exists(file_path):
+        shutil.copymode(file_path, temp_path)
+    else:
+        os.chmod(temp_path, 0o644)
+    os.replace(temp_path, file_path)
+
+
+@contextmanager
+def atomic_write(file_path: str, mode: str = 'w'):
+    """
+    Открывает временный файл рядом с file_path для записи и по успешному
+    завершению блока атомарно заменяет им file_path. При исключении
+    временный файл удаляется, а исходный файл остается нетронутым.
+
+    Args:
+        mode (str): 'w' (текст UTF-8) или 'wb' (двоичные данные).
+    """
+    temp_path = _temp_path_for(file_path)
+    try:
+        with open(temp_path, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        _replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def write_products(file_path: str, products) -> int:
+    """
+    Атомарно записывает товары в файл (по одному на строку).
+
+    Returns:
+        int: Количество записанных товаров.
+    """
+    count = 0
+    with atomic_write(file_path) as f:
+        for product in products:
+            f.write(product + '\n')
+            count += 1
+    return count
+
+
+def append_products(file_path: str, products) -> int:
+    """
+    Дописывает товары в конец файла, не перечитывая и не копируя уже записанные:
+    стоимость пропорциональна числу новых товаров, а не размеру каталога.
+    Данные сбрасываются на диск (fsync); при сбое посреди записи последняя строка
+    может оказаться обрезанной, но уже сохраненные товары не затрагиваются.
+
+    Returns:
+        int: Количество дописанных товаров.
+    """
+    # Файл без перевода строки в конце (записан вручную) — не склеиваем последний товар с новым
+    needs_newline = False
+    if os.path.exists(file_path) and os.path.getsize(file_path):
+        with open(file_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+    count = 0
+    with open(file_path, 'a', encoding='utf-8') as f:
+        if needs_newline:
+            f.write('\n')
+        for product in products:
+            f.write(product + '\n')
+            count += 1
+        f.flush()
+        os.fsync(f.fileno())
+    return count
+
+
+async def write_products_async(file_path: str, products) -> int:
+    """Асинхронный вариант write_products (aiofiles + fsync + атомарная замена)."""
+    temp_path = _temp_path_for(file_path)
+    count = 0
+    try:
+        async with aiofiles.open(temp_path, 'w', encoding='utf-8') as f:
+            for batch in iter_batches(products):
+                await f.write(''.join(product + '\n' for product in batch))
+                count += len(batch)
+            # Как в atomic_write: данные на диске до замены, иначе после сбоя файл может оказаться пустым
+            await f.flush()
+            await asyncio.to_thread(os.fsync, f.fileno())
+        _replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return count
+
+
+def rewrite_products(file_path: str, transform) -> tuple[int, int]:
+    """
+    Построчно пропускает файл через transform и атомарно заменяет его результатом.
+    Память не зависит от размера файла.
+
+    Args:
+        transform (Callable[[str], str | None]): Новое значение для строки (без пробелов по краям);
+            пустое значение удаляет строку.
+
+    Returns:
+        tuple[int, int]: (строк было, строк стало).
+    """
+    before = after = 0
+    temp_path = _temp_path_for(file_path)
+    try:
+        # Исходный файл закрывается до замены (иначе os.replace не сработает в Windows)
+        with open(file_path, 'r', encoding='utf-8') as source, open(temp_path, 'w', encoding='utf-8') as target:
+            for line in source:
+                before += 1
+                line = line.strip()
+                if not line:
+                    continue
+                result = transform(line)
+                if result:
+                    target.write(result + '\n')
+                    after += 1
+            target.flush()
+            os.fsync(target.fileno())
+        _replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return before, after
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Сопоставление одних и тех же товаров разных сайтов: устойчивый сквозной ID товара.
+
+Сравнивать каждый товар с каждым квадратично, поэтому кандидаты ищутся только внутри
+блоков. Ключ блока — (подкатегория, объем, токен названия):
+- объем разбирается из названия и приводится к миллилитрам (0.7 л, 0,7l, 700 ml, 70cl → 700;
+  упаковки вида 4x0.5 л — отдельно: 4x500);
+- токены — слова названия (леммы, если они есть в хранилище) без стоп-слов
+  из keywords/stopwords.json, объема и крепости; среди них бренд и линейка
+  ("jameson", "black", "barrel");
+- подкатегория берется из имени файла ({site}_{group}_{subcategory}.txt), поэтому сайты
+  с общим файлом ключевых слов попадают в одни и те же блоки.
+
+Блоки больше MAX_BLOCK_SIZE — слова-типы вроде "віскі" или "whisky" — кандидатов не дают,
+поэтому стоимость почти линейна по числу товаров. Внутри блока кандидаты сравниваются
+по коэффициенту Дайса с весами IDF по подкатегории: общие слова почти не влияют, совпадение
+бренда решает. Частые на своем сайте слова, которых на сайте кандидата нет вовсе ("віскі"
+против "irish whiskey"), не сравниваются — это разница языка и оформления названий;
+среди общих токенов должно быть хотя бы одно не слово-тип. Числа (выдержка, год) должны совпадать. Товар получает ID лучшего кандидата
+с порогом MATCH_THRESHOLD, если в этой группе еще нет товара с его сайта, иначе — новый ID.
+
+Соответствие хранится в SQLite (по умолчанию output/product_matching.db) и обновляется
+инкрементально: неизмененные файлы не перечитываются, сопоставляются только новые
+названия, а выданные ID не меняются.
+
+Примеры (из finpi_scraper/):
+    python -m utils.product_matching sync                        # проиндексировать новые товары
+    python -m utils.product_matching export --out matches.jsonl  # группы товаров с 2+ сайтов
+"""
+import argparse
+import glob
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+from collections import Counter, defaultdict
+
+from . import product_store
+from .clean_products import normalize_product_key
+from .lemmatizer import lemmatize_batch, tokenize
+from .product_io import iter_products
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT_DB_PATH = os.path.join(BASE_DIR, 'output', 'product_matching.db')
+STOPWORDS_PATH = os.path.join(BASE_DIR, 'keywords', 'stopwords.json')
+
+MATCH_THRESHOLD = 0.75  # Минимальный взвешенный коэффициент Дайса
+MAX_BLOCK_SIZE = 500  # Блоки крупнее считаются неинформативными и не дают кандидатов
+VOCABULARY_SHARE = 0.05  # Слово в такой доле товаров подкатегории сайта — часть его словаря
+TYPE_WORD_SHARE = 0.5  # Слово в такой доле товаров ("віскі") не доказывает, что товар тот же
+UNKNOWN_VOLUME = '?'
+
+VOLUME_UNITS = {'мл': 1, 'ml': 1, 'cl': 10, 'л': 1000, 'l': 1000, 'lt': 1000, 'ltr': 1000}
+VOLUME_RE = re.compile(r"(?:(\d+)\s*[xх×*]\s*)?(\d+(?:[.,]\d+)?)\s*(мл|ml|cl|ltr|lt|л|l)(?![^\W\d_])", re.IGNORECASE)
+STRENGTH_RE = re.compile(r"\d+(?:[.,]\d+)?\s*%")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site_name TEXT NOT NULL,
+    group_name TEXT NOT NULL,
+    name TEXT NOT NULL,
+    subcategory TEXT NOT NULL,
+    volume TEXT NOT NULL,
+    tokens TEXT NOT NULL,
+    product_uid INTEGER NOT NULL,
+    UNIQUE (site_name, group_name, name)
+);
+CREATE INDEX IF NOT EXISTS idx_products_uid ON products (product_uid);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+
+def parse_volume(name: str) -> str:
+    """
+    Объем из названия в миллилитрах ("700", упаковка — "4x500").
+    UNKNOWN_VOLUME, если объем не указан.
+    """
+    match = VOLUME_RE.search(name)
+    if not match:
+        return UNKNOWN_VOLUME
+    count, amount, unit = match.groups()
+    millilitres = round(float(amount.replace(',', '.')) * VOLUME_UNITS[unit.lower()])
+    return f"{int(count)}x{millilitres}" if count and int(count) > 1 else str(millilitres)
+
+
+def load_stopwords(path: str = STOPWORDS_PATH) -> set:
+    """Стоп-слова всех языков из keywords/stopwords.json (названия бывают смешанными)."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {token for words in data.values() for word in words for token in tokenize(word)}
+
+
+def name_tokens(name: str, lemmas, stopwords: set) -> list:
+    """
+    Токены товара для сопоставления: слова без стоп-слов, объема и крепости.
+
+    Args:
+        name (str): Название товара.
+        lemmas (list | None): Леммы названия; без них используются слова названия.
+        stopwords (set): Общие стоп-слова.
+
+    Returns:
+        list[str]: Отсортированные уникальные токены.
+    """
+    text = normalize_product_key(' '.join(lemmas) if lemmas else name)
+    text = STRENGTH_RE.sub(' ', VOLUME_RE.sub(' ', text))
+    return sorted({token for token in tokenize(text) if token not in stopwords and (len(token) > 1 or token.isdigit())})
+
+
+def block_keys(subcategory: str, volume: str, tokens) -> list:
+    """Ключи блоков товара; числа (выдержка, год) в блоки не попадают — только в сравнение."""
+    return [f"{subcategory}|{volume}|{token}" for token in tokens if not token.isdigit()]
+
+
+def similarity(first, second, weights: dict) -> float:
+    """
+    Взвешенный коэффициент Дайса двух множеств токенов; 0, если числа в названиях
+    различаются (Chivas Regal 12 и 18 — разные товары).
+    """
+    first_numbers = {token for token in first if token.isdigit()}
+    second_numbers = {token for token in second if token.isdigit()}
+    if first_numbers and second_numbers and first_numbers != second_numbers:
+        return 0.0
+    total = sum(weights[token] for token in first) + sum(weights[token] for token in second)
+    return 2 * sum(weights[token] for token in first & second) / total if total else 0.0
+
+
+class Vocabulary:
+    """
+    Статистика токенов по подкатегориям для сравнения названий разных сайтов.
+
+    - weights(subcategory): веса IDF log(1 + N / df) внутри подкатегории;
+    - comparable(...): токены товара без слов словаря его сайта, которых на сайте
+      кандидата нет вовсе. Частое на одном сайте и отсутствующее на другом слово
+      ("віскі" на украинском сайте, "irish whiskey" на английском) — разница языка
+      и оформления названий, а не признак другого товара. Редкие слова (бренды)
+      сохраняются, даже если на сайте кандидата их нет;
+    - distinctive(...): есть ли среди общих токенов не слово-тип: совпадение одного
+      "віскі" еще не делает товары одинаковыми.
+    """
+    def __init__(self):
+        self.sizes = Counter()
+        self.counts = Counter()
+        self.sites = defaultdict(set)
+        self.site_sizes = Counter()
+        self.site_counts = Counter()
+        self._weights = {}
+        self._comparable = {}
+
+    def add(self, site_name: str, subcategory: str, tokens) -> None:
+        self.sizes[subcategory] += 1
+        self.site_sizes[(site_name, subcategory)] += 1
+        for token in tokens:
+            self.counts[(subcategory, token)] += 1
+            self.sites[(subcategory, token)].add(site_name)
+            self.site_counts[(site_name, subcategory, token)] += 1
+
+    def weights(self, subcategory: str) -> dict:
+        if subcategory not in self._weights:
+            size = self.sizes[subcategory]
+            self._weights[subcategory] = {token: math.log(1 + size / count)
+                                          for (sub, token), count in self.counts.items() if sub == subcategory}
+        return self._weights[subcategory]
+
+    def share(self, token: str, site_name: str, subcategory: str) -> float:
+        return self.site_counts[(site_name, subcategory, token)] / max(self.site_sizes[(site_name, subcategory)], 1)
+
+    def comparable(self, tokens: frozenset, site_name: str, subcategory: str, other_site: str) -> frozenset:
+        key = (tokens, site_name, subcategory, other_site)
+        if key not in self._comparable:
+            self._comparable[key] = frozenset(
+                token for token in tokens if other_site in self.sites[(subcategory, token)]
+                or self.share(token, site_name, subcategory) < VOCABULARY_SHARE)
+        return self._comparable[key]
+
+    def distinctive(self, shared, site_name: str, other_site: str, subcategory: str) -> bool:
+        return any(not token.isdigit() and self.share(token, site_name, subcategory) < TYPE_WORD_SHARE
+                   and self.share(token, other_site, subcategory) < TYPE_WORD_SHARE for token in shared)
+
+
+class ProductMatcher:
+    """
+    Сквозные ID товаров поверх SQLite.
+
+    Args:
+        db_path (str): Путь к файлу соответствий.
+        threshold (float): Порог сходства для объединения товаров.
+    """
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, threshold: float = MATCH_THRESHOLD):
+        self.db_path = db_path
+        self.threshold = threshold
+        self.stopwords = load_stopwords()
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # --- Синхронизация с файлами output/ ---
+
+    def sync_group(self, output_path: str, site_name: str, group_name: str, lang: str) -> tuple:
+        """
+        Приводит товары группы в соответствие с файлами {site}_{group}_*.txt.
+        Файлы с прежним mtime пропускаются; новым товарам ID назначает match_pending.
+
+        Returns:
+            tuple[list[int], int]: (id новых товаров, удалено товаров).
+        """
+        prefix = f"{site_name}_{group_name}_"
+        paths = sorted(glob.glob(os.path.join(output_path, f"{prefix}*.txt")))
+        file_prefix = os.path.join(output_path, prefix)
+        known_mtimes = {path: mtime for path, mtime in self.conn.execute("SELECT path, mtime_ns FROM files")
+                        if path.startswith(file_prefix)}
+        changed = [path for path in paths if known_mtimes.get(path) != os.stat(path).st_mtime_ns]
+        removed_files = set(known_mtimes) - set(paths)
+        if not changed and not removed_files:
+            return [], 0
+
+        current = {}
+        for path in paths:
+            subcategory = os.path.basename(path)[len(prefix):-len('.txt')]
+            for name in iter_products(path):
+                current.setdefault(name, subcategory)
+        indexed = {name: (product_id, subcategory) for product_id, name, subcategory in self.conn.execute(
+            "SELECT id, name, subcategory FROM products WHERE site_name = ? AND group_name = ?",
+            (site_name, group_name))}
+
+        gone = [indexed[name][0] for name in indexed.keys() - current.keys()]
+        # Переезд между подкатегориями меняет блоки, но не выданный ID
+        moved = [(subcategory, indexed[name][0]) for name, subcategory in current.items()
+                 if name in indexed and indexed[name][1] != subcategory]
+        new_names = [name for name in current if name not in indexed]
+        new_lemmas = self._lemmas_for(new_names, output_path, site_name, group_name, lang)
+
+        new_ids = []
+        with self.conn:
+            self.conn.executemany("DELETE FROM products WHERE id = ?", ((pid,) for pid in gone))
+            self.conn.executemany("UPDATE products SET subcategory = ? WHERE id = ?", moved)
+            for name, lemmas in zip(new_names, new_lemmas):
+                tokens = name_tokens(name, lemmas, self.stopwords)
+                # Пока товар не сопоставлен, его ID — собственный id строки (AUTOINCREMENT не переиспользует id)
+                cursor = self.conn.execute(
+                    "INSERT INTO products (site_name, group_name, name, subcategory, volume, tokens, product_uid) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    (site_name, group_name, name, current[name], parse_volume(name),
+                     json.dumps(tokens, ensure_ascii=False)))
+                new_ids.append(cursor.lastrowid)
+            self.conn.executemany("UPDATE products SET product_uid = id WHERE id = ?", ((pid,) for pid in new_ids))
+            self.conn.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in removed_files))
+            self.conn.executemany("INSERT OR REPLACE INTO files (path, mtime_ns) VALUES (?, ?)",
+                                  ((path, os.stat(path).st_mtime_ns) for path in paths))
+        return new_ids, len(gone)
+
+    def _lemmas_for(self, names, output_path, site_name, group_name, lang) -> list:
+        """Леммы новых названий: из хранилища, если они там есть, иначе пакетная лемматизация."""
+        if not names:
+            return []
+        wanted = set(names)
+        stored = {}
+        store_file = product_store.store_path(output_path, site_name, group_name)
+        for record in product_store.iter_latest(store_file, ("name", "lemmas")):
+            if record["name"] in wanted and record["lemmas"] is not None:
+                stored[record["name"]] = record["lemmas"]
+        missing = [name for name in names if name not in stored]
+        stored.update(zip(missing, lemmatize_batch(missing, lang)))
+        return [stored[name] for name in names]
+
+    # --- Сопоставление ---
+
+    def match_pending(self, new_ids) -> int:
+        """
+        Назначает новым товарам ID: сравнивает каждый только с товарами других сайтов
+        из общих блоков. Новые товары попадают в блоки по мере обработки, поэтому
+        товары, пришедшие с разных сайтов в одной синхронизации, тоже находят друг друга.
+
+        Returns:
+            int: Сколько новых товаров присоединено к уже существующим ID.
+        """
+        pending = set(new_ids)
+        if not pending:
+            return 0
+        products, blocks, uid_sites, vocabulary = {}, defaultdict(list), defaultdict(set), Vocabulary()
+        for product_id, site_name, subcategory, volume, tokens, uid in self.conn.execute(
+                "SELECT id, site_name, subcategory, volume, tokens, product_uid FROM products"):
+            products[product_id] = [site_name, subcategory, volume, frozenset(json.loads(tokens)), uid]
+            vocabulary.add(site_name, subcategory, products[product_id][3])
+            if product_id not in pending:
+                uid_sites[uid].add(site_name)
+                for key in block_keys(subcategory, volume, products[product_id][3]):
+                    blocks[key].append(product_id)
+
+        matched, updates = 0, []
+        for product_id in sorted(pending):
+            site_name, subcategory, volume, tokens, uid = products[product_id]
+            keys = block_keys(subcategory, volume, tokens)
+            candidates = {candidate for key in keys if len(blocks.get(key, ())) <= MAX_BLOCK_SIZE
+                          for candidate in blocks.get(key, ()) if products[candidate][0] != site_name}
+            weights = vocabulary.weights(subcategory)
+            scored = []
+            for candidate in candidates:
+                other_site, other_tokens = products[candidate][0], products[candidate][3]
+                first = vocabulary.comparable(tokens, site_name, subcategory, other_site)
+                second = vocabulary.comparable(other_tokens, other_site, subcategory, site_name)
+                if not vocabulary.distinctive(first & second, site_name, other_site, subcategory):
+                    continue
+                score = similarity(first, second, weights)
+                scored.append((score, -candidate, candidate))
+            scored.sort(reverse=True)
+            for score, _, candidate in scored:
+                if score < self.threshold:
+                    break
+                candidate_uid = products[candidate][4]
+                if site_name not in uid_sites[candidate_uid]:
+                    uid = products[product_id][4] = candidate_uid
+                    updates.append((uid, product_id))
+                    matched += 1
+                    break
+            uid_sites[uid].add(site_name)
+            for key in keys:
+                blocks[key].append(product_id)
+
+        with self.conn:
+            self.conn.executemany("UPDATE products SET product_uid = ? WHERE id = ?", updates)
+        return matched
+
+    # --- Запросы ---
+
+    def product_ids(self, site_name: str, group_name: str) -> dict:
+        """Сквозные ID товаров группы: {название: ID}."""
+        return dict(self.conn.execute("SELECT name, product_uid FROM products WHERE site_name = ? AND group_name = ?",
+                                      (site_name, group_name)))
+
+    def iter_matches(self, min_sites: int = 2):
+        """
+        Группы товаров с одним ID, представленные минимум на min_sites сайтах.
+
+        Yields:
+            dict: {"product_id": ID, "subcategory": ..., "volume": ..., "products": [{site, group, name}, ...]}.
+        """
+        rows = self.conn.execute(
+            "SELECT product_uid, site_name, group_name, name, subcategory, volume FROM products WHERE product_uid IN "
+            "(SELECT product_uid FROM products GROUP BY product_uid HAVING COUNT(DISTINCT site_name) >= ?) "
+            "ORDER BY product_uid, site_name, group_name", (min_sites,))
+        current = None
+        for uid, site_name, group_name, name, subcategory, volume in rows:
+            if current is None or current["product_id"] != uid:
+                if current is not None:
+                    yield current
+                current = {"product_id": uid, "subcategory": subcategory, "volume": volume, "products": []}
+            current["products"].append({"site": site_name, "group": group_name, "name": name})
+        if current is not None:
+            yield current
+
+    def count_products(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def count_matched(self) -> int:
+        """Товары, у которых есть пара хотя бы на одном другом сайте."""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM products WHERE product_uid IN "
+            "(SELECT product_uid FROM products GROUP BY product_uid HAVING COUNT(DISTINCT site_name) > 1)").fetchone()[0]
+
+
+def matching_groups(config_path: str) -> list:
+    """
+    Группы товаров из config.json.
+
+    Returns:
+        list[tuple]: (site_name, group_name, output_path, lang).
+    """
+    with open(config_path, 'r', encoding='utf-8') as f:
+        configs = json.load(f)
+    groups = {}
+    for config in configs:
+        key = (config['site_name'], config.get('group', config['category_name']))
+        output_path = os.path.join(BASE_DIR, 'output', config['category_path'])
+        groups.setdefault(key, (*key, output_path, config.get('language', 'en')))
+    return list(groups.values())
+
+
+def sync(matcher: ProductMatcher, groups) -> dict:
+    """
+    Синхронизирует группы и сопоставляет новые товары.
+
+    Returns:
+        dict: {"added": новых товаров, "removed": удалено, "matched": присоединено к существующим ID}.
+    """
+    new_ids, removed = [], 0
+    for site_name, group_name, output_path, lang in groups:
+        added, gone = matcher.sync_group(output_path, site_name, group_name, lang)
+        if added or gone:
+            logging.info(f"🗂️ [{site_name} - {group_name}] товаров: +{len(added)}, -{gone}")
+        new_ids.extend(added)
+        removed += gone
+    return {"added": len(new_ids), "removed": removed, "matched": matcher.match_pending(new_ids)}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Сопоставление товаров разных сайтов (сквозные ID)")
+    parser.add_argument("command", choices=["sync", "export"])
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Файл соответствий SQLite")
+    parser.add_argument("--threshold", type=float, default=MATCH_THRESHOLD, help="Порог сходства названий")
+    parser.add_argument("--out", help="Файл JSONL для export (по умолчанию stdout)")
+    parser.add_argument("--min-sites", type=int, default=2, help="export: минимум сайтов в группе")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M')
+    args = parse_args(argv)
+    os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+    with ProductMatcher(args.db, args.threshold) as matcher:
+        if args.command == "sync":
+            summary = sync(matcher, matching_groups(os.path.join(BASE_DIR, 'config.json')))
+            logging.info(f"🔗 Новых товаров: {summary['added']}, удалено: {summary['removed']}, "
+                         f"сопоставлено с другими сайтами: {summary['matched']}")
+            logging.info(f"📚 Товаров: {matcher.count_products()}, из них с парой на другом сайте: {matcher.count_matched()}")
+        else:
+            out = open(args.out, 'w', encoding='utf-8') if args.out else None
+            try:
+                for match in matcher.iter_matches(args.min_sites):
+                    print(json.dumps(match, ensure_ascii=False), file=out)
+            finally:
+                if out:
+                    out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,205 @@
+# finpi_scraper/utils/product_store.py
+"""
+Компактное хранилище товаров рядом с текстовыми файлами output/.
+
+Формат — JSONL, сжатый gzip, по одному файлу на (сайт, группа):
+    output/<category_path>/{site}_{group}.jsonl.gz
+
+Каждая строка — запись о товаре с колонками STORE_COLUMNS. Файл только дописывается:
+каждый запуск добавляет новый gzip-member с записями о новых товарах или об
+изменении подкатегории (например, после redistribute_products). Актуальное
+состояние товара — последняя запись с его ключом (iter_latest).
+
+Текстовые файлы {site}_{group}_{subcategory}.txt продолжают писаться как раньше
+для совместимости; хранилище нужно для анализа, которому не нужно заново
+разбирать и лемматизировать строки (колонка lemmas).
+
+Если установлен pyarrow, хранилище можно выгрузить в Parquet (export_parquet)
+и читать только нужные колонки через memory map (read_parquet_columns).
+"""
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from .clean_products import normalize_product_key
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow — необязательная зависимость
+    pyarrow = None
+
+STORE_SUFFIX = ".jsonl.gz"
+STORE_COLUMNS = (
+    "name",         # Название товара как на сайте
+    "key",          # Нормализованный ключ (normalize_product_key)
+    "site",         # site_name
+    "group",        # Группа конфигураций
+    "subcategory",  # Подкатегория по ключевым словам
+    "lemmas",       # Леммы названия (список) или None, если категоризация не выполнялась
+    "lemma_hash",   # Хеш множества лемм
+    "source",       # category_name конфигурации с sub_category, с листинга которой собран товар, иначе None
+    "first_seen",   # Когда товар впервые попал в хранилище
+    "updated_at",   # Когда записана эта запись
+)
+
+
+def store_path(output_path: str, site_name: str, group_name: str) -> str:
+    """Путь к файлу хранилища для (сайт, группа)."""
+    return os.path.join(output_path, f"{site_name}_{group_name}{STORE_SUFFIX}")
+
+
+def store_path_for_text_file(text_file_path: str):
+    """
+    Путь к хранилищу по текстовому файлу подкатегории
+    ({site}_{group}_{subcategory}.txt → {site}_{group}.jsonl.gz).
+    """
+    directory, filename = os.path.split(text_file_path)
+    prefix = filename.rsplit('_', 1)[0] if '_' in filename else None
+    return os.path.join(directory, prefix + STORE_SUFFIX) if prefix else None
+
+
+def lemma_hash(lemmas) -> str:
+    """Стабильный 64-битный хеш множества лемм (hex). None, если лемм нет."""
+    if lemmas is None:
+        return None
+    payload = "\x1f".join(sorted(set(lemmas))).encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+def make_record(name, site_name, group_name, subcategory, lemmas=None, first_seen=None, timestamp=None,
+                source=None) -> dict:
+    """Формирует запись хранилища для одного товара."""
+    timestamp = timestamp or datetime.now().isoformat(timespec='seconds')
+    lemmas = list(lemmas) if lemmas is not None else None
+    return {
+        "name": name,
+        "key": normalize_product_key(name),
+        "site": site_name,
+        "group": group_name,
+        "subcategory": subcategory,
+        "lemmas": lemmas,
+        "lemma_hash": lemma_hash(lemmas),
+        "source": source,
+        "first_seen": first_seen or timestamp,
+        "updated_at": timestamp,
+    }
+
+
+def append_records(path: str, records) -> int:
+    """
+    Дописывает записи в хранилище новым gzip-member (старые данные не переписываются).
+
+    Returns:
+        int: Количество записанных записей.
+    """
+    count = 0
+    with gzip.open(path, 'at', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+def iter_records(path: str, columns=None):
+    """
+    Потоково читает записи хранилища, не загружая файл целиком.
+
+    Args:
+        path (str): Путь к файлу хранилища.
+        columns (Iterable[str]): Если задано, каждая запись урезается до этих колонок.
+
+    Yields:
+        dict: Запись (или ее проекция на columns).
+    """
+    if not os.path.exists(path):
+        return
+    columns = tuple(columns) if columns else None
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if columns:
+                yield {column: record.get(column) for column in columns}
+            else:
+                yield record
+
+
+def iter_latest(path: str, columns=None):
+    """
+    Актуальное состояние каждого товара: последняя запись с данным ключом.
+    Держит в памяти только запрошенные колонки.
+    """
+    columns = tuple(columns) if columns else None
+    needed = None if columns is None else tuple(dict.fromkeys(("key",) + columns))
+    latest = {}
+    for record in iter_records(path, needed):
+        latest[record["key"]] = record
+    for record in latest.values():
+        yield {column: record[column] for column in columns} if columns else record
+
+
+def load_keys(path: str) -> set:
+    """Множество нормализованных ключей товаров в хранилище."""
+    return {record["key"] for record in iter_records(path, ("key",))}
+
+
+def load_sources(path: str) -> dict:
+    """
+    Ключ товара → source последней записи, где он был указан. Записи без source
+    (перенос lemma_index, redistribute_products) не стирают исходную конфигурацию.
+    """
+    sources = {}
+    for record in iter_records(path, ("key", "source")):
+        if record["source"] is not None:
+            sources[record["key"]] = record["source"]
+    return sources
+
+
+def export_parquet(path: str, parquet_path: str = None) -> str:
+    """
+    Выгружает актуальное состояние хранилища в Parquet (нужен pyarrow).
+
+    Returns:
+        str: Путь к файлу Parquet.
+    """
+    if pyarrow is None:
+        raise ImportError("Для экспорта в Parquet установите pyarrow: pip install pyarrow")
+    parquet_path = parquet_path or path[:-len(STORE_SUFFIX)] + ".parquet"
+    rows = list(iter_latest(path))
+    table = pyarrow.table({column: [row.get(column) for row in rows] for column in STORE_COLUMNS})
+    pyarrow.parquet.write_table(table, parquet_path, compression='zstd')
+    return parquet_path
+
+
+def read_parquet_columns(parquet_path: str, columns) -> dict:
+    """
+    Читает из Parquet только указанные колонки через memory map (нужен pyarrow).
+
+    Returns:
+        dict[str, list]: Колонка → список значений.
+    """
+    if pyarrow is None:
+        raise ImportError("Для чтения Parquet установите pyarrow: pip install pyarrow")
+    table = pyarrow.parquet.read_table(parquet_path, columns=list(columns), memory_map=True)
+    return table.to_pydict()
+
+
+def main():
+    """
+    Выгрузка всех хранилищ из output/ в Parquet:
+        python -m utils.product_store
+    """
+    import glob
+    import logging
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M')
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'output')
+    for path in glob.glob(os.path.join(output_dir, '**', f'*{STORE_SUFFIX}'), recursive=True):
+        logging.info(f"📦 {os.path.basename(path)} → {os.path.basename(export_parquet(path))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# finpi_scraper/utils/profiling.py
+"""
+Опциональные хуки профилирования для запуска main.py с флагом --profile.
+
+- profile_section: оборачивает участок кода в cProfile и сохраняет .prof и текстовую сводку;
+- LoopStallMonitor: сторожевой поток, который замечает блокировки event loop дольше
+  заданного порога и снимает стек потока цикла в момент блокировки (BeautifulSoup,
+  spaCy, синхронный файловый ввод-вывод и т.п.);
+- SlowCallbackCollector: собирает предупреждения asyncio о медленных колбэках
+  (режим отладки loop.slow_callback_duration).
+"""
+import asyncio
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import datetime
+
+DEFAULT_STALL_MS = 100  # Порог блокировки event loop в миллисекундах
+PROFILE_TOP_N = 40  # Количество строк в текстовой сводке pstats
+MAX_STACK_DEPTH = 25  # Сколько кадров стека сохранять для каждой блокировки
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def make_profile_dir(base_dir: str, run_id: str = None) -> str:
+    """
+    Создает директорию артефактов профилирования для одного запуска.
+
+    Args:
+        base_dir (str): Директория, где лежит scraper.log.
+        run_id (str): Идентификатор запуска; по умолчанию текущее время.
+
+    Returns:
+        str: Путь вида <base_dir>/profiles/<run_id>.
+    """
+    run_id = run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+    profile_dir = os.path.join(base_dir, 'profiles', run_id)
+    os.makedirs(profile_dir, exist_ok=True)
+    return profile_dir
+
+
+@contextmanager
+def profile_section(profile_dir: str, name: str):
+    """
+    Профилирует блок кода через cProfile.
+    Сохраняет <name>.prof (для snakeviz/pstats) и <name>.txt с топом по cumulative time.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        prof_path = os.path.join(profile_dir, f"{name}.prof")
+        profiler.dump_stats(prof_path)
+
+        summary = io.StringIO()
+        stats = pstats.Stats(profiler, stream=summary)
+        stats.sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+        with open(os.path.join(profile_dir, f"{name}.txt"), 'w', encoding='utf-8') as f:
+            f.write(summary.getvalue())
+        logging.info(f"🔬 Профиль '{name}' сохранен: {prof_path}")
+
+
+class SlowCallbackCollector(logging.Handler):
+    """
+    Перехватывает сообщения логгера 'asyncio' о медленных колбэках
+    ("Executing <Task ...> took 0.250 seconds").
+    """
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.records = []
+
+    def emit(self, record):
+        message = record.getMessage()
+        if 'took' in message:
+            self.records.append({
+                "time": datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+                "message": message,
+            })
+
+
+class LoopStallMonitor:
+    """
+    Сторожевой поток для event loop.
+
+    Внутри цикла крутится корутина-пульс, которая каждые interval секунд отмечает время.
+    Если пульс не обновлялся дольше threshold_ms, цикл чем-то заблокирован: поток снимает
+    стек потока цикла (sys._current_frames) и запоминает, где именно он стоит.
+
+    Args:
+        threshold_ms (float): Порог блокировки в миллисекундах.
+    """
+    def __init__(self, threshold_ms: float = DEFAULT_STALL_MS):
+        self.threshold = threshold_ms / 1000
+        self.interval = self.threshold / 4
+        self.stalls = []
+        self._last_beat = time.monotonic()
+        self._current_stall = None
+        self._loop_thread_id = None
+        self._stop_event = threading.Event()
+        self._watchdog = None
+        self._heartbeat_task = None
+        self._lock = threading.Lock()
+
+    async def _heartbeat(self):
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                if self._current_stall is not None:
+                    # Цикл снова ожил — фиксируем итоговую длительность блокировки
+                    self._current_stall["duration_ms"] = round((now - self._last_beat) * 1000, 1)
+                    self.stalls.append(self._current_stall)
+                    self._current_stall = None
+                self._last_beat = now
+            await asyncio.sleep(self.interval)
+
+    def _watch(self):
+        while not self._stop_event.wait(self.interval):
+            with self._lock:
+                lag = time.monotonic() - self._last_beat
+                if lag < self.threshold or self._current_stall is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                stack = traceback.format_stack(frame, limit=MAX_STACK_DEPTH) if frame else []
+                self._current_stall = {
+                    "started": datetime.now().isoformat(timespec='milliseconds'),
+                    "duration_ms": round(lag * 1000, 1),
+                    "stack": [line.rstrip() for line in stack],
+                }
+
+    def start(self):
+        """Запускает пульс в текущем event loop и сторожевой поток. Вызывать внутри цикла."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._heartbeat_task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-stall-monitor", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        """Останавливает мониторинг."""
+        self._stop_event.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+        if self._watchdog:
+            self._watchdog.join()
+        if self._current_stall is not None:
+            self.stalls.append(self._current_stall)
+            self._current_stall = None
+
+    @staticmethod
+    def _stall_location(stack):
+        """
+        Место блокировки: самый глубокий кадр из кода проекта,
+        а если такого нет — самый глубокий кадр вообще.
+        """
+        frames = [line.splitlines()[0].strip() for line in stack]
+        for frame in reversed(frames):
+            if PROJECT_DIR in frame and 'site-packages' not in frame:
+                return frame
+        return frames[-1] if frames else "unknown"
+
+    def summary(self) -> dict:
+        """Сводка: количество блокировок, суммарное и максимальное время, топ мест в коде."""
+        durations = [s["duration_ms"] for s in self.stalls]
+        hotspots = {}
+        for stall in self.stalls:
+            location = self._stall_location(stall["stack"])
+            hotspots[location] = hotspots.get(location, 0) + stall["duration_ms"]
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "count": len(self.stalls),
+            "total_ms": round(sum(durations), 1),
+            "max_ms": max(durations) if durations else 0,
+            "hotspots_ms": dict(sorted(hotspots.items(), key=lambda item: item[1], reverse=True)),
+        }
+
+
+def save_loop_report(profile_dir: str, monitor: LoopStallMonitor, slow_callbacks: SlowCallbackCollector):
+    """Сохраняет отчет о блокировках event loop в loop_stalls.json."""
+    report = {
+        "summary": monitor.summary(),
+        "stalls": monitor.stalls,
+        "slow_callbacks": slow_callbacks.records,
+    }
+    report_path = os.path.join(profile_dir, 'loop_stalls.json')
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    summary = report["summary"]
+    logging.info(
+        f"🐢 Блокировок event loop > {summary['threshold_ms']:.0f} мс: {summary['count']} "
+        f"(всего {summary['total_ms']:.0f} мс, макс. {summary['max_ms']:.0f} мс) → {report_path}"
+    )
@@ -10,18 +10,23 @@ import json
 import os
 import sys
 from collections import defaultdict
+from itertools import tee
 import logging
 
 # --- Исправление импорта для запуска из командной строки ---
 try:
     # Попытка относительного импорта, когда скрипт - часть пакета
-    from .categorization import categorize_product
-    from .lemmatizer import lemmatize_text # Нужен для определения языка
+    from .categorization import categorize_lemmas, compile_keywords
+    from .lemmatizer import lemmatize_batch # Нужен для определения языка
+    from .product_io import iter_products, write_products
+    from . import product_store
 except ImportError:
     # Фолбэк для прямого запуска: добавляем родительскую директорию в sys.path
     sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-    from utils.categorization import categorize_product
-    from utils.lemmatizer import lemmatize_text
+    from utils.categorization import categorize_lemmas, compile_keywords
+    from utils.lemmatizer import lemmatize_batch
+    from utils.product_io import iter_products, write_products
+    from utils import product_store
 
 def load_keywords(keywords_file):
     """Загружает ключевые слова из файла."""
@@ -42,17 +47,15 @@ def load_products_from_file(file_path):
         logging.warning(f"Файл не найден, будет создан новый: {os.path.basename(file_path)}")
         return []
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return [line.strip() for line in f.readlines() if line.strip()]
+        return list(iter_products(file_path))
     except Exception as e:
         logging.error(f"Ошибка чтения файла {file_path}: {e}")
         return []
 
 def save_products_to_file(products, file_path):
-    """Сохраняет список товаров в файл, перезаписывая его."""
+    """Сохраняет список товаров в файл, атомарно перезаписывая его."""
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(products) + '\n')
+        write_products(file_path, products)
         return True
     except Exception as e:
         logging.error(f"Ошибка записи в файл {file_path}: {e}")
@@ -80,25 +83,35 @@ def redistribute_products(other_file_path, keywords_file, lang='uk'):
     if not keywords_data:
         return False
 
-    products = load_products_from_file(other_file_path)
-    if not products:
+    if not os.path.exists(other_file_path):
         logging.warning("Файл OTHER пуст или не найден. Нечего перераспределять.")
         return False
 
-    logging.info(f"Загружено {len(products)} товаров из {os.path.basename(other_file_path)}")
-
     # Группируем товары по новым категориям
     newly_categorized = defaultdict(list)
     remaining_in_other = []
+    product_lemmas = {}
+    products_count = 0
     
-    for product in products:
+    # Файл читается потоково, леммы считаются пакетно
+    keyword_index = compile_keywords(keywords_data)
+    products, to_lemmatize = tee(iter_products(other_file_path))
+    for product, lemmas in zip(products, lemmatize_batch(to_lemmatize, lang)):
+        products_count += 1
         # Определяем категорию с учетом языка
-        subcategory = categorize_product(product, keywords_data, lang)
+        subcategory = categorize_lemmas(set(lemmas), keyword_index)
         if subcategory != 'other':
+            product_lemmas[product] = lemmas
             newly_categorized[subcategory].append(product)
         else:
             remaining_in_other.append(product)
 
+    if not products_count:
+        logging.warning("Файл OTHER пуст или не найден. Нечего перераспределять.")
+        return False
+
+    logging.info(f"Обработано {products_count} товаров из {os.path.basename(other_file_path)}")
+
     if not newly_categorized:
         logging.info("Не найдено товаров для перераспределения с новыми ключами.")
         return True
@@ -124,6 +137,18 @@ def redistribute_products(other_file_path, keywords_file, lang='uk'):
     # Обновляем исходный файл OTHER
     logging.info(f"🗑️ Обновляю {os.path.basename(other_file_path)}...")
     save_products_to_file(remaining_in_other, other_file_path)
+
+    # Фиксируем новые подкатегории в компактном хранилище, если оно есть
+    store_file = product_store.store_path_for_text_file(other_file_path)
+    if store_file and os.path.exists(store_file) and '_' in base_filename:
+        site_name, group_name = base_filename.split('_', 1)
+        records = [
+            product_store.make_record(product, site_name, group_name, subcategory, product_lemmas[product])
+            for subcategory, prods in newly_categorized.items()
+            for product in prods
+        ]
+        product_store.append_records(store_file, records)
+        logging.info(f"🗜️ Хранилище {os.path.basename(store_file)} обновлено: {len(records)} записей")
     
     logging.info(f"\n🎉 Перераспределение завершено!")
     logging.info(f"📦 Всего перераспределено: {total_redistributed} товаров.")
@@ -0,0 +1,299 @@
+# finpi_scraper/utils/work_queue.py
+"""
+Очередь единиц работы для распределенного парсинга на SQLite.
+
+Единица работы — диапазон страниц одной конфигурации из config.json
+(сайт, группа, категория, страницы page_start..page_end). Несколько процессов
+или узлов с общим файлом базы забирают единицы через claim(), возвращают
+найденные товары через complete() и сообщают об ошибках через fail().
+Упавшие и "зависшие" (истек lease) единицы возвращаются в очередь,
+пока не исчерпан лимит попыток.
+"""
+import json
+import sqlite3
+import time
+
+from .hashset import product_hash
+
+DEFAULT_LEASE_SECONDS = 600  # Сколько единица может быть "в работе" до возврата в очередь
+MAX_ATTEMPTS = 3  # После стольких неудачных попыток единица помечается как failed
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    config_key TEXT NOT NULL,
+    site_name TEXT NOT NULL,
+    group_name TEXT NOT NULL,
+    config_json TEXT NOT NULL,
+    page_start INTEGER NOT NULL,
+    page_end INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    error TEXT,
+    updated_at REAL,
+    UNIQUE (config_key, page_start)
+);
+CREATE INDEX IF NOT EXISTS idx_units_status ON units (status);
+CREATE TABLE IF NOT EXISTS results (
+    unit_id INTEGER NOT NULL,
+    config_key TEXT NOT NULL,
+    site_name TEXT NOT NULL,
+    group_name TEXT NOT NULL,
+    product TEXT NOT NULL,
+    page INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_results_group ON results (site_name, group_name);
+CREATE INDEX IF NOT EXISTS idx_results_config ON results (config_key);
+CREATE TABLE IF NOT EXISTS known_products (
+    site_name TEXT NOT NULL,
+    group_name TEXT NOT NULL,
+    product TEXT NOT NULL,
+    PRIMARY KEY (site_name, group_name, product)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS known_hashes (
+    site_name TEXT NOT NULL,
+    group_name TEXT NOT NULL,
+    hash INTEGER NOT NULL,
+    PRIMARY KEY (site_name, group_name, hash)
+) WITHOUT ROWID;
+"""
+
+
+def _signed(value: int) -> int:
+    """64-битный беззнаковый хеш в диапазоне INTEGER SQLite."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def config_key(config: dict) -> str:
+    """Уникальный ключ конфигурации: сайт + категория."""
+    return f"{config['site_name']}:{config['category_name']}"
+
+
+def group_name_of(config: dict) -> str:
+    """Имя группы конфигурации (как в main_async)."""
+    return config.get('group', config['category_name'])
+
+
+class WorkQueue:
+    """
+    Очередь единиц работы поверх файла SQLite.
+
+    Args:
+        db_path (str): Путь к файлу базы (общий для всех воркеров).
+        lease_seconds (float): Время аренды единицы воркером.
+        max_attempts (int): Лимит попыток на единицу.
+    """
+    def __init__(self, db_path: str, lease_seconds: float = DEFAULT_LEASE_SECONDS, max_attempts: int = MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # isolation_level=None: транзакциями управляем сами (BEGIN IMMEDIATE для claim)
+        self.conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def reset(self) -> None:
+        """Очищает очередь перед новым обходом."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        for table in ("units", "results", "known_products", "known_hashes"):
+            self.conn.execute(f"DELETE FROM {table}")
+        self.conn.execute("COMMIT")
+
+    def enqueue(self, config: dict, page_start: int, page_end: int) -> bool:
+        """
+        Добавляет единицу работы. Повторное добавление того же диапазона игнорируется.
+
+        Returns:
+            bool: True, если единица действительно добавлена.
+        """
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO units (config_key, site_name, group_name, config_json, page_start, page_end, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (config_key(config), config['site_name'], group_name_of(config),
+             json.dumps(config, ensure_ascii=False), page_start, page_end, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def seed_known_products(self, site_name: str, group_name: str, products) -> None:
+        """Загружает уже известные товары группы, чтобы воркеры отбрасывали их сразу."""
+        self.conn.execute("BEGIN")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO known_products (site_name, group_name, product) VALUES (?, ?, ?)",
+            ((site_name, group_name, p) for p in products),
+        )
+        self.conn.execute("COMMIT")
+
+    def seed_known_hashes(self, site_name: str, group_name: str, hashes) -> None:
+        """
+        Загружает хеши известных товаров группы с compact_dedup (ProductHashSet.iter_hashes),
+        чтобы не переводить множество обратно в названия.
+        """
+        self.conn.execute("BEGIN")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO known_hashes (site_name, group_name, hash) VALUES (?, ?, ?)",
+            ((site_name, group_name, _signed(value)) for value in hashes),
+        )
+        self.conn.execute("COMMIT")
+
+    def filter_new(self, site_name: str, group_name: str, products: list[str]) -> list[str]:
+        """Возвращает товары, которых нет среди известных товаров группы (по названиям и по хешам)."""
+        known = set()
+        known_hashes = set()
+        for start in range(0, len(products), 500):
+            chunk = products[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT product FROM known_products WHERE site_name = ? AND group_name = ? AND product IN ({placeholders})",
+                (site_name, group_name, *chunk),
+            )
+            known.update(row["product"] for row in rows)
+            hashes = [_signed(product_hash(p)) for p in chunk]
+            rows = self.conn.execute(
+                f"SELECT hash FROM known_hashes WHERE site_name = ? AND group_name = ? AND hash IN ({placeholders})",
+                (site_name, group_name, *hashes),
+            )
+            known_hashes.update(row["hash"] for row in rows)
+        return [p for p in products if p not in known and _signed(product_hash(p)) not in known_hashes]
+
+    def claim(self, worker_id: str):
+        """
+        Атомарно забирает следующую свободную единицу (или единицу с истекшим lease).
+
+        Returns:
+            dict | None: Единица с распарсенным config или None, если брать нечего.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._expire_exhausted_leases(now)
+            row = self.conn.execute(
+                "SELECT * FROM units WHERE (status = 'pending' OR (status = 'running' AND lease_until < ?)) "
+                "AND attempts < ? ORDER BY page_start, id LIMIT 1",
+                (now, self.max_attempts),
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE units SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ?",
+                (worker_id, now + self.lease_seconds, now, row["id"]),
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        unit = dict(row)
+        unit["attempts"] += 1
+        unit["worker"] = worker_id
+        unit["config"] = json.loads(unit.pop("config_json"))
+        return unit
+
+    def _expire_exhausted_leases(self, now: float) -> None:
+        """Единицы с истекшим lease и исчерпанными попытками помечаются как failed."""
+        self.conn.execute(
+            "UPDATE units SET status = 'failed', error = 'lease expired', lease_until = NULL, updated_at = ? "
+            "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+            (now, now, self.max_attempts),
+        )
+
+    def complete(self, unit_id: int, products: list[tuple[str, int]]) -> None:
+        """
+        Сохраняет результаты единицы и помечает ее выполненной.
+        Предыдущие результаты этой единицы (от упавшей попытки) заменяются.
+
+        Args:
+            products (list[tuple[str, int]]): Пары (название товара, номер страницы).
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            unit = self.conn.execute("SELECT * FROM units WHERE id = ?", (unit_id,)).fetchone()
+            self.conn.execute("DELETE FROM results WHERE unit_id = ?", (unit_id,))
+            self.conn.executemany(
+                "INSERT INTO results (unit_id, config_key, site_name, group_name, product, page) VALUES (?, ?, ?, ?, ?, ?)",
+                ((unit_id, unit["config_key"], unit["site_name"], unit["group_name"], name, page)
+                 for name, page in products),
+            )
+            self.conn.execute(
+                "UPDATE units SET status = 'done', lease_until = NULL, error = NULL, updated_at = ? WHERE id = ?",
+                (time.time(), unit_id),
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def fail(self, unit_id: int, error: str) -> str:
+        """
+        Отмечает неудачную попытку. Единица возвращается в очередь,
+        пока не исчерпан лимит попыток.
+
+        Returns:
+            str: Новый статус единицы ('pending' или 'failed').
+        """
+        row = self.conn.execute("SELECT attempts FROM units WHERE id = ?", (unit_id,)).fetchone()
+        status = 'pending' if row["attempts"] < self.max_attempts else 'failed'
+        self.conn.execute(
+            "UPDATE units SET status = ?, lease_until = NULL, error = ?, updated_at = ? WHERE id = ?",
+            (status, error, time.time(), unit_id),
+        )
+        return status
+
+    def count_results(self, key: str) -> int:
+        """Количество уникальных новых товаров, найденных по конфигурации."""
+        row = self.conn.execute(
+            "SELECT COUNT(DISTINCT product) AS n FROM results WHERE config_key = ?", (key,)
+        ).fetchone()
+        return row["n"]
+
+    def iter_groups(self):
+        """Перечисляет (site_name, group_name), по которым есть единицы работы."""
+        rows = self.conn.execute("SELECT DISTINCT site_name, group_name FROM units ORDER BY site_name, group_name")
+        return [(row["site_name"], row["group_name"]) for row in rows]
+
+    def group_configs(self, site_name: str, group_name: str) -> list[dict]:
+        """Конфигурации группы в порядке их добавления."""
+        rows = self.conn.execute(
+            "SELECT config_json FROM units WHERE site_name = ? AND group_name = ? GROUP BY config_key ORDER BY MIN(id)",
+            (site_name, group_name),
+        )
+        return [json.loads(row["config_json"]) for row in rows]
+
+    def iter_results(self, site_name: str, group_name: str):
+        """Уникальные новые товары группы (дедупликация на стороне SQLite)."""
+        rows = self.conn.execute(
+            "SELECT DISTINCT product FROM results WHERE site_name = ? AND group_name = ?", (site_name, group_name)
+        )
+        for row in rows:
+            yield row["product"]
+
+    def iter_config_results(self, key: str):
+        """Уникальные новые товары, найденные по конфигурации."""
+        rows = self.conn.execute("SELECT DISTINCT product FROM results WHERE config_key = ?", (key,))
+        for row in rows:
+            yield row["product"]
+
+    def stats(self) -> dict:
+        """Количество единиц по статусам."""
+        rows = self.conn.execute("SELECT status, COUNT(*) AS n FROM units GROUP BY status")
+        counts = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def is_drained(self) -> bool:
+        """True, если не осталось единиц, которые можно взять в работу или которые сейчас в работе."""
+        self._expire_exhausted_leases(time.time())
+        row = self.conn.execute("SELECT COUNT(*) AS n FROM units WHERE status IN ('pending', 'running')").fetchone()
+        return row["n"] == 0